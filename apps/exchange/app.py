@@ -1,12 +1,43 @@
+import os
 import time
-import json
 import terminalio
 import displayio
 from adafruit_display_text.label import Label
-from adafruit_display_shapes.rect import Rect
+from adafruit_display_shapes.sparkline import Sparkline
+from pico.profiler import span
+from pico.system import SystemManager
+from pico.request import ResponseCache
+from pico.ringfile import RingFile, KEY_SIZE
+from pico.feeds import FeedHub
 
 # 应用名称
 APP_NAME = "Exchange"
+# 推送的汇率变化：rates/USD/<货币> 内容为汇率，一批变化后 rates/USD/updated 内容为数据更新时间
+FEEDS = ("rates/USD/+",)
+FEED_UPDATED = "updated"
+
+# 汇率接口，每天更新一次，一次请求返回所有货币的汇率
+RATE_URL = "http://open.er-api.com/v6/latest/USD"
+BASE = "USD"
+# 默认显示的货币，可以在settings.toml中用EXCHANGE_PAIRS="CNY,EUR,JPY"修改
+PAIRS = ("CNY", "EUR", "JPY", "GBP")
+# 屏幕最多显示的货币数
+MAX_PAIRS = 4
+# 数据的更新时间，用于判断是否是新数据
+UPDATE_PATH = ("time_last_update_unix",)
+# 缓存有效期（秒）
+RATE_TTL = 3600
+# 一次更新的时间预算（秒），包括等待WiFi
+FETCH_TIMEOUT = 15
+# 更新中和空闲时的主循环间隔（秒）
+FETCH_INTERVAL = 0.02
+IDLE_INTERVAL = 0.1
+# 进度指示
+SPINNER = "|/-\\"
+SPINNER_INTERVAL = 0.1
+# 历史记录
+HISTORY_PATH = "/exchange_history.bin"
+HISTORY_LENGTH = 30
 
 class App:
     def __init__(self, pico, hw, colors):
@@ -15,126 +46,341 @@ class App:
         self.hw = hw
         self.display = pico.display
         self.colors = colors
-        self.wifi = pico.wifi
-        self.request = pico.request
+        # 网络由SystemManager统一管理，第一次请求时再等待连接
+        self.system = SystemManager()
+        # 应用运行期间需要网络，退出后射频可以关闭
+        self.system.acquire_wifi(APP_NAME)
+        self.request = None
+        # 正在进行的更新，由主循环推进
+        self.updating = False
+        self.revalidate = False
+        self.update_started = 0
+        self.fetch = None
+        self.spinner_index = 0
+        self.spinner_time = 0
+        # 进入应用时按键可能还按着，先等松开
+        self.held = {'a': True, 'b': True}
+        # 汇率缓存，打开应用时先显示上次的汇率
+        self.cache = ResponseCache(ttl=RATE_TTL)
+        # 配置了MQTT时汇率变化由服务器推送，不再定时请求
+        self.feeds = FeedHub()
+        # 正在显示的值，推送来的值，以及推送值所属批次的数据更新时间
+        # （批次的updated消息到达前为空，视为比请求到的数据新）
+        self.values = {}
+        self.pushed = {}
+        self.pushed_at = {}
+
+        # 显示的货币和每次请求提取的路径，所有货币共用一次请求
+        self.pairs = self.load_pairs()
+        self.paths = [("rates", code) for code in self.pairs] + [UPDATE_PATH]
+
+        # 历史记录：更新时间加每种货币一个float，货币列表保存在文件头中，
+        # 换了货币时不会把旧记录算到新货币上
+        key = ",".join(self.pairs).encode()[:KEY_SIZE]
+        self.history = RingFile(HISTORY_PATH, "<I" + "f" * len(self.pairs), HISTORY_LENGTH, key)
         
         # 创建显示组
         self.main_group = displayio.Group()
         
-        # 创建背景
-        background = Rect(0, 0, self.display.width, self.display.height, fill=0x000000)
-        self.main_group.append(background)
+        # 创建背景，共用全屏位图，不再分配一张新的
+        self.main_group.append(pico.get_background(0x000000))
         
         # 创建标题
         self.title = Label(
             terminalio.FONT,
-            text="USD to CNY",
+            text=f"1 {BASE} =",
             color=colors['text'],
-            x=self.display.width // 2 - 30,
-            y=20
+            x=5,
+            y=8
         )
         self.main_group.append(self.title)
         
-        # 创建汇率显示
-        self.rate_label = Label(
+        # CIRCUITPY对程序只读时历史记录只在内存中，退出应用后丢失
+        self.storage_label = Label(
             terminalio.FONT,
-            text="Loading...",
-            color=colors['text'],
-            x=20,
-            y=self.display.height // 2
+            text="",
+            color=colors['hint'],
+            x=self.display.width - 90,
+            y=8
         )
-        self.main_group.append(self.rate_label)
+        self.main_group.append(self.storage_label)
+        self.show_storage()
+
+        # 每种货币一行：汇率和走势图
+        row_height = 24
+        self.rate_labels = []
+        self.sparklines = []
+        for i, code in enumerate(self.pairs):
+            y = 28 + i * row_height
+            rate_label = Label(
+                terminalio.FONT,
+                text=f"{code} --",
+                color=colors['text'],
+                x=5,
+                y=y
+            )
+            self.main_group.append(rate_label)
+            self.rate_labels.append(rate_label)
+
+            sparkline = Sparkline(
+                width=self.display.width - 125,
+                height=row_height - 6,
+                max_items=HISTORY_LENGTH,
+                x=120,
+                y=y - (row_height - 6) // 2,
+                color=colors['selected']
+            )
+            self.main_group.append(sparkline)
+            self.sparklines.append(sparkline)
         
         # 创建更新时间显示
         self.time_label = Label(
             terminalio.FONT,
             text="",
             color=colors['hint'],
-            x=20,
-            y=self.display.height - 20
+            x=5,
+            y=self.display.height - 8
         )
         self.main_group.append(self.time_label)
         
         # 创建提示
         self.hint = Label(
             terminalio.FONT,
-            text="B:Back  A:Refresh",
+            text="A:Refresh B:Back",
             color=colors['hint'],
-            x=20,
-            y=self.display.height - 40
+            x=self.display.width - 100,
+            y=self.display.height - 8
         )
         self.main_group.append(self.hint)
+
+        # 用保存的历史绘制走势图
+        self.load_history()
         
         # 上次更新时间
         self.last_update = 0
         print("Exchange Rate App initialized")  # 调试信息
         
-    def get_exchange_rate(self):
-        """获取汇率数据"""
+    def load_pairs(self):
+        """读取要显示的货币"""
+        pairs = PAIRS
         try:
-            print("Getting exchange rate...")
+            setting = os.getenv("EXCHANGE_PAIRS")
+            if setting:
+                pairs = tuple(code.strip().upper() for code in setting.split(",") if code.strip())
+        except Exception as e:
+            print(f"Invalid EXCHANGE_PAIRS setting: {e}")
+        return pairs[:MAX_PAIRS]
+
+    def load_history(self):
+        """把历史记录一次性加入走势图"""
+        records = self.history.records()
+        for record in records:
+            for i, sparkline in enumerate(self.sparklines):
+                sparkline.add_value(record[i + 1], update=False)
+        for sparkline in self.sparklines:
+            sparkline.update()
+        print(f"Loaded {len(records)} history records")
+
+    def show_storage(self):
+        """显示历史记录是否保存到了flash"""
+        self.storage_label.text = "" if self.history.persistent else "History: RAM"
+
+    def add_history(self, values):
+        """有新数据时追加一条历史记录，走势图只增加一个点"""
+        updated = values.get(UPDATE_PATH) or 0
+        last = self.history.last()
+        if last is not None and updated and updated <= last[0]:
+            return
+        rates = [values.get(("rates", code)) for code in self.pairs]
+        if None in rates:
+            # 缺少某种货币时不记录，保持每条记录完整
+            return
+        self.history.append(updated, *rates)
+        self.show_storage()
+        for sparkline, rate in zip(self.sparklines, rates):
+            sparkline.add_value(rate)
+
+    def show_rates(self, values, cached=False):
+        """显示所有货币的汇率，推送来的值覆盖请求或缓存的值"""
+        values = dict(values)
+        values.update(self.pushed)
+        self.values = values
+        for code, rate_label in zip(self.pairs, self.rate_labels):
+            rate = values.get(("rates", code))
+            rate_label.text = f"{code} {rate:.4f}" if rate is not None else f"{code} --"
+        if cached:
+            self.time_label.text = "Cached"
+        else:
+            current_time = time.localtime()
+            self.time_label.text = f"Updated: {current_time.tm_hour:02d}:{current_time.tm_min:02d}"
+        
+    def show_cached_rates(self):
+        """显示缓存的汇率，不访问网络
+
+        Returns:
+            缓存是否还在有效期内
+        """
+        values = self.cache.lookup(RATE_URL, self.paths)
+        if values is None:
+            return False
+        self.show_rates(values, cached=True)
+        return self.cache.is_fresh(RATE_URL)
+        
+    def show_error(self, message):
+        """更新失败，有缓存时继续显示缓存的汇率"""
+        print(f"Error getting exchange rate: {message}")
+        if self.cache.lookup(RATE_URL, self.paths) is None:
+            self.time_label.text = f"Error: {message}"[:20]
+        else:
+            self.show_cached_rates()
+            self.time_label.text = "Offline, cached"
+
+    def start_update(self, revalidate=False):
+        """开始更新汇率，不阻塞，之后由poll_update()在主循环中推进
+
+        一次请求取出所有货币的汇率。
+
+        Args:
+            revalidate: 为True时即使缓存未过期也向服务器验证
+        """
+        print("Getting exchange rate...")
+        self.last_update = time.monotonic()
+        # 缓存未过期时不需要网络
+        if not revalidate and self.show_cached_rates():
+            print("Using cached rates")
+            return
+        self.updating = True
+        self.revalidate = revalidate
+        self.update_started = time.monotonic()
+        self.fetch = None
+        # 等待后台WiFi连接
+        if self.system.start_wifi() is None:
+            self.finish_update()
+            self.show_error("No WiFi")
             
-            # 检查WiFi和request是否可用
-            if self.wifi is None or self.request is None:
-                print("Network components not initialized, attempting to reinitialize...")
-                from pico.wifi import PicoWifi
-                from pico.request import PicoRequest
-                
-                # 重新初始化WiFi
-                self.wifi = PicoWifi()
-                if not self.wifi.is_connected():
-                    print("WiFi not connected, connecting...")
-                    if not self.wifi.connect():
-                        raise Exception("Failed to connect to WiFi")
-                
-                if not self.wifi.socketpool:
-                    print("Socketpool not initialized, reconnecting WiFi...")
-                    if not self.wifi.connect():
-                        raise Exception("Failed to initialize socketpool")
-                
-                # 重新初始化request
-                print("Reinitializing request client...")
-                self.request = PicoRequest(self.wifi.socketpool)
+    def poll_update(self):
+        """推进一步更新：等待WiFi、请求、接收响应，每一步都不阻塞"""
+        now = time.monotonic()
+        elapsed = now - self.update_started
+        if self.fetch is None:
+            connection = self.system.connection
+            state = connection.poll()
+            if state == connection.CONNECTED:
+                self.send_request(FETCH_TIMEOUT - elapsed)
+            elif state == connection.FAILED or elapsed >= FETCH_TIMEOUT:
+                self.finish_update()
+                self.show_error("WiFi timeout")
+                return
+            elif connection.attempt_due:
+                # 后台没有连上，只能主动连接，这一步会阻塞
+                self.time_label.text = "Connecting WiFi..."
+                if self.system.get_wifi(timeout=max(1, FETCH_TIMEOUT - elapsed)) is None:
+                    self.finish_update()
+                    self.show_error("WiFi timeout")
+                    return
+                self.send_request(FETCH_TIMEOUT - (time.monotonic() - self.update_started))
+        else:
+            state = self.fetch.poll()
+            if state == self.fetch.DONE:
+                self.handle_response(self.fetch)
+                return
+            if state == self.fetch.FAILED:
+                error = self.fetch.error
+                self.finish_update()
+                self.show_error(error)
+                return
+            
+        # 转动进度指示
+        if now - self.spinner_time >= SPINNER_INTERVAL:
+            self.spinner_time = now
+            self.spinner_index = (self.spinner_index + 1) % len(SPINNER)
+            stage = "Updating" if self.fetch else "WiFi"
+            self.time_label.text = f"{stage} {SPINNER[self.spinner_index]}  B:Cancel"
                 
-            # 确保WiFi已连接
-            if not self.wifi.is_connected():
-                print("WiFi not connected, connecting...")
-                if not self.wifi.connect():
-                    raise Exception("Failed to connect to WiFi")
+    def send_request(self, timeout):
+        """WiFi已连接，发出非阻塞请求"""
+        if self.request is None:
+            from pico.request import PicoRequest
+            print("Initializing request client...")
+            wifi = self.system.wifi
+            self.request = PicoRequest(wifi.socketpool, wifi.ssl_context, self.cache)
+        # 响应中只解析需要的汇率，过期的缓存用条件请求验证
+        print(f"Fetching data from {RATE_URL}")
+        self.fetch = self.request.fetch_values(RATE_URL, self.paths, self.revalidate, timeout=timeout)
                 
-            # 使用API获取汇率
-            url = "http://open.er-api.com/v6/latest/USD"
-            print(f"Fetching data from {url}")
-            try:
-                response = self.request.get(url)
-                print("Response received")
+    def handle_response(self, fetch):
+        """请求完成"""
+        self.finish_update()
+        print(f"Response received in {fetch.elapsed:.2f}s")
+        if fetch.status == 200:
+            print(f"Got rates: {fetch.values}")
+            if not fetch.from_cache:
+                self.drop_pushed(fetch.values.get(UPDATE_PATH))
+            self.show_rates(fetch.values)
+            if not fetch.from_cache:
+                self.add_history(fetch.values)
+        else:
+            print(f"API request failed with status {fetch.status}")
+            self.time_label.text = f"Failed: {fetch.status}"
                 
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        rate = data['rates']['CNY']
-                        print(f"Got rate: {rate}")
-                        self.rate_label.text = f"1 USD = {rate:.4f} CNY"
-                        current_time = time.localtime()
-                        self.time_label.text = f"Updated: {current_time.tm_hour:02d}:{current_time.tm_min:02d}"
-                        self.last_update = time.monotonic()
-                    except Exception as e:
-                        print(f"Error parsing response: {str(e)}")
-                        raise Exception(f"Failed to parse response: {str(e)}")
-                else:
-                    print(f"API request failed with status {response.status_code}")
-                    self.rate_label.text = f"Failed: {response.status_code}"
+    def drop_pushed(self, updated):
+        """丢弃比请求到的数据旧的推送值
                     
-            except Exception as e:
-                print(f"Request failed: {str(e)}")
-                raise
+        接口的数据每天才更新一次，推送的值通常更新，不能被请求结果覆盖。
+        """
+        if not updated:
+            return
+        for key, pushed_at in list(self.pushed_at.items()):
+            if pushed_at <= updated:
+                del self.pushed[key]
+                del self.pushed_at[key]
                 
-        except Exception as e:
-            print(f"Error getting exchange rate: {str(e)}")
-            self.rate_label.text = f"Error: {str(e)}"
-            # 出错时重置网络组件
-            self.request = None
-            self.wifi = None
+    def cancel_update(self):
+        """取消正在进行的更新"""
+        self.finish_update()
+        if self.cache.lookup(RATE_URL, self.paths) is None:
+            self.time_label.text = "Cancelled"
+        else:
+            self.show_cached_rates()
+
+    def finish_update(self):
+        """结束更新，请求还没完成时中止并关闭socket"""
+        if self.fetch is not None:
+            self.fetch.cancel()
+        self.updating = False
+        self.fetch = None
+        self.last_update = time.monotonic()
+
+    def on_feed(self, topic, message):
+        """收到推送的汇率变化，由FeedHub调用"""
+        code = topic.rsplit("/", 1)[-1]
+        try:
+            value = float(message)
+        except ValueError:
+            print(f"Invalid feed {topic}: {message}")
+            return
+        if code == FEED_UPDATED:
+            # 一批变化结束，记录这批推送值的时间和历史
+            updated = int(value)
+            self.pushed[UPDATE_PATH] = updated
+            self.values[UPDATE_PATH] = updated
+            for key in self.pushed:
+                self.pushed_at.setdefault(key, updated)
+            self.pushed_at[UPDATE_PATH] = updated
+            self.add_history(self.values)
+        elif code in self.pairs:
+            key = ("rates", code)
+            self.pushed[key] = value
+            self.pushed_at.pop(key, None)
+            self.show_rates(self.values)
+        self.last_update = time.monotonic()
+
+    def pressed(self, name):
+        """按键按下的瞬间返回True，按住时不重复触发"""
+        state = self.hw.get_button_state(name)
+        pressed = state and not self.held.get(name, False)
+        self.held[name] = state
+        return pressed
             
     def play(self):
         """运行应用"""
@@ -144,32 +390,46 @@ class App:
             self.display.root_group = self.main_group
             print("Display group set")  # 调试信息
             
-            # 初始获取汇率
-            self.get_exchange_rate()
+            # 先显示缓存的汇率，过期时再访问网络
+            self.start_update()
             
             while True:
                 try:
-                    # 处理按键
-                    if self.hw.get_button_state('b'):  # 返回
-                        print("Back button pressed")  # 调试信息
-                        return True
+                    # 处理按键，更新时B取消更新，否则返回
+                    if self.pressed('b'):
+                        if self.updating:
+                            print("Cancel button pressed")  # 调试信息
+                            self.cancel_update()
+                        else:
+                            print("Back button pressed")  # 调试信息
+                            return True
                         
-                    elif self.hw.get_button_state('a'):  # 刷新
+                    if self.updating:
+                        self.poll_update()
+
+                    elif self.pressed('a'):  # 刷新
                         print("Refresh button pressed")  # 调试信息
-                        self.rate_label.text = "Updating..."
-                        self.get_exchange_rate()
-                        time.sleep(0.2)
+                        self.start_update(revalidate=True)
                         
-                    # 每5分钟自动更新一次
-                    if time.monotonic() - self.last_update >= 300:
-                        print("Auto updating...")  # 调试信息
-                        self.get_exchange_rate()
+                    else:
+                        # 接收推送的汇率变化，只接收不建立连接，连接由菜单负责
+                        self.feeds.poll(connect=False)
+                        # 没有推送时每5分钟自动更新一次
+                        if not self.feeds.connected and time.monotonic() - self.last_update >= 300:
+                            print("Auto updating...")  # 调试信息
+                            self.start_update()
                         
                 except Exception as e:
                     print(f"Error in button handling: {str(e)}")
+                    self.finish_update()
                     
-                time.sleep(0.1)  # 降低循环频率
+                # 更新时缩短间隔，保证按键响应在50ms以内
+                time.sleep(FETCH_INTERVAL if self.updating else IDLE_INTERVAL)
                 
         except Exception as e:
             print(f"Fatal error in Exchange Rate App: {str(e)}")
-            return True 
\ No newline at end of file
+            return True
+
+        finally:
+            self.finish_update()
+            self.system.release_wifi(APP_NAME)
@@ -88,17 +88,8 @@ class App:
         """初始化显示"""
         self.main_group = displayio.Group()
         
-        # 创建背景
-        bg_bitmap = displayio.Bitmap(
-            self.display.display_width,
-            self.display.display_height,
-            1
-        )
-        bg_palette = displayio.Palette(1)
-        bg_palette[0] = self.colors['background']
-        self.main_group.append(
-            displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette)
-        )
+        # 创建背景（使用共享的背景位图和调色板）
+        self.main_group.append(self.display.get_background(self.colors['background']))
         
         # 添加提示文本
         self.add_hints()
@@ -180,11 +171,7 @@ class App:
         self.main_group = displayio.Group()
         
         # 绘制背景
-        color_bitmap = displayio.Bitmap(self.display.display_width, self.display.display_height, 1)
-        color_palette = displayio.Palette(1)
-        color_palette[0] = self.colors['background']
-        bg_sprite = displayio.TileGrid(color_bitmap, pixel_shader=color_palette, x=0, y=0)
-        self.main_group.append(bg_sprite)
+        self.main_group.append(self.display.get_background(self.colors['background']))
         
         # 显示正在播放的信息（使用hint颜色，更柔和）
         now_playing = self.create_text_label(
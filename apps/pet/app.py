@@ -381,8 +381,8 @@ class Pet:
         # 眼睛（专注表情）
         eye_left = Rect(self.x - 7, self.y - 13, 4, 4, fill=0x000000)
         eye_right = Rect(self.x + 3, self.y - 13, 4, 4, fill=0x000000)
-            group.append(eye_left)
-            group.append(eye_right)
+        group.append(eye_left)
+        group.append(eye_right)
         
         # 嘴巴（咬牙表情）
         mouth = Rect(self.x - 5, self.y - 7, 10, 2, fill=0x000000)
@@ -514,10 +514,10 @@ class App:
         self.animation_update_time = time.monotonic()
         
     def create_label(self, text, x, y):
-        """创建状态标签"""
-        return Label(
-            terminalio.FONT,
-            text=text,
+        """创建状态标签（固定容量的位图标签，数值变化时不重建字形）"""
+        return self.pico.create_value_label(
+            text,
+            12,
             color=self.colors['text'],
             x=x,
             y=y
@@ -543,7 +543,7 @@ class App:
         for key, value in current_stats.items():
             if value != self.last_stats[key]:
                 self.last_stats[key] = value
-                self.status_labels[key].text = f"{status_names[key]}: {value}%"
+                self.status_labels[key].value = f"{status_names[key]}: {value}%"
                 
     def show_notification(self, text, duration=1.0):
         """显示通知"""
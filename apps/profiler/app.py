@@ -0,0 +1,133 @@
+import displayio
+import terminalio
+from adafruit_display_text import label
+import time
+from pico.profiler import Profiler
+
+# 应用名称
+APP_NAME = "Profiler"
+
+# 显示的span行数
+ROWS = 6
+
+
+class App:
+    def __init__(self, display, hw, colors):
+        self.display = display
+        self.hw = hw
+        self.colors = colors
+        self.profiler = Profiler()
+        
+        # 预先创建每一行的标签，刷新时只更新文本
+        self.rows = []
+        
+        # 初始化显示
+        self.init_display()
+        
+    def init_display(self):
+        """初始化显示"""
+        self.main_group = displayio.Group()
+        
+        # 创建背景（使用共享的背景位图和调色板）
+        self.main_group.append(self.display.get_background(self.colors['background']))
+        
+        # 标题
+        self.title = label.Label(
+            terminalio.FONT,
+            text="",
+            color=self.colors['selected'],
+            x=5,
+            y=8
+        )
+        self.main_group.append(self.title)
+        
+        # 表头
+        self.main_group.append(label.Label(
+            terminalio.FONT,
+            text="span        calls  avg ms  max ms",
+            color=self.colors['hint'],
+            x=5,
+            y=24
+        ))
+        
+        # span行
+        for i in range(ROWS):
+            row = label.Label(
+                terminalio.FONT,
+                text="",
+                color=self.colors['text'],
+                x=5,
+                y=40 + i * 14
+            )
+            self.rows.append(row)
+            self.main_group.append(row)
+            
+        # 提示
+        self.main_group.append(label.Label(
+            terminalio.FONT,
+            text="A:On/Off  CTL:Reset  B:Back",
+            color=self.colors['hint'],
+            x=5,
+            y=self.display.display_height - 8
+        ))
+        
+        # 设置显示组
+        self.display.display.root_group = self.main_group
+        
+    def update_display(self):
+        """刷新span统计"""
+        state = "ON" if self.profiler.enabled else "OFF"
+        self.title.text = f"Profiler [{state}]"
+        
+        spans = self.profiler.top(ROWS)
+        for i, row in enumerate(self.rows):
+            if i < len(spans):
+                name, count, total, peak = spans[i]
+                avg = total / count / 1000
+                row.text = f"{name[:10]:<10}{count:>7}{avg:>8.2f}{peak / 1000:>8.1f}"
+            else:
+                row.text = ""
+                
+    def wait_release(self, button):
+        """等待按键释放"""
+        while self.hw.get_button_state(button):
+            time.sleep(0.05)
+            
+    def play(self):
+        """运行应用"""
+        try:
+            last_update = 0
+            # 等待按键释放
+            self.wait_release('a')
+            self.update_display()
+            
+            while True:
+                if self.hw.get_button_state('b'):
+                    self.wait_release('b')
+                    return True
+                    
+                elif self.hw.get_button_state('a'):
+                    # 切换统计开关
+                    if self.profiler.enabled:
+                        self.profiler.disable()
+                    else:
+                        self.profiler.enable()
+                    self.update_display()
+                    self.wait_release('a')
+                    
+                elif self.hw.get_button_state('ctl'):
+                    self.profiler.reset()
+                    self.update_display()
+                    self.wait_release('ctl')
+                    
+                # 每秒刷新一次
+                current_time = time.monotonic()
+                if current_time - last_update >= 1:
+                    self.update_display()
+                    last_update = current_time
+                    
+                time.sleep(0.1)
+                
+        except Exception as e:
+            print(f"Error in profiler app: {e}")
+            return True
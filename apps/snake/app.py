@@ -4,6 +4,8 @@ import displayio
 import terminalio
 from adafruit_display_text import label
 from adafruit_display_shapes.rect import Rect
+from pico.memtrace import profile, frame
+from pico.profiler import span
 
 # 应用名称，将显示在菜单中
 APP_NAME = "Snake"
@@ -23,22 +25,22 @@ class App:
         self.game_over = False
         self.colors = colors
         
-        # 创建背景
-        self.bg_bitmap = displayio.Bitmap(self.display.width, self.display.height, 1)
-        self.bg_palette = displayio.Palette(1)
-        self.bg_palette[0] = self.colors['background']
-        self.bg_sprite = displayio.TileGrid(self.bg_bitmap, pixel_shader=self.bg_palette)
+        # 创建背景（使用共享的背景位图和调色板）
+        self.bg_sprite = self.pico.get_background(self.colors['background'])
         
         # 创建显示组
         self.main_group = displayio.Group()
         self.main_group.append(self.bg_sprite)
         self.game_group = displayio.Group()
         self.main_group.append(self.game_group)
-        
-        # 创建分数标签
-        self.score_label = label.Label(
-            terminalio.FONT,
-            text="Score: 0",
+        # 蛇身方块，和self.snake一一对应
+        self.snake_rects = []
+        self.food_rect = None
+        
+        # 创建分数标签（固定容量的位图标签，更新时不重建字形）
+        self.score_label = self.pico.create_value_label(
+            "Score: 0",
+            12,
             color=0xFFFFFF,
             x=5,
             y=5
@@ -54,37 +56,59 @@ class App:
                 break
     
     def draw_game(self):
-        # 清除之前的游戏元素
-        while len(self.game_group) > 0:
-            self.game_group.pop()
-        
-        # 绘制蛇
-        for x, y in self.snake:
-            rect = Rect(
-                x * self.GRID_SIZE, 
-                y * self.GRID_SIZE, 
-                self.GRID_SIZE-1, 
-                self.GRID_SIZE-1, 
-                fill=0xFFFFFF
-            )
-            self.game_group.append(rect)
+        with span("draw"), profile("snake.draw"):
+            self.pico.begin_frame()
+            self._draw_game()
+            self.pico.end_frame()
+        frame("snake")
+
+    def _move_rect(self, rect, x, y):
+        """把方块移到网格(x, y)，新旧位置报告为改变的区域"""
+        size = self.GRID_SIZE - 1
+        self.pico.invalidate(rect.x, rect.y, size, size)
+        rect.x = x * self.GRID_SIZE
+        rect.y = y * self.GRID_SIZE
+        self.pico.invalidate(rect.x, rect.y, size, size)
+
+    def _new_rect(self, x, y, fill):
+        """在网格(x, y)创建方块"""
+        size = self.GRID_SIZE - 1
+        rect = Rect(x * self.GRID_SIZE, y * self.GRID_SIZE, size, size, fill=fill)
+        self.game_group.append(rect)
+        self.pico.invalidate(rect.x, rect.y, size, size)
+        return rect
+
+    def _draw_game(self):
+        # 每次移动只改变蛇头和蛇尾：把蛇尾的方块移到新的蛇头位置，
+        # 吃到食物变长时才新建方块，其余方块保持不动
+        rects = self.snake_rects
+        if len(rects) > len(self.snake):
+            # 新的一局，重建蛇身
+            while len(self.game_group) > 0:
+                self.game_group.pop()
+            rects.clear()
+            self.food_rect = None
+        
+        head_x, head_y = self.snake[0]
+        if len(rects) < len(self.snake):
+            rects.insert(0, self._new_rect(head_x, head_y, 0xFFFFFF))
+        elif rects and (rects[0].x, rects[0].y) != (head_x * self.GRID_SIZE, head_y * self.GRID_SIZE):
+            tail = rects.pop()
+            self._move_rect(tail, head_x, head_y)
+            rects.insert(0, tail)
         
         # 绘制食物
         if self.food:
-            food_rect = Rect(
-                self.food[0] * self.GRID_SIZE, 
-                self.food[1] * self.GRID_SIZE, 
-                self.GRID_SIZE-1, 
-                self.GRID_SIZE-1, 
-                fill=0xFF0000
-            )
-            self.game_group.append(food_rect)
+            if self.food_rect is None:
+                self.food_rect = self._new_rect(self.food[0], self.food[1], 0xFF0000)
+            elif (self.food_rect.x, self.food_rect.y) != (self.food[0] * self.GRID_SIZE, self.food[1] * self.GRID_SIZE):
+                self._move_rect(self.food_rect, self.food[0], self.food[1])
         
         # 更新分数
-        self.score_label.text = f"Score: {self.score}"
-        
-        # 更新显示
-        self.display.root_group = self.main_group
+        text = f"Score: {self.score}"
+        if text != self.score_label.value:
+            self.score_label.value = text
+            self.pico.invalidate_label(self.score_label)
     
     def update(self):
         # 获取新的蛇头位置
@@ -113,11 +137,7 @@ class App:
         start_group = displayio.Group()
         
         # 绘制背景
-        bg = displayio.Bitmap(self.display.width, self.display.height, 1)
-        palette = displayio.Palette(1)
-        palette[0] = self.colors['background']
-        bg_sprite = displayio.TileGrid(bg, pixel_shader=palette)
-        start_group.append(bg_sprite)
+        start_group.append(self.pico.get_background(self.colors['background']))
         
         # 显示标题
         title = label.Label(
@@ -143,14 +163,11 @@ class App:
         
     def show_game_over(self):
         """显示游戏结束界面"""
+        self.pico.resume_auto_refresh()
         over_group = displayio.Group()
         
         # 绘制背景
-        bg = displayio.Bitmap(self.display.width, self.display.height, 1)
-        palette = displayio.Palette(1)
-        palette[0] = self.colors['background']
-        bg_sprite = displayio.TileGrid(bg, pixel_shader=palette)
-        over_group.append(bg_sprite)
+        over_group.append(self.pico.get_background(self.colors['background']))
         
         # 显示游戏结束
         title = label.Label(
@@ -174,6 +191,7 @@ class App:
         
         self.display.root_group = over_group
         time.sleep(2)
+        self.pico.release_background(self.colors['background'])
         
     def play(self):
         """开始游戏"""
@@ -195,6 +213,12 @@ class App:
         self.game_over = False
         self.generate_food()
         
+        # 游戏画面只设置一次，之后每帧由draw_game显式刷新
+        self.display.root_group = self.main_group
+        # 开始界面不再显示
+        self.pico.release_background(self.colors['background'])
+        self.draw_game()
+        
         last_update = time.monotonic()
         update_interval = 0.2  # 控制游戏速度
         
@@ -216,7 +240,8 @@ class App:
             
             # 按固定时间间隔更新游戏状态
             if current_time - last_update >= update_interval:
-                self.update()
+                with span("logic"):
+                    self.update()
                 self.draw_game()
                 last_update = current_time
             
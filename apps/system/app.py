@@ -28,17 +28,8 @@ class App:
         """初始化显示"""
         self.main_group = displayio.Group()
         
-        # 创建背景
-        bg_bitmap = displayio.Bitmap(
-            self.display.display_width,
-            self.display.display_height,
-            1
-        )
-        bg_palette = displayio.Palette(1)
-        bg_palette[0] = self.colors['background']
-        self.main_group.append(
-            displayio.TileGrid(bg_bitmap, pixel_shader=bg_palette)
-        )
+        # 创建背景（使用共享的背景位图和调色板）
+        self.main_group.append(self.display.get_background(self.colors['background']))
         
         # 创建所有标签
         self.create_all_labels()
@@ -64,6 +55,10 @@ class App:
             text_area.y = y
         return text_area
         
+    def create_value_label(self, max_glyphs, x, y):
+        """创建每秒更新的数值标签"""
+        return self.display.create_value_label("", max_glyphs, color=self.colors['text'], x=x, y=y)
+        
     def create_all_labels(self):
         """创建所有标签"""
         # 标题
@@ -84,8 +79,8 @@ class App:
             10,
             y
         ))
-        self.labels['cpu_temp'] = self.create_text_label("", self.colors['text'], 50, y)
-        self.labels['cpu_freq'] = self.create_text_label("", self.colors['text'], 120, y)
+        self.labels['cpu_temp'] = self.create_value_label(8, 50, y)
+        self.labels['cpu_freq'] = self.create_value_label(8, 120, y)
         self.main_group.append(self.labels['cpu_temp'])
         self.main_group.append(self.labels['cpu_freq'])
         
@@ -98,8 +93,8 @@ class App:
             y
         ))
         # 使用进度条显示内存使用情况
-        self.labels['mem_usage'] = self.create_text_label("", self.colors['text'], 50, y)
-        self.labels['mem_detail'] = self.create_text_label("", self.colors['text'], 120, y)
+        self.labels['mem_usage'] = self.create_value_label(12, 50, y)
+        self.labels['mem_detail'] = self.create_value_label(12, 120, y)
         self.main_group.append(self.labels['mem_usage'])
         self.main_group.append(self.labels['mem_detail'])
         
@@ -112,8 +107,8 @@ class App:
             y
         ))
         # 使用进度条显示存储使用情况
-        self.labels['storage_usage'] = self.create_text_label("", self.colors['text'], 50, y)
-        self.labels['storage_detail'] = self.create_text_label("", self.colors['text'], 120, y)
+        self.labels['storage_usage'] = self.create_value_label(12, 50, y)
+        self.labels['storage_detail'] = self.create_value_label(12, 120, y)
         self.main_group.append(self.labels['storage_usage'])
         self.main_group.append(self.labels['storage_detail'])
             
@@ -186,12 +181,12 @@ class App:
             return
             
         # 更新标签文本
-        self.labels['cpu_temp'].text = info['cpu']['temp']
-        self.labels['cpu_freq'].text = info['cpu']['freq']
-        self.labels['mem_usage'].text = info['memory']['usage']
-        self.labels['mem_detail'].text = info['memory']['detail']
-        self.labels['storage_usage'].text = info['storage']['usage']
-        self.labels['storage_detail'].text = info['storage']['detail']
+        self.labels['cpu_temp'].value = info['cpu']['temp']
+        self.labels['cpu_freq'].value = info['cpu']['freq']
+        self.labels['mem_usage'].value = info['memory']['usage']
+        self.labels['mem_detail'].value = info['memory']['detail']
+        self.labels['storage_usage'].value = info['storage']['usage']
+        self.labels['storage_detail'].value = info['storage']['detail']
         
     def play(self):
         """运行应用"""
@@ -3,14 +3,22 @@ from pico.hardware import PicoHardware
 import displayio
 import terminalio
 from adafruit_display_text import label
-from adafruit_display_shapes.rect import Rect
 import random
 import time
+try:
+    import bitmaptools
+except ImportError:
+    bitmaptools = None
+from pico.memtrace import profile, frame
+from pico.profiler import span
 
 # 应用名称，将显示在菜单中
 APP_NAME = "Tetris"
 
 class App:
+    # 方块形状在棋盘调色板中的顺序
+    SHAPE_ORDER = 'IOTLJSZ'
+
     def __init__(self, pico, hw, colors):
         self.pico = pico
         self.hw = hw
@@ -74,16 +82,19 @@ class App:
         self.game_group = displayio.Group()
         self.main_group.append(self.game_group)
         
-        # 创建分数标签
-        self.score_label = label.Label(
-            terminalio.FONT,
-            text="Score: 0",
+        # 创建分数标签（固定容量的位图标签，更新时不重建字形）
+        self.score_label = self.pico.create_value_label(
+            "Score: 0",
+            12,
             color=self.colors['text'],
             x=5,
             y=5
         )
         self.main_group.append(self.score_label)
         
+        # 棋盘位图
+        self._create_board()
+        
     def play(self):
         """开始游戏"""
         # 初始化游戏
@@ -93,6 +104,9 @@ class App:
         
         # 生成第一个方块
         self.new_piece()
+        
+        # 游戏画面只设置一次，之后每帧由draw_game显式刷新
+        self.display.root_group = self.main_group
         self.draw_game()
         
         last_drop = time.monotonic()
@@ -138,9 +152,10 @@ class App:
                 if self.can_move(0, 1):
                     self.piece_y += 1
                 else:
-                    self.place_piece()
-                    self.check_lines()
-                    self.new_piece()
+                    with span("logic"):
+                        self.place_piece()
+                        self.check_lines()
+                        self.new_piece()
                     if not self.can_move(0, 0):  # 游戏结束检查
                         self.show_game_over()
                         return True
@@ -224,85 +239,103 @@ class App:
             
     def draw_game(self):
         """绘制游戏画面"""
-        # 清除现有游戏元素
-        while len(self.game_group) > 0:
-            self.game_group.pop()
-            
-        # 绘制游戏区域边框
-        border = Rect(
-            x=self.BOARD_X - 1,
-            y=self.BOARD_Y - 1,
-            width=self.BOARD_WIDTH * self.GRID_SIZE + 2,
-            height=self.BOARD_HEIGHT * self.GRID_SIZE + 2,
-            outline=self.colors['grid']
-        )
-        self.game_group.append(border)
+        with span("draw"), profile("tetris.draw"):
+            self.pico.begin_frame()
+            self._draw_game()
+            self.pico.end_frame()
+        frame("tetris")
+
+    def _create_board(self):
+        """创建棋盘位图
+
+        边框和网格只画一次，之后每帧只改写发生变化的格子，
+        displayio只刷新被改写的区域，而不是重建整个棋盘。
+        """
+        width = self.BOARD_WIDTH * self.GRID_SIZE + 2
+        height = self.BOARD_HEIGHT * self.GRID_SIZE + 2
+        
+        # 调色板：0为透明背景，1为网格，之后是各方块颜色
+        self.board_palette = displayio.Palette(2 + len(self.SHAPE_ORDER))
+        self.board_palette[0] = self.colors['background']
+        self.board_palette.make_transparent(0)
+        self.board_palette[1] = self.colors['grid']
+        for i, shape in enumerate(self.SHAPE_ORDER):
+            self.board_palette[i + 2] = self.colors[f'block_{shape.lower()}']
+        self.board_bitmap = displayio.Bitmap(width, height, len(self.board_palette))
+        
+        # 边框
+        self._fill(0, 0, width, 1, 1)
+        self._fill(0, height - 1, width, 1, 1)
+        self._fill(0, 0, 1, height, 1)
+        self._fill(width - 1, 0, 1, height, 1)
         
-        # 绘制网格
+        # 网格
         for x in range(self.BOARD_WIDTH + 1):
-            grid_line = Rect(
-                x=self.BOARD_X + x * self.GRID_SIZE,
-                y=self.BOARD_Y,
-                width=1,
-                height=self.BOARD_HEIGHT * self.GRID_SIZE,
-                fill=self.colors['grid']
-            )
-            self.game_group.append(grid_line)
-            
+            self._fill(1 + x * self.GRID_SIZE, 1, 1, self.BOARD_HEIGHT * self.GRID_SIZE, 1)
         for y in range(self.BOARD_HEIGHT + 1):
-            grid_line = Rect(
-                x=self.BOARD_X,
-                y=self.BOARD_Y + y * self.GRID_SIZE,
-                width=self.BOARD_WIDTH * self.GRID_SIZE,
-                height=1,
-                fill=self.colors['grid']
-            )
-            self.game_group.append(grid_line)
-            
-        # 绘制已放置的方块
-        for y in range(self.BOARD_HEIGHT):
-            for x in range(self.BOARD_WIDTH):
-                if self.board[y][x]:
-                    block = Rect(
-                        x=self.BOARD_X + x * self.GRID_SIZE + 1,
-                        y=self.BOARD_Y + y * self.GRID_SIZE + 1,
-                        width=self.GRID_SIZE - 2,
-                        height=self.GRID_SIZE - 2,
-                        fill=self.colors[f'block_{self.board[y][x].lower()}']
-                    )
-                    self.game_group.append(block)
+            self._fill(1, 1 + y * self.GRID_SIZE, self.BOARD_WIDTH * self.GRID_SIZE, 1, 1)
+        
+        self.board_grid = displayio.TileGrid(
+            self.board_bitmap,
+            pixel_shader=self.board_palette,
+            x=self.BOARD_X - 1,
+            y=self.BOARD_Y - 1
+        )
+        self.game_group.append(self.board_grid)
+        
+        # 已经画到位图上的每个格子的颜色索引
+        self.drawn_cells = bytearray(self.BOARD_WIDTH * self.BOARD_HEIGHT)
+        
+    def _fill(self, x, y, width, height, value):
+        """填充棋盘位图上的矩形区域"""
+        if bitmaptools:
+            bitmaptools.fill_region(self.board_bitmap, x, y, x + width, y + height, value)
+        else:
+            for py in range(y, y + height):
+                for px in range(x, x + width):
+                    self.board_bitmap[px, py] = value
                     
-        # 绘制当前方块
+    def _draw_game(self):
+        """只改写和上一帧不同的格子"""
+        # 当前方块占据的格子
+        piece_cells = {}
         if self.current_piece:
+            value = self.SHAPE_ORDER.index(self.current_shape) + 2
             for x, y in self.current_piece:
-                block = Rect(
-                    x=self.BOARD_X + (self.piece_x + x) * self.GRID_SIZE + 1,
-                    y=self.BOARD_Y + (self.piece_y + y) * self.GRID_SIZE + 1,
-                    width=self.GRID_SIZE - 2,
-                    height=self.GRID_SIZE - 2,
-                    fill=self.colors[f'block_{self.current_shape.lower()}']
-                )
-                self.game_group.append(block)
+                piece_cells[(self.piece_x + x, self.piece_y + y)] = value
+                
+        size = self.GRID_SIZE - 2
+        index = 0
+        for y in range(self.BOARD_HEIGHT):
+            row = self.board[y]
+            for x in range(self.BOARD_WIDTH):
+                shape = row[x]
+                value = self.SHAPE_ORDER.index(shape) + 2 if shape else 0
+                value = piece_cells.get((x, y), value)
+                if value != self.drawn_cells[index]:
+                    self.drawn_cells[index] = value
+                    self._fill(2 + x * self.GRID_SIZE, 2 + y * self.GRID_SIZE, size, size, value)
+                    self.pico.invalidate(
+                        self.BOARD_X + x * self.GRID_SIZE + 1,
+                        self.BOARD_Y + y * self.GRID_SIZE + 1,
+                        size,
+                        size
+                    )
+                index += 1
                 
         # 更新分数
-        self.score_label.text = f"Score: {self.score}"
-        
-        # 更新显示
-        self.display.root_group = self.main_group
+        text = f"Score: {self.score}"
+        if text != self.score_label.value:
+            self.score_label.value = text
+            self.pico.invalidate_label(self.score_label)
         
     def show_game_over(self):
         """显示游戏结束画面"""
+        self.pico.resume_auto_refresh()
         game_over_group = displayio.Group()
         
-        # 绘制背景
-        bg = Rect(
-            x=0,
-            y=0,
-            width=self.display.width,
-            height=self.display.height,
-            fill=self.colors['background']
-        )
-        game_over_group.append(bg)
+        # 绘制背景，共用全屏位图，不再分配一张新的
+        game_over_group.append(self.pico.get_background(self.colors['background']))
         
         # 显示游戏结束文本
         game_over_text = label.Label(
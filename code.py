@@ -1,18 +1,25 @@
 import time
+from pico.boottime import BootTimer
+boot = BootTimer()
 import gc
 import os
 from pico.system import SystemManager
+from pico.profiler import span
+from pico.feeds import FeedHub
+boot.mark("imports")
 
 print("=== Pico System Starting ===")
 
 # 初始化系统管理器
 system = SystemManager()
+boot.mark("system")
 system.print_system_info()
 
 # 按需加载必要的模块
 PicoDisplay = system.load_module('display')
 PicoHardware = system.load_module('hardware')
 Menu = system.load_module('menu')
+boot.mark("modules")
 
 if not all([PicoDisplay, PicoHardware, Menu]):
     print("Failed to load required modules")
@@ -21,7 +28,9 @@ if not all([PicoDisplay, PicoHardware, Menu]):
 
 # 初始化显示屏和硬件
 pico = PicoDisplay(tft_rotation=270)
+boot.mark("display")
 hw = PicoHardware()
+boot.mark("hardware")
 
 # 定义统一的颜色配置
 colors = {
@@ -35,6 +44,14 @@ colors = {
 # 初始化菜单
 menu = Menu(pico, hw, colors)
 
+# 应用声明的MQTT推送，所有应用共用一个连接
+feeds = FeedHub()
+
+# 应用切换使用的过渡效果
+from pico.animation import Animation
+transition = Animation(pico)
+boot.mark("menu init")
+
 # 扫描应用目录
 def scan_apps():
     """扫描应用目录"""
@@ -90,30 +107,64 @@ while True:
         # 扫描应用
         apps = scan_apps()
         
+        # 预加载菜单用到的字形
+        pico.fonts.preload_apps(apps)
+        
+        # 订阅应用声明的推送主题，应用不在运行时消息先缓存
+        feeds.register_apps(apps)
+        
         # 设置菜单项
         menu.set_menu_items(apps)
         
+        # 第一次显示菜单时打印启动耗时
+        if not boot.reported:
+            boot.mark("first menu")
+            boot.print_report()
+            # 菜单显示后再开始连接WiFi，只有用到网络的应用才等待连接
+            system.start_wifi()
+            # MQTT推送和上报一直需要网络，没有配置时射频在空闲后关闭
+            if feeds.mqtt.enabled:
+                system.acquire_wifi('mqtt')
+        
         # 显示菜单并等待选择
         selected = menu.show()
         if selected:
             # 加载并运行应用
             app_class = load_app_class(selected)
             if app_class:
+                # 菜单渐暗后再进入应用
+                transition.fade_out()
+                
                 # 创建应用实例
                 app = app_class(pico, hw, colors)
                 
-                # 运行应用
-                app.play()
+                # 运行应用，推送的消息交给这个应用
+                feeds.activate(selected['dir'], app)
+                try:
+                    app.play()
+                finally:
+                    feeds.deactivate()
                 
-                # 应用退出后清理
+                # 应用退出后清理，菜单渐亮显示
+                pico.resume_auto_refresh()
+                transition.fade_out(blank=False)
+                menu.draw_menu()
+                transition.fade_in()
                 del app
+                pico.release_backgrounds()
+                pico.fonts.trim()
                 gc.collect()
                 system.print_system_info()
+                if system.memtrace:
+                    system.memtrace.flush()
                 
     except Exception as e:
         print(f"Error in main loop: {e}")
+        pico.resume_auto_refresh()
+        transition.restore_brightness()
         time.sleep(1)
         
     # 垃圾回收
-    gc.collect()
+    with span("gc"):
+        gc.collect()
 
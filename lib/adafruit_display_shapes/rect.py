@@ -28,6 +28,11 @@ except ImportError:
 
 import displayio
 
+try:
+    import bitmaptools
+except ImportError:
+    bitmaptools = None
+
 __version__ = "0.0.0+auto.0"
 __repo__ = "https://github.com/adafruit/Adafruit_CircuitPython_Display_Shapes.git"
 
@@ -67,14 +72,15 @@ class Rect(displayio.TileGrid):
 
         if outline is not None:
             self._palette[1] = outline
-            for w in range(width):
-                for line in range(stroke):
-                    self._bitmap[w, line] = 1
-                    self._bitmap[w, height - 1 - line] = 1
-            for _h in range(height):
-                for line in range(stroke):
-                    self._bitmap[line, _h] = 1
-                    self._bitmap[width - 1 - line, _h] = 1
+            if stroke > 0:
+                if stroke * 2 >= width or stroke * 2 >= height:
+                    # The edges meet, the whole bitmap is outline
+                    self._bitmap.fill(1)
+                else:
+                    self._fill_region(0, 0, width, stroke)
+                    self._fill_region(0, height - stroke, width, height)
+                    self._fill_region(0, stroke, stroke, height - stroke)
+                    self._fill_region(width - stroke, stroke, width, height - stroke)
 
         if fill is not None:
             self._palette[0] = fill
@@ -84,6 +90,17 @@ class Rect(displayio.TileGrid):
             self._palette.make_transparent(0)
         super().__init__(self._bitmap, pixel_shader=self._palette, x=x, y=y)
 
+    def _fill_region(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        """Set the outline color index in the region from (x1, y1) up to, but
+        not including, (x2, y2)."""
+        if bitmaptools:
+            bitmaptools.fill_region(self._bitmap, x1, y1, x2, y2, 1)
+            return
+        bitmap = self._bitmap
+        for y in range(y1, y2):
+            for x in range(x1, x2):
+                bitmap[x, y] = 1
+
     @property
     def fill(self) -> Optional[int]:
         """The fill of the rectangle. Can be a hex value for a color or ``None`` for
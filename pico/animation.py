@@ -1,14 +1,206 @@
 import time
+import struct
 import displayio
 import gc
+from array import array
+from pico.gcpolicy import GCPolicy
+from pico.clip import Clip
+from pico.governor import FrameGovernor
+
+
+class FrameHistogram:
+    """帧间隔直方图，用于观察动画抖动"""
+    # 各区间的上限（毫秒），最后一个区间收集其余所有帧
+    BUCKETS = (20, 40, 50, 55, 60, 70, 85, 100, 150)
+
+    def __init__(self):
+        self.counts = array('L', [0] * (len(self.BUCKETS) + 1))
+        self.worst = 0.0
+        self._last = None
+
+    def reset(self):
+        """清空统计"""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.worst = 0.0
+        self._last = None
+
+    def tick(self):
+        """在每帧显示时调用，记录与上一帧的间隔"""
+        now = time.monotonic()
+        if self._last is not None:
+            self.add((now - self._last) * 1000)
+        self._last = now
+
+    def add(self, frame_ms):
+        """记录一帧的间隔"""
+        if frame_ms > self.worst:
+            self.worst = frame_ms
+        for i, limit in enumerate(self.BUCKETS):
+            if frame_ms <= limit:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def print_report(self):
+        """打印直方图"""
+        total = sum(self.counts)
+        if not total:
+            return
+        print("\n=== Frame Times ===")
+        lower = 0
+        for i, count in enumerate(self.counts):
+            upper = self.BUCKETS[i] if i < len(self.BUCKETS) else None
+            name = f"{lower}-{upper}ms" if upper else f">{lower}ms"
+            print(f"{name:>10}: {count:5d} {'#' * (count * 40 // total)}")
+            lower = upper
+        print(f"Worst frame: {self.worst:.1f}ms")
+        print("===================\n")
+
+
+class FrameClock:
+    """过渡效果的帧时钟
+
+    进度按实际经过的时间计算，显示跟不上时跳过落后的步骤，
+    总时长保持不变。
+    """
+    def __init__(self):
+        self.duration = 0
+        self.period = 0
+        self.dropped = 0
+        self._start = 0
+        self._step = 0
+        self._done = True
+
+    def start(self, duration, period):
+        """开始计时"""
+        self.duration = duration
+        self.period = period
+        self.dropped = 0
+        self._step = 0
+        self._done = duration <= 0
+        self._start = time.monotonic()
+
+    def next(self):
+        """等待下一步
+
+        Returns:
+            进度0~1，结束后返回None
+        """
+        if self._done:
+            return None
+        self._step += 1
+        target = self._start + self._step * self.period
+        now = time.monotonic()
+        if now < target:
+            time.sleep(target - now)
+        else:
+            # 落后时直接跳到当前时间对应的步骤
+            current = int((now - self._start) / self.period)
+            if current > self._step:
+                self.dropped += current - self._step
+                self._step = current
+        elapsed = self._step * self.period
+        if elapsed >= self.duration:
+            self._done = True
+            return 1.0
+        return elapsed / self.duration
+
+
+class SpriteSheet:
+    """精灵图
+
+    所有帧横向打包在一张BMP里（由 tools/pack_sprites.py 生成，单帧宽高记录在
+    文件头的保留字段中）。只打开一个文件、创建一个TileGrid，切换帧时只修改图块索引。
+    in_ram为True时把整张图读入内存，否则从flash流式读取。
+    """
+    def __init__(self, path, in_ram=False):
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(54)
+            frame_width, frame_height, offset = struct.unpack_from("<HHI", header, 6)
+            width, height, _, bpp, compression = struct.unpack_from("<iiHHI", header, 18)
+            if in_ram:
+                bitmap, shader = self._load_into_ram(offset, width, height, bpp, compression)
+            else:
+                self._file.seek(0)
+                bitmap = displayio.OnDiskBitmap(self._file)
+                shader = bitmap.pixel_shader
+        except Exception:
+            self.close()
+            raise
+
+        self.frame_width = frame_width or bitmap.width
+        self.frame_height = frame_height or bitmap.height
+        self.frame_count = (bitmap.width // self.frame_width) * (bitmap.height // self.frame_height)
+        self.grid = displayio.TileGrid(
+            bitmap,
+            pixel_shader=shader,
+            width=1,
+            height=1,
+            tile_width=self.frame_width,
+            tile_height=self.frame_height
+        )
+
+    def _load_into_ram(self, offset, width, height, bpp, compression):
+        """把16位BMP的像素读入内存位图"""
+        import bitmaptools
+        if bpp != 16 or (width * 2) % 4:
+            raise ValueError("Only 16-bit sheets with 4-byte aligned rows can be loaded into RAM")
+        colorspace = displayio.Colorspace.RGB555
+        if compression == 3:
+            # 带颜色掩码时根据红色掩码区分565和555
+            self._file.seek(54)
+            red_mask, = struct.unpack("<I", self._file.read(4))
+            if red_mask == 0xF800:
+                colorspace = displayio.Colorspace.RGB565
+        bitmap = displayio.Bitmap(width, abs(height), 65536)
+        self._file.seek(offset)
+        # BMP默认自下而上存储
+        bitmaptools.readinto(bitmap, self._file, 16, 2, False, False, height > 0)
+        # 已经读入内存，不再需要文件
+        self.close()
+        return bitmap, displayio.ColorConverter(input_colorspace=colorspace)
+
+    def show(self, index):
+        """显示指定帧"""
+        self.grid[0] = index
+
+    def close(self):
+        """关闭文件"""
+        if self._file:
+            self._file.close()
+            self._file = None
+
 
 class Animation:
-    def __init__(self, display):
+    # 滑动方向对应的移动方向
+    SLIDE_DIRECTIONS = {
+        'left': (-1, 0),
+        'right': (1, 0),
+        'up': (0, -1),
+        'down': (0, 1)
+    }
+
+    def __init__(self, display, gc_policy=None):
         """初始化动画控制器"""
         self.display = display
         self._frame_delay = 0.05  # 默认帧率20fps
         self._current_animation = None
         self._is_playing = False
+        self.gc_policy = gc_policy if gc_policy else GCPolicy()
+        self.histogram = FrameHistogram()
+        self.governor = FrameGovernor()
+        # 过渡效果使用的显示组和帧时钟，预先创建避免每次分配
+        self._transition_group = displayio.Group()
+        self._clock = FrameClock()
+        # 渐变时按调色板调整亮度的调色板及原始颜色
+        self._palettes = []
+        self._palette_colors = []
+        # 预加载图片时打开的文件，播放结束后关闭
+        self._files = []
+        # 舞台背景的颜色，播放结束后释放
+        self._stage_background = None
 
     def set_frame_rate(self, fps):
         """设置帧率"""
@@ -17,13 +209,20 @@ class Animation:
         self._frame_delay = 1.0 / fps
 
     def preload_images(self, image_list):
-        """预加载图片序列"""
+        """预加载图片序列
+
+        Returns:
+            (TileGrid列表, 第一张图片的(宽, 高))
+        """
         try:
             print("Preloading images...")
             image_grids = []
+            frame_size = None
             for img_path in image_list:
                 try:
-                    bitmap = displayio.OnDiskBitmap(open(img_path, "rb"))
+                    f = open(img_path, "rb")
+                    self._files.append(f)
+                    bitmap = displayio.OnDiskBitmap(f)
                     grid = displayio.TileGrid(
                         bitmap,
                         pixel_shader=bitmap.pixel_shader,
@@ -31,104 +230,378 @@ class Animation:
                         y=0
                     )
                     image_grids.append(grid)
+                    if frame_size is None:
+                        frame_size = (bitmap.width, bitmap.height)
                 except Exception as e:
                     print(f"Error loading image {img_path}: {e}")
             print(f"Successfully loaded {len(image_grids)} images")
-            return image_grids
+            return image_grids, frame_size
         except Exception as e:
             print(f"Error in preload_images: {e}")
-            return []
+            return [], None
+
+    def fit_to_screen(self, width, height, scale=None):
+        """计算整数缩放倍数和居中位置
+
+        Args:
+            width, height: 单帧尺寸
+            scale: 缩放倍数，None表示取能放进屏幕的最大整数倍
+
+        Returns:
+            (scale, x, y)
+        """
+        if scale is None:
+            scale = min(self.display.display_width // width, self.display.display_height // height)
+        scale = max(1, scale)
+        x = (self.display.display_width - width * scale) // 2
+        y = (self.display.display_height - height * scale) // 2
+        return scale, x, y
+
+    def _build_stage(self, layer, width, height, scale=None, background=0xFFFFFF):
+        """创建背景加居中缩放层的显示组并显示
+
+        缩放和位置在这里计算一次，播放时只替换帧层或修改图块索引。
+
+        Returns:
+            放置帧的缩放组
+        """
+        scale, x, y = self.fit_to_screen(width, height, scale)
+        frame_group = displayio.Group(scale=scale, x=x, y=y)
+        frame_group.append(layer)
+        group = displayio.Group()
+        self._release_stage()
+        group.append(self.display.get_bgcolor_group(background))
+        self._stage_background = background
+        group.append(frame_group)
+        self.display.display.root_group = group
+        return frame_group
+
+    def _release_stage(self):
+        """播放结束，释放舞台背景的调色板引用"""
+        if self._stage_background is not None:
+            self.display.release_background(self._stage_background)
+            self._stage_background = None
+
+    def _run(self, advance, check_button_callback=None):
+        """统一的播放循环
+
+        按截止时间调度每一帧，落后时让advance跳过相应的帧数。
+
+        Args:
+            advance: advance(skip) 跳过skip帧后显示下一帧，返回其时长
+                     （秒，0表示使用默认帧间隔），返回None时结束
+            check_button_callback: 返回True时停止播放
+        """
+        self._is_playing = True
+        self.histogram.reset()
+        self.governor.start()
+        skip = 0
+        print("Starting animation loop...")
+        self.gc_policy.begin()
+        try:
+            while self._is_playing:
+                try:
+                    # 检查退出条件
+                    if check_button_callback and check_button_callback():
+                        self._is_playing = False
+                        break
+
+                    duration = advance(skip)
+                    if duration is None:
+                        break
+                    self.histogram.tick()
+
+                    # 利用到截止时间前的空闲按需回收，再等到下一帧
+                    deadline = self.governor.schedule(duration or self._frame_delay)
+                    self.gc_policy.maybe_collect(deadline)
+                    skip = self.governor.wait()
+
+                except Exception as e:
+                    print(f"Error in animation loop: {e}")
+                    time.sleep(0.1)
+        finally:
+            self.gc_policy.end()
+        self._is_playing = False
+        self.histogram.print_report()
+        stats = self.get_stats()
+        print(f"Achieved {stats['fps']:.1f}/{stats['target_fps']:.1f} FPS, dropped {stats['dropped']} frames")
 
-    def play_sequence(self, image_list, loop=True, check_button_callback=None):
+    def get_stats(self):
+        """获取最近一次播放的帧率统计"""
+        stats = self.governor.get_stats()
+        stats['target_fps'] = 1.0 / self._frame_delay
+        return stats
+
+    def play_sequence(self, image_list, loop=True, check_button_callback=None, scale=None):
         """播放图片序列"""
+        frame_group = None
         try:
             # 预加载图片
-            image_grids = self.preload_images(image_list)
+            image_grids, frame_size = self.preload_images(image_list)
             if not image_grids:
                 print("No images to play")
                 return False
 
-            # 创建显示组
-            group1 = displayio.Group()
-            group2 = displayio.Group()
-            
-            # 添加背景
-            group1.append(self.display.get_bgcolor_group())
-            group2.append(self.display.get_bgcolor_group())
-
-            # 开始播放循环
-            self._is_playing = True
-            current_group = group1
-            
-            print("Starting animation sequence...")
-            while self._is_playing:
-                for grid in image_grids:
-                    try:
-                        # 检查退出条件
-                        if check_button_callback and check_button_callback():
-                            self._is_playing = False
-                            break
-
-                        # 切换显示组
-                        next_group = group2 if current_group == group1 else group1
-                        
-                        # 清除旧内容
-                        while len(next_group) > 1:
-                            next_group.pop()
-                        
-                        # 添加新图片
-                        next_group.append(grid)
-                        
-                        # 切换显示
-                        self.display.display.root_group = next_group
-                        current_group = next_group
-                        
-                        # 延时
-                        time.sleep(self._frame_delay)
-                        
-                        # 垃圾回收
-                        gc.collect()
-                        
-                    except Exception as e:
-                        print(f"Error in animation loop: {e}")
-                        time.sleep(0.1)
-                
-                if not loop:
-                    break
+            frame_group = self._build_stage(image_grids[0], frame_size[0], frame_size[1], scale)
+            index = 0
+
+            def advance(skip):
+                nonlocal index
+                index += skip
+                if index >= len(image_grids):
+                    if not loop:
+                        return None
+                    index %= len(image_grids)
+                # 替换帧层；同一个TileGrid不能再放进组，已显示时不替换
+                grid = image_grids[index]
+                if frame_group[0] is not grid:
+                    frame_group[0] = grid
+                index += 1
+                return 0
 
+            self._run(advance, check_button_callback)
             return True
 
         except Exception as e:
             print(f"Error in play_sequence: {e}")
             return False
+        finally:
+            # 先从显示中移除图片，避免刷新时读取已关闭的文件
+            if frame_group is not None:
+                frame_group.pop()
+            self._close_files()
+            self._release_stage()
+
+    def _close_files(self):
+        """关闭预加载时打开的文件"""
+        for f in self._files:
+            try:
+                f.close()
+            except Exception as e:
+                print(f"Error closing image file: {e}")
+        self._files = []
+
+    def play_sprite_sheet(self, path, loop=True, check_button_callback=None, in_ram=False, scale=None):
+        """播放精灵图动画
+
+        只使用一个TileGrid，每帧只修改图块索引，播放过程中不分配新对象。
+        """
+        sheet = None
+        frame_group = None
+        try:
+            sheet = SpriteSheet(path, in_ram)
+            print(f"Loaded sprite sheet with {sheet.frame_count} frames")
+            frame_group = self._build_stage(sheet.grid, sheet.frame_width, sheet.frame_height, scale)
+            index = 0
+
+            def advance(skip):
+                nonlocal index
+                index += skip
+                if index >= sheet.frame_count:
+                    if not loop:
+                        return None
+                    index %= sheet.frame_count
+                sheet.show(index)
+                index += 1
+                return 0
+
+            self._run(advance, check_button_callback)
+            return True
+
+        except Exception as e:
+            print(f"Error in play_sprite_sheet: {e}")
+            return False
+        finally:
+            if sheet:
+                # 先从显示中移除，避免刷新时读取已关闭的文件
+                if frame_group is not None:
+                    frame_group.pop()
+                sheet.close()
+            self._release_stage()
+
+    def play_clip(self, path, loop=True, check_button_callback=None, scale=None):
+        """播放压缩动画
+
+        所有帧解码到同一个Bitmap，每帧只写入改变的像素段，按帧内记录的时长播放。
+        """
+        clip = None
+        try:
+            clip = Clip(path)
+            clip.loop = loop
+            print(f"Loaded clip with {clip.frame_count} frames")
+            self._build_stage(clip.grid, clip.width, clip.height, scale)
+
+            def advance(skip):
+                # 差分帧不能直接跳过，落后时连续解码掉落后的帧
+                for _ in range(skip):
+                    if clip.next_frame() is None:
+                        return None
+                return clip.next_frame()
+
+            self._run(advance, check_button_callback)
+            return True
+
+        except Exception as e:
+            print(f"Error in play_clip: {e}")
+            return False
+        finally:
+            if clip:
+                clip.close()
+            self._release_stage()
 
     def stop(self):
         """停止当前动画"""
         self._is_playing = False
 
-    def fade_transition(self, from_image, to_image, duration=1.0):
-        """渐变过渡效果"""
+    def _collect_palettes(self, layer):
+        """收集显示组中所有索引色调色板及原始颜色"""
+        if isinstance(layer, displayio.Group):
+            for item in layer:
+                self._collect_palettes(item)
+        elif isinstance(layer, displayio.TileGrid):
+            palette = layer.pixel_shader
+            if isinstance(palette, displayio.Palette) and palette not in self._palettes:
+                self._palettes.append(palette)
+                self._palette_colors.append([palette[i] for i in range(len(palette))])
+
+    def _restore_palettes(self):
+        """恢复调色板原始颜色并释放引用"""
+        self._set_palette_level(1.0)
+        self._palettes = []
+        self._palette_colors = []
+
+    def _set_palette_level(self, level):
+        """按亮度比例缩放调色板颜色"""
+        scale = int(level * 256)
+        for palette, colors in zip(self._palettes, self._palette_colors):
+            for i, color in enumerate(colors):
+                r = ((color >> 16) & 0xFF) * scale >> 8
+                g = ((color >> 8) & 0xFF) * scale >> 8
+                b = (color & 0xFF) * scale >> 8
+                palette[i] = (r << 16) | (g << 8) | b
+
+    def _set_level(self, level):
+        """设置渐变亮度，有调色板时调整调色板，否则调整背光"""
+        if self._palettes:
+            self._set_palette_level(level)
+        else:
+            self.display.display.brightness = level
+
+    def _fade(self, start, end, duration):
+        """从start亮度渐变到end亮度"""
+        self._clock.start(duration, self._frame_delay)
+        progress = 0.0
+        while progress is not None:
+            self._set_level(start + (end - start) * progress)
+            progress = self._clock.next()
+
+    def fade_out(self, duration=0.3, blank=True):
+        """背光渐暗
+
+        blank为True时，结束后切换到空白显示组并恢复背光，
+        方便接下来显示新的画面。
+        """
+        try:
+            self._fade(1.0, 0.0, duration)
+            if blank:
+                while len(self._transition_group) > 0:
+                    self._transition_group.pop()
+                self.display.display.root_group = self._transition_group
+                self._set_level(1.0)
+        except Exception as e:
+            print(f"Error in fade_out: {e}")
+            self.restore_brightness()
+
+    def fade_in(self, duration=0.3):
+        """背光从暗渐亮"""
         try:
-            steps = int(duration / self._frame_delay)
-            for i in range(steps):
-                alpha = i / steps
-                # TODO: 实现渐变效果
-                time.sleep(self._frame_delay)
+            self._fade(0.0, 1.0, duration)
+        except Exception as e:
+            print(f"Error in fade_in: {e}")
+            self.restore_brightness()
+
+    def restore_brightness(self):
+        """恢复背光亮度"""
+        try:
+            self.display.display.brightness = 1.0
+        except Exception as e:
+            print(f"Error restoring brightness: {e}")
+
+    def fade_transition(self, from_image, to_image, duration=1.0, use_palette=False):
+        """渐变过渡效果
+
+        前半段让from_image渐暗，切换显示后后半段让to_image渐亮。
+        use_palette为True时调整索引色位图的调色板，否则调整背光。
+        from_image和to_image是两个画面的显示组，结束后to_image成为当前显示组。
+        """
+        half = duration / 2
+        try:
+            if use_palette:
+                self._collect_palettes(from_image)
+            self._fade(1.0, 0.0, half)
+            if use_palette:
+                self._restore_palettes()
+                self._collect_palettes(to_image)
+            self._set_level(0.0)
+            self.display.display.root_group = to_image
+            self._fade(0.0, 1.0, half)
         except Exception as e:
             print(f"Error in fade_transition: {e}")
+        finally:
+            if use_palette:
+                self._restore_palettes()
+            else:
+                self.restore_brightness()
 
     def slide_transition(self, from_image, to_image, direction="left", duration=0.5):
-        """滑动过渡效果"""
+        """滑动过渡效果
+
+        把两个画面的显示组放进预先创建的过渡组，每一步只修改它们的x/y并刷新一次，
+        不分配新对象。结束后to_image成为当前显示组。
+        """
+        if direction not in self.SLIDE_DIRECTIONS:
+            raise ValueError(f"Unknown slide direction: {direction}")
+        dx, dy = self.SLIDE_DIRECTIONS[direction]
+        distance = self.display.display_width if dx else self.display.display_height
+        display = self.display.display
+        group = self._transition_group
+        auto_refresh = display.auto_refresh
+        from_x, from_y = from_image.x, from_image.y
+        to_x, to_y = to_image.x, to_image.y
         try:
-            steps = int(duration / self._frame_delay)
-            for i in range(steps):
-                progress = i / steps
-                # TODO: 实现滑动效果
-                time.sleep(self._frame_delay)
+            # 暂停自动刷新，每一步手动刷新一次
+            display.auto_refresh = False
+            while len(group) > 0:
+                group.pop()
+            display.root_group = group
+            group.append(from_image)
+            group.append(to_image)
+
+            self._clock.start(duration, self._frame_delay)
+            progress = 0.0
+            while progress is not None:
+                offset = int(distance * progress)
+                from_image.x = from_x + dx * offset
+                from_image.y = from_y + dy * offset
+                to_image.x = to_x + dx * (offset - distance)
+                to_image.y = to_y + dy * (offset - distance)
+                display.refresh()
+                progress = self._clock.next()
+
+            if self._clock.dropped:
+                print(f"Slide transition dropped {self._clock.dropped} steps")
         except Exception as e:
             print(f"Error in slide_transition: {e}")
+        finally:
+            while len(group) > 0:
+                group.pop()
+            from_image.x, from_image.y = from_x, from_y
+            to_image.x, to_image.y = to_x, to_y
+            display.root_group = to_image
+            display.auto_refresh = auto_refresh
 
     def cleanup(self):
         """清理资源"""
         self.stop()
+        self._close_files()
         gc.collect() 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import gc
+import time
+import terminalio
+from adafruit_display_text import label
+from adafruit_display_shapes import rect
+from pico.display import ValueLabel
+
+
+def measure(update, iterations):
+    """测量update(i)的平均耗时和平均分配的内存
+
+    测量期间关闭自动GC，以便统计分配量。
+
+    Returns:
+        (平均耗时us, 平均分配字节数)
+    """
+    gc.collect()
+    start_alloc = gc.mem_alloc()
+    gc.disable()
+    start = time.monotonic_ns()
+    done = 0
+    try:
+        for i in range(iterations):
+            update(i)
+            done += 1
+    except MemoryError:
+        print(f"Out of memory after {done} iterations")
+    finally:
+        elapsed = time.monotonic_ns() - start
+        allocated = gc.mem_alloc() - start_alloc
+        gc.enable()
+        gc.collect()
+    if not done:
+        return 0, 0
+    return elapsed // 1000 // done, allocated // done
+
+
+def bench_labels(iterations=50, font=None):
+    """对比label.Label和ValueLabel更新分数文字的耗时和内存分配"""
+    if font is None:
+        font = terminalio.FONT
+    texts = [f"Score: {i * 10}" for i in range(iterations)]
+
+    glyph_label = label.Label(font, text=texts[0])
+    value_label = ValueLabel(font, 12, text=texts[0])
+
+    def update_glyph_label(i):
+        glyph_label.text = texts[i]
+
+    def update_value_label(i):
+        value_label.value = texts[i]
+
+    results = {
+        'label.Label': measure(update_glyph_label, iterations),
+        'ValueLabel': measure(update_value_label, iterations)
+    }
+    print("\n=== Label Benchmark ===")
+    for name, (elapsed_us, allocated) in results.items():
+        print(f"{name}: {elapsed_us}us/update, {allocated} bytes/update")
+    print("=======================\n")
+    return results
+
+
+# 应用中实际构造的矩形尺寸：(名称, 宽, 高)，都只有填充色
+RECT_SIZES = (
+    ("snake cell", 9, 9),
+    ("pet head", 20, 20),
+    ("pet body", 30, 12),
+    ("pet strap", 3, 20),
+    ("pet eye", 6, 1)
+)
+# 横屏ST7789的尺寸，全屏背景的大小
+SCREEN_SIZE = (240, 135)
+
+
+def bench_rect(iterations=20, sizes=RECT_SIZES, pico=None):
+    """测量应用中实际用到的Rect的构造耗时和内存分配
+
+    应用里的Rect都只有填充色，耗时主要在分配位图和调色板，不经过边框绘制。
+    全屏背景对比Rect和PicoDisplay.get_background()（共用全屏位图），
+    传入pico时才测量后者。最后对比一次带边框的Rect在有无bitmaptools时的耗时。
+    """
+    results = {}
+
+    def measure_rect(key, width, height, **kwargs):
+        def build(i):
+            rect.Rect(0, 0, width, height, **kwargs)
+        results[key] = measure(build, iterations)
+
+    for name, width, height in sizes:
+        measure_rect(name, width, height, fill=0x000000)
+    measure_rect("screen Rect", SCREEN_SIZE[0], SCREEN_SIZE[1], fill=0x000000)
+    if pico is not None:
+        def build_background(i):
+            pico.get_background(0x000000)
+            pico.release_background(0x000000)
+        results["screen get_background"] = measure(build_background, iterations)
+
+    # 边框绘制路径，当前应用没有用到
+    saved = rect.bitmaptools
+    try:
+        if saved:
+            measure_rect("outline fill_region", SCREEN_SIZE[0], SCREEN_SIZE[1], fill=0x000000, outline=0xFFFFFF)
+        rect.bitmaptools = None
+        measure_rect("outline per-pixel", SCREEN_SIZE[0], SCREEN_SIZE[1], fill=0x000000, outline=0xFFFFFF)
+    finally:
+        rect.bitmaptools = saved
+
+    print("\n=== Rect Benchmark ===")
+    for name, (elapsed_us, allocated) in results.items():
+        print(f"{name}: {elapsed_us}us/rect, {allocated} bytes/rect")
+    print("======================\n")
+    return results
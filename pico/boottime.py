@@ -0,0 +1,33 @@
+import time
+
+
+class BootTimer:
+    """启动阶段计时
+
+    每完成一个启动阶段调用一次mark()，记录这一阶段的耗时，
+    最后用print_report()打印各阶段耗时和从上电到现在的总时间。
+    """
+    def __init__(self):
+        self._phases = []
+        self._last = time.monotonic_ns()
+        self.reported = False
+
+    def mark(self, name):
+        """结束一个阶段，记录耗时（毫秒）"""
+        now = time.monotonic_ns()
+        self._phases.append((name, (now - self._last) // 1_000_000))
+        self._last = now
+
+    def get_phases(self):
+        """获取 [(阶段名, 耗时毫秒)]"""
+        return list(self._phases)
+
+    def print_report(self):
+        """打印启动耗时，time.monotonic()从上电开始计时"""
+        self.reported = True
+        print("\n=== Boot Time ===")
+        for name, elapsed in self._phases:
+            print(f"{name}: {elapsed}ms")
+        print(f"code.py total: {sum(elapsed for _, elapsed in self._phases)}ms")
+        print(f"Since power on: {int(time.monotonic() * 1000)}ms")
+        print("=================\n")
@@ -0,0 +1,102 @@
+import time
+
+# RP2040的外设时钟，SPI时钟由它分频得到
+PERIPHERAL_CLOCK = 125_000_000
+
+# 自动协商时依次尝试的波特率，都是125MHz能整分出来的频率（125MHz / 2n）
+BAUDRATES = (62_500_000, 31_250_000, 20_833_333, 15_625_000)
+
+
+def actual_baudrate(requested, clock=PERIPHERAL_CLOCK):
+    """计算SPI实际能达到的波特率
+
+    RP2040的SPI时钟 = 外设时钟 / (偶数预分频 * 后分频)，只能取离散值，
+    例如请求40MHz或48MHz实际都只有31.25MHz。算法和pico-sdk的spi_set_baudrate相同。
+    """
+    prescale = 2
+    while prescale <= 254:
+        if clock < (prescale + 2) * 256 * requested:
+            break
+        prescale += 2
+    postdiv = 256
+    while postdiv > 1:
+        if clock // (prescale * (postdiv - 1)) > requested:
+            break
+        postdiv -= 1
+    return clock // (prescale * postdiv)
+
+
+class BusBenchmark:
+    """显示总线测速
+
+    对每个波特率重新配置总线，分别测量整屏刷新和局部刷新的耗时。
+    不依赖硬件：setup、full_refresh、partial_refresh和clock都由调用者提供，
+    设备上由PicoDisplay.benchmark_bus()接到真实的屏幕，电脑上由
+    tools/bus_sim.py接到传输时间模型。
+    """
+    def __init__(self, setup, full_refresh, partial_refresh, clock=time.monotonic_ns, repeats=5):
+        """
+        Args:
+            setup: setup(baudrate)，按波特率配置总线，返回实际波特率，失败时抛出异常
+            full_refresh: 改变整屏内容并刷新一次
+            partial_refresh: 改变一小块区域并刷新一次
+            clock: 纳秒时钟
+            repeats: 每项测量的次数
+        """
+        self._setup = setup
+        self._full = full_refresh
+        self._partial = partial_refresh
+        self._clock = clock
+        self.repeats = repeats
+
+    def _measure(self, refresh):
+        """多次刷新取平均耗时（毫秒）"""
+        refresh()  # 第一次刷新包含配置后的额外开销，不计入
+        start = self._clock()
+        for _ in range(self.repeats):
+            refresh()
+        return (self._clock() - start) / self.repeats / 1_000_000
+
+    def run(self, baudrates=BAUDRATES):
+        """依次测量各个波特率
+
+        Returns:
+            每个波特率一项的列表，配置失败的波特率记录错误信息
+        """
+        results = []
+        for baudrate in baudrates:
+            try:
+                actual = self._setup(baudrate)
+                full_ms = self._measure(self._full)
+                partial_ms = self._measure(self._partial)
+                results.append({
+                    'requested': baudrate,
+                    'actual': actual,
+                    'full_ms': full_ms,
+                    'partial_ms': partial_ms,
+                    'fps': 1000 / full_ms if full_ms > 0 else 0
+                })
+            except Exception as e:
+                print(f"Bus benchmark failed at {baudrate} Hz: {e}")
+                results.append({'requested': baudrate, 'error': str(e)})
+        return results
+
+    @staticmethod
+    def best(results):
+        """整屏刷新最快的波特率，没有成功的结果时返回None"""
+        ok = [r for r in results if 'error' not in r]
+        if not ok:
+            return None
+        return min(ok, key=lambda r: r['full_ms'])['requested']
+
+    @staticmethod
+    def print_results(results):
+        """打印测量结果"""
+        print("\n=== Display Bus Benchmark ===")
+        for r in results:
+            if 'error' in r:
+                print(f"{r['requested'] / 1e6:6.2f} MHz  failed: {r['error']}")
+            else:
+                print(f"{r['requested'] / 1e6:6.2f} MHz (actual {r['actual'] / 1e6:6.2f})  "
+                      f"full {r['full_ms']:7.2f} ms  partial {r['partial_ms']:6.2f} ms  "
+                      f"{r['fps']:5.1f} fps")
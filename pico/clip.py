@@ -0,0 +1,120 @@
+import struct
+import displayio
+
+try:
+    import bitmaptools
+except ImportError:
+    bitmaptools = None
+
+MAGIC = b"PCLP"
+FLAG_LOOP = 0x01
+FILL = 0x80
+LENGTH_MASK = 0x7F
+
+
+class Clip:
+    """压缩动画解码器
+
+    文件由 tools/encode_clip.py 生成：索引色调色板加逐帧差分的行程编码。
+    所有帧解码到同一个持久的Bitmap里，每帧只写入改变的像素段，
+    displayio只刷新被修改的区域。
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            header = self._file.read(16)
+            magic, version, flags, width, height, colors, frames, max_bytes = struct.unpack(
+                "<4sBBHHHHH", header)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a clip file")
+            self.width = width
+            self.height = height
+            self.frame_count = frames
+            self.loop = bool(flags & FLAG_LOOP)
+
+            # 调色板
+            self.palette = displayio.Palette(colors)
+            data = self._file.read(colors * 3)
+            for i in range(colors):
+                self.palette[i] = (data[i * 3] << 16) | (data[i * 3 + 1] << 8) | data[i * 3 + 2]
+
+            # 持久的画布和帧缓冲，播放时不再分配
+            self.bitmap = displayio.Bitmap(width, height, colors)
+            self.grid = displayio.TileGrid(self.bitmap, pixel_shader=self.palette)
+            self._buffer = bytearray(max_bytes)
+            self._view = memoryview(self._buffer)
+            self._frame_header = bytearray(4)
+            self._first_offset = self._file.tell()
+            self._second_offset = None
+            self.rewind()
+        except Exception:
+            self.close()
+            raise
+
+    def rewind(self):
+        """回到第一帧并清空画布"""
+        self.bitmap.fill(0)
+        self._file.seek(self._first_offset)
+        self.index = 0
+
+    def next_frame(self):
+        """解码下一帧
+
+        Returns:
+            这一帧的显示时长（秒），播放结束返回None
+        """
+        if self.index >= self.frame_count:
+            if not self.loop:
+                return None
+            # 循环帧存放在最后一帧之后，把画面从最后一帧变回第一帧
+            duration = self._decode()
+            self._file.seek(self._second_offset)
+            self.index = 1
+            return duration
+
+        duration = self._decode()
+        self.index += 1
+        if self.index == 1:
+            self._second_offset = self._file.tell()
+        return duration
+
+    def _decode(self):
+        """读取一帧并把改变的像素段写入画布"""
+        self._file.readinto(self._frame_header)
+        duration_ms, size = struct.unpack("<HH", self._frame_header)
+        if size:
+            self._file.readinto(self._buffer, size)
+        buffer = self._buffer
+        bitmap = self.bitmap
+        pos = 0
+        while pos < size:
+            y = buffer[pos]
+            x = buffer[pos + 1]
+            length = buffer[pos + 2]
+            pos += 3
+            if length & FILL:
+                length &= LENGTH_MASK
+                self._fill(x, y, length, buffer[pos])
+                pos += 1
+            else:
+                if bitmaptools and length > 2:
+                    bitmaptools.arrayblit(bitmap, self._view[pos:pos + length], x, y, x + length, y + 1)
+                else:
+                    for i in range(length):
+                        bitmap[x + i, y] = buffer[pos + i]
+                pos += length
+        return duration_ms / 1000
+
+    def _fill(self, x, y, length, value):
+        """用同一颜色填充一段像素"""
+        if bitmaptools:
+            bitmaptools.fill_region(self.bitmap, x, y, x + length, y + 1, value)
+        else:
+            for i in range(length):
+                self.bitmap[x + i, y] = value
+
+    def close(self):
+        """关闭文件"""
+        if self._file:
+            self._file.close()
+            self._file = None
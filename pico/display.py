@@ -1,14 +1,49 @@
 import board
 import os
 import busio
-import terminalio
 import digitalio
 import displayio
-from adafruit_display_text import label
-from adafruit_bitmap_font import bitmap_font
+from adafruit_display_text import label, bitmap_label
 from adafruit_st7789 import ST7789
+from pico.fonts import FontManager
+from pico.busbench import BusBenchmark, BAUDRATES, actual_baudrate
+from pico.telemetry import Telemetry
 import time
 
+class ValueLabel(bitmap_label.Label):
+    """固定容量的位图标签，用于频繁变化的数值
+
+    整段文字渲染在一张位图里，而不是像label.Label那样每个字一个TileGrid。
+    文字按max_glyphs补齐或截断，每次更新位图大小不变，释放的内存块可以直接复用；
+    值没有变化时不重新渲染。通过value属性更新。
+    """
+    def __init__(self, font, max_glyphs, text="", align='left', **kwargs):
+        self.max_glyphs = max_glyphs
+        self.align = align
+        self._value = text
+        super().__init__(font, text=self._fit(text), **kwargs)
+
+    def _fit(self, text):
+        """补齐或截断到固定长度"""
+        text = str(text)[:self.max_glyphs]
+        padding = " " * (self.max_glyphs - len(text))
+        if self.align == 'right':
+            return padding + text
+        return text + padding
+
+    @property
+    def value(self):
+        """当前显示的值"""
+        return self._value
+
+    @value.setter
+    def value(self, text):
+        if text == self._value:
+            return
+        self._value = text
+        self.text = self._fit(text)
+
+
 class PicoDisplay:
     # 显示屏配置
     DISPLAY_CONFIG = {
@@ -17,6 +52,10 @@ class PicoDisplay:
         'rotation': 270,
         'rowstart': 40,
         'colstart': 53,
+        # SPI波特率，与FourWire的默认值相同（实际20.83MHz）。屏幕没有接MISO，
+        # 无法回读检查画面是否出错，更高的波特率用benchmark_bus()测过后在
+        # settings.toml的PICO_SPI_BAUDRATE中设置
+        'baudrate': 24_000_000,
         'pins': {
             'dc': board.GP8,
             'cs': board.GP9,
@@ -27,63 +66,125 @@ class PicoDisplay:
         }
     }
 
+    # 背景调色板缓存上限，超过后淘汰没有被引用的调色板
+    MAX_CACHED_PALETTES = 8
+    # 每种字体最多保留的空闲标签数
+    MAX_POOLED_LABELS = 8
+    # 文字尺寸缓存的条目上限
+    MAX_TEXT_METRICS = 32
+    # 显式刷新时的目标帧率
+    TARGET_FPS = 60
+
     def __init__(self, tft_rotation=None):
         """初始化显示屏"""
         print("Initializing PicoDisplay...")
         self.rotation = tft_rotation if tft_rotation is not None else self.DISPLAY_CONFIG['rotation']
         self._init_display()
-        self.bgcolor_group = self.get_bgcolor_group()
-        self.text_group = None
         self._cache = {}
+        # get_background()交出的背景颜色，应用退出时release_backgrounds()释放
+        self._backgrounds = []
+        # 共享的字体，未配置自定义字体时为terminalio.FONT
+        self.fonts = FontManager()
+        self.font = self.fonts.default
+        self.bgcolor_group = self.get_bgcolor_group(keep=True)
+        self.text_group = None
+        # 标签池：按 (字体, 锚点) 保存空闲标签
+        self._label_pool = {}
+        # draw_text添加到splash的标签，clear_display时归还
+        self._splash_labels = []
+        # 文字尺寸缓存：(字体, 文本, 缩放) -> [宽, 高, 最近使用序号]
+        self._text_metrics = {}
+        self._metrics_tick = 0
+        # 显式刷新的统计
+        self.refreshes = 0
+        self.pushed_pixels = 0
+        self._frame_pixels = 0
+        # 帧耗时上报
+        self.telemetry = Telemetry()
+        self._frame_start = 0
         print("Display initialized successfully")
 
-    def _init_display(self):
-        """初始化显示屏硬件"""
+    def _baudrate_candidates(self, baudrate=None):
+        """按尝试顺序返回波特率：指定值或配置值在前，之后是更低的常用值"""
+        if baudrate is None:
+            try:
+                baudrate = int(os.getenv('PICO_SPI_BAUDRATE') or self.DISPLAY_CONFIG['baudrate'])
+            except Exception as e:
+                print(f"Invalid SPI baudrate setting: {e}")
+                baudrate = self.DISPLAY_CONFIG['baudrate']
+        return [baudrate] + [rate for rate in BAUDRATES if rate < baudrate]
+
+    def _create_display(self, width, height, baudrate):
+        """按指定波特率创建SPI、显示总线和ST7789"""
+        # 初始化SPI
+        spi = None
         try:
-            # 释放之前的显示和重置SPI状态
+            spi = busio.SPI(
+                self.DISPLAY_CONFIG['pins']['clk'],
+                self.DISPLAY_CONFIG['pins']['mosi']
+            )
+        except Exception as e:
+            print(f"Error initializing SPI: {e}")
+            if spi:
+                spi.deinit()
+            raise
+
+        # 初始化显示总线
+        try:
+            display_bus = displayio.FourWire(
+                spi,
+                command=self.DISPLAY_CONFIG['pins']['dc'],
+                chip_select=self.DISPLAY_CONFIG['pins']['cs'],
+                reset=self.DISPLAY_CONFIG['pins']['rst'],
+                baudrate=baudrate
+            )
+        except Exception as e:
+            print(f"Error initializing display bus: {e}")
+            spi.deinit()
+            raise
+
+        # 初始化ST7789显示屏
+        try:
+            display = ST7789(
+                display_bus,
+                rotation=self.rotation,
+                width=width,
+                height=height,
+                rowstart=self.DISPLAY_CONFIG['rowstart'],
+                colstart=self.DISPLAY_CONFIG['colstart'],
+                backlight_pin=self.DISPLAY_CONFIG['pins']['backlight']
+            )
+        except Exception as e:
+            print(f"Error initializing ST7789: {e}")
             displayio.release_displays()
-            
-            # 重置所有相关引脚
-            for pin_name, pin in self.DISPLAY_CONFIG['pins'].items():
-                try:
-                    io = digitalio.DigitalInOut(pin)
-                    io.deinit()
-                except Exception as e:
-                    print(f"Warning: Could not reset pin {pin_name}: {e}")
+            spi.deinit()
+            raise
 
-            # 初始化SPI
-            spi = None
+        try:
+            self.spi_frequency = spi.frequency
+        except Exception:
+            self.spi_frequency = actual_baudrate(baudrate)
+        return display
+
+    def _reset_pins(self):
+        """重置所有显示相关引脚，只在快速初始化失败时使用"""
+        displayio.release_displays()
+        for pin_name, pin in self.DISPLAY_CONFIG['pins'].items():
             try:
-                # 使用默认配置初始化SPI
-                spi = busio.SPI(
-                    self.DISPLAY_CONFIG['pins']['clk'],
-                    self.DISPLAY_CONFIG['pins']['mosi']
-                )
+                io = digitalio.DigitalInOut(pin)
+                io.deinit()
             except Exception as e:
-                print(f"Error initializing SPI: {e}")
-                if spi:
-                    spi.deinit()
-                raise
+                print(f"Warning: Could not reset pin {pin_name}: {e}")
 
-            # 等待一小段时间确保SPI稳定
-            time.sleep(0.1)
+    def _init_display(self, baudrate=None):
+        """初始化显示屏硬件
 
-            # 初始化显示总线
-            display_bus = None
-            try:
-                display_bus = displayio.FourWire(
-                    spi,
-                    command=self.DISPLAY_CONFIG['pins']['dc'],
-                    chip_select=self.DISPLAY_CONFIG['pins']['cs'],
-                    reset=self.DISPLAY_CONFIG['pins']['rst']
-                )
-            except Exception as e:
-                print(f"Error initializing display bus: {e}")
-                if display_bus:
-                    display_bus.deinit()
-                if spi:
-                    spi.deinit()
-                raise
+        Args:
+            baudrate: SPI波特率，None时使用设置PICO_SPI_BAUDRATE或DISPLAY_CONFIG中的值
+        """
+        try:
+            # 释放之前的显示，引脚随之释放，正常情况下不需要再逐个重置
+            displayio.release_displays()
 
             # 根据旋转调整宽高
             if self.rotation in [90, 270]:
@@ -93,24 +194,27 @@ class PicoDisplay:
                 width = self.DISPLAY_CONFIG['width']
                 height = self.DISPLAY_CONFIG['height']
 
-            # 初始化ST7789显示屏
-            try:
-                self.display = ST7789(
-                    display_bus,
-                    rotation=self.rotation,
-                    width=width,
-                    height=height,
-                    rowstart=self.DISPLAY_CONFIG['rowstart'],
-                    colstart=self.DISPLAY_CONFIG['colstart'],
-                    backlight_pin=self.DISPLAY_CONFIG['pins']['backlight']
-                )
-            except Exception as e:
-                print(f"Error initializing ST7789: {e}")
-                if display_bus:
-                    display_bus.deinit()
-                if spi:
-                    spi.deinit()
-                raise
+            # 从配置的波特率开始，总线或屏幕初始化失败时依次降低
+            candidates = self._baudrate_candidates(baudrate)
+            index = 0
+            pins_reset = False
+            while True:
+                rate = candidates[index]
+                try:
+                    self.display = self._create_display(width, height, rate)
+                    self.baudrate = rate
+                    break
+                except Exception as e:
+                    print(f"Display init failed at {rate} Hz: {e}")
+                    if not pins_reset:
+                        # 引脚可能没有被干净释放，重置后用同一波特率重试
+                        self._reset_pins()
+                        pins_reset = True
+                        continue
+                    index += 1
+                    if index >= len(candidates):
+                        raise
+            print(f"Display SPI: requested {self.baudrate} Hz, actual {self.spi_frequency} Hz")
 
             # 初始化显示属性
             self.display_width = width
@@ -122,13 +226,83 @@ class PicoDisplay:
             print(f"Error initializing display: {e}")
             raise
 
-    def get_bgcolor_group(self, color=0xFFFFFF):
+    def _get_blank_bitmap(self):
+        """全屏单色位图
+
+        内容全为0，颜色完全由调色板决定，所以所有纯色背景共用这一张位图。
+        """
+        bitmap = self._cache.get('blank_bitmap')
+        if bitmap is None:
+            bitmap = displayio.Bitmap(self.display_width, self.display_height, 1)
+            self._cache['blank_bitmap'] = bitmap
+        return bitmap
+
+    def get_palette(self, color):
+        """获取按颜色缓存的单色调色板，引用计数加1
+
+        调色板是共享的，调用者不要修改它的颜色。
+        """
+        palettes = self._cache.setdefault('palettes', {})
+        entry = palettes.get(color)
+        if entry is None:
+            self._evict_palettes()
+            palette = displayio.Palette(1)
+            palette[0] = color
+            entry = [palette, 0]
+            palettes[color] = entry
+        entry[1] += 1
+        return entry[0]
+
+    def release_palette(self, color):
+        """释放调色板引用，引用为0的调色板可以被淘汰"""
+        entry = self._cache.get('palettes', {}).get(color)
+        if entry and entry[1] > 0:
+            entry[1] -= 1
+
+    def _evict_palettes(self):
+        """缓存已满时淘汰没有被引用的调色板"""
+        palettes = self._cache.get('palettes', {})
+        if len(palettes) < self.MAX_CACHED_PALETTES:
+            return
+        for color in list(palettes.keys()):
+            if palettes[color][1] <= 0:
+                del palettes[color]
+                if len(palettes) < self.MAX_CACHED_PALETTES:
+                    return
+
+    def get_background(self, color, keep=False):
+        """获取纯色背景
+
+        位图和调色板都是共享的，每次只创建一个很小的TileGrid，
+        不再为每个画面分配全屏位图。画面不再使用时调用release_background(color)，
+        应用退出时剩下的由release_backgrounds()统一释放；keep为True的背景一直使用，不释放。
+        """
+        background = displayio.TileGrid(
+            self._get_blank_bitmap(),
+            pixel_shader=self.get_palette(color),
+            x=0,
+            y=0
+        )
+        if not keep:
+            self._backgrounds.append(color)
+        return background
+
+    def release_background(self, color):
+        """释放一个get_background()取得的背景"""
+        if color in self._backgrounds:
+            self._backgrounds.remove(color)
+            self.release_palette(color)
+
+    def release_backgrounds(self):
+        """释放所有还没释放的背景，应用退出后调用"""
+        for color in self._backgrounds:
+            self.release_palette(color)
+        self._backgrounds = []
+
+    def get_bgcolor_group(self, color=0xFFFFFF, keep=False):
         """创建背景色组"""
         try:
-            color_bitmap = displayio.Bitmap(self.display_width, self.display_height, 1)
-            color_palette = displayio.Palette(1)
-            color_palette[0] = color
-            bg_sprite = displayio.TileGrid(color_bitmap, pixel_shader=color_palette, x=0, y=0)
+            bg_sprite = self.get_background(color, keep)
             bg_group = displayio.Group()
             bg_group.append(bg_sprite)
             return bg_group
@@ -136,25 +310,100 @@ class PicoDisplay:
             print(f"Error creating background group: {e}")
             raise
 
-    def draw_text(self, text, color=0x000000, x=0, y=0, scale=1, font=None, center=True):
-        """绘制文本，支持居中显示"""
-        try:
-            if font is None:
-                font = terminalio.FONT
+    def acquire_label(self, text, color=0x000000, scale=1, font=None, anchor_point=None):
+        """从标签池取出标签，池中没有时新建
 
-            # 创建文本区域
+        anchor_point不为None的标签由调用者设置anchored_position，
+        其余标签直接设置x/y，两类标签分开回收。
+        """
+        if font is None:
+            font = self.font
+        key = (font, anchor_point)
+        pool = self._label_pool.get(key)
+        if pool:
+            text_area = pool.pop()
+            text_area.scale = scale
+            text_area.color = color
+            text_area.text = text
+        else:
             text_area = label.Label(
                 font,
                 text=text,
                 color=color,
                 scale=scale
             )
+            if anchor_point is not None:
+                text_area.anchor_point = anchor_point
+            text_area._pool_key = key
+        return text_area
+
+    def release_label(self, text_area):
+        """把已从显示组移除的标签放回标签池"""
+        key = getattr(text_area, '_pool_key', None)
+        if key is None:
+            return
+        pool = self._label_pool.setdefault(key, [])
+        if len(pool) < self.MAX_POOLED_LABELS:
+            pool.append(text_area)
+
+    def measure_text(self, text, scale=1, font=None):
+        """获取文字缩放后的宽高
+
+        结果按 (字体, 文本, 缩放) 缓存，超过上限时淘汰最久没用的条目，
+        同样的文字再次居中时不用重新创建标签测量。
+        """
+        if font is None:
+            font = self.font
+        self._metrics_tick += 1
+        key = (font, text, scale)
+        entry = self._text_metrics.get(key)
+        if entry:
+            entry[2] = self._metrics_tick
+            return entry[0], entry[1]
+
+        # 未命中时用每种字体一个的测量标签获取尺寸
+        measure_labels = self._cache.setdefault('measure_labels', {})
+        probe = measure_labels.get(font)
+        if probe is None:
+            probe = label.Label(font, text=text, scale=scale)
+            measure_labels[font] = probe
+        else:
+            probe.scale = scale
+            probe.text = text
+        width = probe.bounding_box[2] * scale
+        height = probe.bounding_box[3] * scale
+
+        if len(self._text_metrics) >= self.MAX_TEXT_METRICS:
+            oldest = min(self._text_metrics, key=lambda k: self._text_metrics[k][2])
+            del self._text_metrics[oldest]
+        self._text_metrics[key] = [width, height, self._metrics_tick]
+        return width, height
+
+    def create_value_label(self, text, max_glyphs, color=0x000000, x=0, y=0, font=None, align='left', **kwargs):
+        """创建固定容量的位图标签，用于分数、状态值等经常变化的文字"""
+        if font is None:
+            font = self.font
+        return ValueLabel(
+            font,
+            max_glyphs,
+            text=text,
+            align=align,
+            color=color,
+            x=x,
+            y=y,
+            **kwargs
+        )
+
+    def draw_text(self, text, color=0x000000, x=0, y=0, scale=1, font=None, center=True):
+        """绘制文本，支持居中显示"""
+        try:
+            # 从标签池取出文本区域
+            text_area = self.acquire_label(text, color, scale, font)
             
             # 如果需要居中显示，计算居中位置
             if center:
                 # 获取文本尺寸
-                text_width = text_area.bounding_box[2] * scale
-                text_height = text_area.bounding_box[3] * scale
+                text_width, text_height = self.measure_text(text, scale, font)
                 
                 # 计算居中位置
                 if x == 0:  # 如果x为0，水平居中
@@ -168,6 +417,7 @@ class PicoDisplay:
             
             # 添加到显示组
             self.splash.append(text_area)
+            self._splash_labels.append(text_area)
             return text_area
         except Exception as e:
             print(f"Error drawing text: {e}")
@@ -203,7 +453,7 @@ class PicoDisplay:
         """绘制多行文本，支持自动换行"""
         try:
             if font is None:
-                font = terminalio.FONT
+                font = self.font
             
             # 分割文本行
             lines = text.split('\n')
@@ -224,25 +474,19 @@ class PicoDisplay:
     def draw_centered_text(self, text, color=0x000000, y_offset=0, scale=1, font=None):
         """在屏幕中央绘制文本"""
         try:
-            if font is None:
-                font = terminalio.FONT
-            
-            # 创建文本区域以获取尺寸
-            text_area = label.Label(
-                font,
-                text=text,
-                color=color,
-                scale=scale
-            )
+            # 从标签池取出文本区域，尺寸从缓存获取
+            text_area = self.acquire_label(text, color, scale, font)
+            text_width, text_height = self.measure_text(text, scale, font)
             
             # 计算居中位置
-            x = (self.display_width - text_area.bounding_box[2] * scale) // 2
-            y = (self.display_height - text_area.bounding_box[3] * scale) // 2 + y_offset
+            x = (self.display_width - text_width) // 2
+            y = (self.display_height - text_height) // 2 + y_offset
             
             # 设置位置并显示
             text_area.x = x
             text_area.y = y
             self.splash.append(text_area)
+            self._splash_labels.append(text_area)
             return text_area
             
         except Exception as e:
@@ -254,7 +498,11 @@ class PicoDisplay:
         try:
             while len(self.splash) > 0:
                 self.splash.pop()
-            self.bgcolor_group = self.get_bgcolor_group()
+            # 归还draw_text创建的标签
+            for text_area in self._splash_labels:
+                self.release_label(text_area)
+            self._splash_labels = []
+            # 背景组可以重复使用
             self.splash.append(self.bgcolor_group)
         except Exception as e:
             print(f"Error clearing display: {e}")
@@ -262,11 +510,7 @@ class PicoDisplay:
     def draw_background(self, color):
         """绘制背景"""
         try:
-            color_bitmap = displayio.Bitmap(self.display_width, self.display_height, 1)
-            color_palette = displayio.Palette(1)
-            color_palette[0] = color
-            bg_sprite = displayio.TileGrid(color_bitmap, pixel_shader=color_palette, x=0, y=0)
-            self.splash.append(bg_sprite)
+            self.splash.append(self.get_background(color))
         except Exception as e:
             print(f"Error drawing background: {e}")
 
@@ -277,6 +521,133 @@ class PicoDisplay:
             (self.display_height - height) // 2
         )
 
+    def begin_frame(self):
+        """开始一帧
+
+        关闭自动刷新，之后对显示组的修改不会在修改到一半时被刷新到屏幕上，
+        由end_frame()一次性刷新。
+        """
+        if self.display.auto_refresh:
+            self.display.auto_refresh = False
+        self._frame_pixels = 0
+        self._frame_start = time.monotonic_ns()
+
+    def invalidate(self, x, y, width, height):
+        """报告本帧改变的区域，用于统计推送到屏幕的像素数
+
+        displayio自己跟踪需要刷新的区域，这里只做统计。
+        """
+        x1 = max(x, 0)
+        y1 = max(y, 0)
+        x2 = min(x + width, self.display_width)
+        y2 = min(y + height, self.display_height)
+        if x2 > x1 and y2 > y1:
+            self._frame_pixels += (x2 - x1) * (y2 - y1)
+
+    def invalidate_label(self, text_area):
+        """报告标签所在的区域"""
+        x, y, width, height = text_area.bounding_box
+        self.invalidate(text_area.x + x, text_area.y + y, width, height)
+
+    def end_frame(self, target_fps=None):
+        """结束一帧，刷新一次屏幕
+
+        Returns:
+            是否刷新了屏幕
+        """
+        try:
+            refreshed = self.display.refresh(
+                target_frames_per_second=target_fps or self.TARGET_FPS,
+                minimum_frames_per_second=0
+            )
+        except Exception as e:
+            print(f"Error refreshing display: {e}")
+            return False
+        if refreshed:
+            self.refreshes += 1
+            self.pushed_pixels += self._frame_pixels
+        self._frame_pixels = 0
+        if self.telemetry.enabled:
+            # 帧耗时从begin_frame()算起，超过目标帧率的间隔计为超时
+            elapsed_us = (time.monotonic_ns() - self._frame_start) // 1000
+            self.telemetry.record_frame(elapsed_us, 1_000_000 // (target_fps or self.TARGET_FPS))
+            # 帧中不建立连接，只在已连接时发布
+            self.telemetry.poll(connect=False)
+        return refreshed
+
+    def resume_auto_refresh(self):
+        """恢复自动刷新，应用退出或显示静态画面前调用"""
+        if not self.display.auto_refresh:
+            self.display.auto_refresh = True
+
+    def get_frame_stats(self):
+        """获取显式刷新的统计"""
+        return {
+            'refreshes': self.refreshes,
+            'pushed_pixels': self.pushed_pixels,
+            'pixels_per_refresh': self.pushed_pixels // self.refreshes if self.refreshes else 0
+        }
+
+    @classmethod
+    def benchmark_bus(cls, baudrates=BAUDRATES, repeats=5, tft_rotation=None):
+        """测量各个SPI波特率下整屏刷新和局部刷新的耗时
+
+        每个波特率都要重新创建总线和屏幕，已经创建的PicoDisplay（以及菜单和应用
+        保存的display引用）会失效，所以只在创建PicoDisplay之前调用，例如在REPL中：
+            PicoDisplay.benchmark_bus()
+        测完后释放屏幕。看画面没有出错的最快波特率写入PICO_SPI_BAUDRATE。
+
+        Returns:
+            (测量结果列表, 整屏刷新最快的波特率)
+        """
+        # 只借用初始化屏幕的方法，不创建完整的PicoDisplay
+        probe = object.__new__(cls)
+        probe.rotation = tft_rotation if tft_rotation is not None else cls.DISPLAY_CONFIG['rotation']
+        width = cls.DISPLAY_CONFIG['width']
+        height = cls.DISPLAY_CONFIG['height']
+        if probe.rotation in [90, 270]:
+            width, height = height, width
+        palettes = []
+        for color in (0x000000, 0xFFFFFF):
+            palette = displayio.Palette(1)
+            palette[0] = color
+            palettes.append(palette)
+        full = displayio.TileGrid(displayio.Bitmap(width, height, 1), pixel_shader=palettes[0])
+        partial = displayio.TileGrid(displayio.Bitmap(32, 32, 1), pixel_shader=palettes[0])
+        group = displayio.Group()
+        group.append(full)
+        group.append(partial)
+        state = [0]
+
+        def setup(baudrate):
+            # 只测指定的波特率，不回退
+            probe.display = None
+            displayio.release_displays()
+            probe.display = probe._create_display(width, height, baudrate)
+            probe.display.auto_refresh = False
+            probe.display.root_group = group
+            return probe.spi_frequency
+
+        def refresh_full():
+            state[0] ^= 1
+            full.pixel_shader = palettes[state[0]]
+            partial.pixel_shader = palettes[state[0] ^ 1]
+            probe.display.refresh(minimum_frames_per_second=0)
+
+        def refresh_partial():
+            state[0] ^= 1
+            partial.pixel_shader = palettes[state[0]]
+            probe.display.refresh(minimum_frames_per_second=0)
+
+        try:
+            bench = BusBenchmark(setup, refresh_full, refresh_partial, repeats=repeats)
+            results = bench.run(baudrates)
+            BusBenchmark.print_results(results)
+            return results, BusBenchmark.best(results)
+        finally:
+            probe.display = None
+            displayio.release_displays()
+
     def cleanup(self):
         """清理资源"""
         try:
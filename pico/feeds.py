@@ -0,0 +1,174 @@
+import time
+from pico.mqtt import MqttConnection
+
+# 读取应用FEEDS声明时最多查看的行数，元数据写在模块开头
+HEADER_LINES = 40
+
+
+def matches(pattern, topic):
+    """MQTT主题过滤器匹配，支持+和#"""
+    parts = pattern.split("/")
+    levels = topic.split("/")
+    for i, part in enumerate(parts):
+        if part == "#":
+            return True
+        if i >= len(levels) or (part != "+" and part != levels[i]):
+            return False
+    return len(parts) == len(levels)
+
+
+def read_feeds(path):
+    """从应用源文件开头读取FEEDS声明，不导入应用模块
+
+    应用在APP_NAME旁边声明，只支持一行字符串元组：
+        FEEDS = ("rates/USD/+",)
+
+    Returns:
+        主题过滤器元组，没有声明时为空
+    """
+    try:
+        with open(path, "r") as f:
+            for _ in range(HEADER_LINES):
+                line = f.readline()
+                if not line:
+                    break
+                if line.startswith("FEEDS"):
+                    value = line.split("=", 1)[1]
+                    # 引号之间的奇数段是字符串
+                    return tuple(value.replace("'", '"').split('"')[1::2])
+    except OSError as e:
+        print(f"Failed to read feeds from {path}: {e}")
+    return ()
+
+
+class FeedHub:
+    """MQTT推送数据的订阅和分发（单例）
+
+    应用在模块中声明FEEDS主题，启动器扫描应用时register_apps()订阅所有应用的主题，
+    整个系统共用pico.mqtt.MqttConnection的一个连接。收到的消息交给正在运行的应用的
+    on_feed(topic, message)；应用不在运行时按 (应用, 主题) 只保留最新的一条，
+    下次activate()时先补发。应用不需要处理socket，只要在主循环中调用poll()。
+    """
+    _instance = None
+    # 两次接收消息的最短间隔（秒），每次接收阻塞约pico.mqtt.RECV_TIMEOUT
+    POLL_INTERVAL = 1.0
+    # 不在运行的应用最多缓存的消息数
+    MAX_CACHED = 32
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(FeedHub, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        self.mqtt = MqttConnection()
+        self.mqtt.on_message = self._on_message
+        # 应用目录 -> 主题过滤器元组
+        self._feeds = {}
+        # (应用目录, 主题) -> 消息，_order记录缓存顺序
+        self._cache = {}
+        self._order = []
+        self.active = None
+        self._app = None
+        self._next_poll = 0
+        self.received = 0
+        self.delivered = 0
+
+    @property
+    def connected(self):
+        """推送是否可用，应用据此决定是否还需要轮询"""
+        return self.mqtt.connected and bool(self._feeds)
+
+    def register(self, name, feeds):
+        """订阅一个应用声明的主题"""
+        if not feeds or not self.mqtt.enabled:
+            return
+        self._feeds[name] = tuple(feeds)
+        for topic in feeds:
+            self.mqtt.subscribe(topic)
+
+    def register_apps(self, apps):
+        """订阅所有应用声明的主题
+
+        Args:
+            apps: scan_apps()返回的应用列表
+        """
+        if not self.mqtt.enabled:
+            return
+        for app in apps:
+            name = app.get('dir')
+            if name and name not in self._feeds:
+                feeds = read_feeds(f"/apps/{name}/app.py")
+                if feeds:
+                    print(f"Feeds for {name}: {feeds}")
+                    self.register(name, feeds)
+
+    def activate(self, name, app):
+        """应用开始运行，补发它不在运行时收到的消息"""
+        self.active = name
+        self._app = app if hasattr(app, 'on_feed') else None
+        if self._app is None:
+            return
+        for key in [key for key in self._order if key[0] == name]:
+            self._order.remove(key)
+            self._deliver(key[1], self._cache.pop(key))
+
+    def deactivate(self):
+        """应用退出"""
+        self.active = None
+        self._app = None
+
+    def poll(self, connect=True):
+        """接收消息并分发，按POLL_INTERVAL限制接收的频率
+
+        Args:
+            connect: 是否允许在这里（重新）建立连接
+        """
+        if not self._feeds:
+            return
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.POLL_INTERVAL
+        if connect:
+            self.mqtt.ensure()
+        self.mqtt.loop()
+
+    def _on_message(self, topic, message):
+        self.received += 1
+        for name, feeds in self._feeds.items():
+            for pattern in feeds:
+                if matches(pattern, topic):
+                    if name == self.active and self._app is not None:
+                        self._deliver(topic, message)
+                    else:
+                        self._store((name, topic), message)
+                    break
+
+    def _deliver(self, topic, message):
+        try:
+            self._app.on_feed(topic, message)
+            self.delivered += 1
+        except Exception as e:
+            print(f"Error handling feed {topic}: {e}")
+
+    def _store(self, key, message):
+        """缓存不在运行的应用的消息，同一主题只保留最新的"""
+        if key in self._cache:
+            self._order.remove(key)
+        elif len(self._order) >= self.MAX_CACHED:
+            del self._cache[self._order.pop(0)]
+        self._cache[key] = message
+        self._order.append(key)
+
+    def get_stats(self):
+        """获取分发统计"""
+        return {
+            'feeds': len(self._feeds),
+            'received': self.received,
+            'delivered': self.delivered,
+            'cached': len(self._cache)
+        }
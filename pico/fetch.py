@@ -0,0 +1,233 @@
+import errno
+import time
+from pico.jsonstream import JsonPathExtractor
+
+# 非阻塞socket上表示“还没完成，稍后再试”的错误码
+_PENDING = (errno.EAGAIN, errno.EINPROGRESS, errno.EALREADY)
+# CircuitPython的errno模块没有EISCONN，值和Linux相同
+_EISCONN = getattr(errno, "EISCONN", 106)
+# 每次poll()最多读取的字节数
+CHUNK_SIZE = 256
+# 响应头的最大长度
+MAX_HEADER = 4096
+# 已解析的主机地址，只有第一次请求某个主机时DNS查询会阻塞
+_addresses = {}
+
+
+def _errno(e):
+    """取出OSError的错误码"""
+    return e.errno if hasattr(e, "errno") else e.args[0]
+
+
+def _parse_url(url):
+    """拆分http地址，返回 (主机, 端口, 路径)"""
+    if not url.startswith("http://"):
+        raise ValueError("Only http:// URLs can be fetched without blocking")
+    rest = url[7:]
+    slash = rest.find("/")
+    if slash < 0:
+        host, path = rest, "/"
+    else:
+        host, path = rest[:slash], rest[slash:]
+    port = 80
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    return host, port, path
+
+
+class JsonFetch:
+    """非阻塞的HTTP GET，边接收边从JSON响应中提取值
+
+    主循环每次调用poll()推进一步：连接、发送请求、读取一块响应，都不等待socket，
+    两次poll()之间应用可以继续处理按键和刷新界面。
+    整个请求有timeout秒的时间预算，超时后状态变为FAILED；cancel()随时中止请求。
+    使用HTTP/1.0，响应不分块，服务器发完后关闭连接。
+    只有第一次请求某个主机时的DNS查询会阻塞，解析结果会被缓存。
+
+    cache为ResponseCache时和PicoRequest.get_values()一样：
+    缓存未过期直接完成，过期后发送条件请求，服务器返回304时沿用缓存的值。
+
+    example:
+        fetch = JsonFetch(wifi.socketpool, url, [("rates", "CNY")])
+        while fetch.poll() not in (JsonFetch.DONE, JsonFetch.FAILED):
+            ...  # 处理按键
+        print(fetch.status, fetch.values)
+    """
+    CONNECTING = 'connecting'
+    SENDING = 'sending'
+    RECEIVING = 'receiving'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, socketpool, url, paths, cache=None, revalidate=False, timeout=10, headers=None):
+        self.socketpool = socketpool
+        self.url = url
+        self.paths = paths
+        self.cache = cache
+        self.timeout = timeout
+        self.status = None
+        self.values = {}
+        self.error = None
+        self.from_cache = False
+        self.started = time.monotonic()
+        self.elapsed = 0
+        self._socket = None
+        self._header = b""
+        self._extractor = None
+        self._buffer = bytearray(CHUNK_SIZE)
+        self._etag = None
+        self._modified = None
+
+        self._cached = cache.lookup(url, paths) if cache else None
+        if self._cached is not None and not revalidate and cache.is_fresh(url):
+            cache.hits += 1
+            self.from_cache = True
+            self._finish(self.DONE, 200, self._cached)
+            return
+
+        request_headers = dict(headers or {})
+        if self._cached is not None:
+            request_headers.update(cache.validators(url))
+        try:
+            host, port, path = _parse_url(url)
+            lines = [f"GET {path} HTTP/1.0", f"Host: {host}"]
+            for name, value in request_headers.items():
+                lines.append(f"{name}: {value}")
+            self._request = ("\r\n".join(lines) + "\r\n\r\n").encode()
+            self._sent = 0
+            self.state = self.CONNECTING
+            self._open(host, port)
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+    @property
+    def active(self):
+        """请求是否还在进行"""
+        return self.state in (self.CONNECTING, self.SENDING, self.RECEIVING)
+
+    def _open(self, host, port):
+        """创建非阻塞socket"""
+        address = _addresses.get((host, port))
+        if address is None:
+            address = self.socketpool.getaddrinfo(host, port)[0][-1]
+            _addresses[(host, port)] = address
+        self._address = address
+        self._socket = self.socketpool.socket(self.socketpool.AF_INET, self.socketpool.SOCK_STREAM)
+        self._socket.settimeout(0)
+
+    def poll(self):
+        """推进一步，返回当前状态"""
+        if not self.active:
+            return self.state
+        if time.monotonic() - self.started >= self.timeout:
+            self._fail("timeout")
+            return self.state
+        try:
+            if self.state == self.CONNECTING:
+                self._connect()
+            elif self.state == self.SENDING:
+                self._send()
+            else:
+                self._receive()
+        except OSError as e:
+            if _errno(e) not in _PENDING:
+                self._fail(e)
+        except ValueError as e:
+            self._fail(e)
+        return self.state
+
+    def _connect(self):
+        try:
+            self._socket.connect(self._address)
+        except OSError as e:
+            # 连接建立后再次connect()返回EISCONN
+            if _errno(e) != _EISCONN:
+                raise
+        self.state = self.SENDING
+
+    def _send(self):
+        sent = self._socket.send(self._request[self._sent:])
+        if sent:
+            self._sent += sent
+        if self._sent >= len(self._request):
+            self.state = self.RECEIVING
+
+    def _receive(self):
+        size = self._socket.recv_into(self._buffer)
+        if not size:
+            # 服务器关闭连接，响应结束
+            if self.status is None:
+                raise ValueError("Connection closed before response headers")
+            self._complete()
+            return
+        chunk = memoryview(self._buffer)[:size]
+        if self.status is None:
+            self._header += bytes(chunk)
+            end = self._header.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self._header) > MAX_HEADER:
+                    raise ValueError("Response header too long")
+                return
+            body = self._header[end + 4:]
+            self._parse_header(self._header[:end])
+            self._header = b""
+            if self.state != self.RECEIVING:
+                return
+            chunk = body
+        if self.status == 200 and chunk and self._extractor.feed(chunk):
+            # 所有值都找到了，剩余内容不再读取
+            self._complete()
+
+    def _parse_header(self, header):
+        """解析状态行和缓存相关的响应头"""
+        lines = header.decode().split("\r\n")
+        self.status = int(lines[0].split(" ", 2)[1])
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            if name == "etag":
+                self._etag = value.strip()
+            elif name == "last-modified":
+                self._modified = value.strip()
+        if self.status == 304 and self._cached is not None:
+            self.cache.revalidated += 1
+            self.cache.touch(self.url)
+            self._finish(self.DONE, 200, self._cached)
+        elif self.status == 200:
+            self._extractor = JsonPathExtractor(self.paths)
+        else:
+            self._finish(self.DONE, self.status, {})
+
+    def _complete(self):
+        """响应读完"""
+        values = self._extractor.results if self._extractor else {}
+        if self.cache and self.status == 200:
+            self.cache.misses += 1
+            self.cache.store(self.url, values, self._etag, self._modified)
+        self._finish(self.DONE, self.status, values)
+
+    def _fail(self, error):
+        print(f"Fetch {self.url} failed: {error}")
+        self.error = str(error)
+        self._finish(self.FAILED, self.status, {})
+
+    def cancel(self):
+        """中止请求"""
+        if self.active:
+            print(f"Fetch {self.url} cancelled")
+            self._finish(self.CANCELLED, self.status, {})
+
+    def _finish(self, state, status, values):
+        self.state = state
+        self.status = status
+        self.values = values
+        self.elapsed = time.monotonic() - self.started
+        self._extractor = None
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
@@ -0,0 +1,172 @@
+import os
+import terminalio
+
+try:
+    from adafruit_bitmap_font import bitmap_font
+except ImportError:
+    bitmap_font = None
+
+# 字体文件目录
+FONT_DIR = "/fonts"
+
+# 菜单和各应用公用的文字，随应用名一起预加载
+UI_TEXT = (
+    "A:Select",
+    "B:Back",
+    "0123456789",
+    " :%.-+/",
+)
+
+
+class FontManager:
+    """字体管理器
+
+    从flash加载BDF/PCF字体，同一个字体文件在所有应用间共享一个字体对象。
+    只预加载菜单和应用实际用到的字形，并把字形缓存限制在MAX_GLYPHS以内：
+    预加载的字形常驻，其余按需加载的字形超过上限时按加载顺序丢弃最旧的。
+    找不到字体或加载失败时使用内置的terminalio.FONT。
+    """
+    _instance = None
+
+    # 每种字体最多缓存的字形数
+    MAX_GLYPHS = 128
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(FontManager, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        # 路径 -> 字体对象
+        self._fonts = {}
+        # 字体 -> 常驻的字形编码
+        self._pinned = {}
+        # 字体 -> 按加载顺序排列的非常驻字形编码
+        self._order = {}
+        self._default = None
+
+    @property
+    def default(self):
+        """默认字体，由设置PICO_FONT指定（例如 ui.pcf），未设置时为terminalio.FONT"""
+        if self._default is None:
+            name = None
+            try:
+                name = os.getenv("PICO_FONT")
+            except Exception as e:
+                print(f"Failed to read font setting: {e}")
+            self._default = self.load(name) if name else terminalio.FONT
+        return self._default
+
+    def load(self, name):
+        """加载字体，已加载的直接返回共享的字体对象
+
+        Args:
+            name: 字体文件名（在FONT_DIR下）或绝对路径
+        """
+        path = name if name.startswith("/") else f"{FONT_DIR}/{name}"
+        font = self._fonts.get(path)
+        if font is not None:
+            return font
+        if bitmap_font is None:
+            print("adafruit_bitmap_font not available, using built-in font")
+            return terminalio.FONT
+        try:
+            font = bitmap_font.load_font(path)
+        except Exception as e:
+            print(f"Failed to load font {path}: {e}")
+            return terminalio.FONT
+        self._fonts[path] = font
+        self._pinned[font] = set()
+        self._order[font] = []
+        self._bound(font)
+        print(f"Loaded font: {path}")
+        return font
+
+    def _bound(self, font):
+        """包装字体的load_glyphs，每次按需加载后把字形缓存限制在MAX_GLYPHS以内"""
+        load_glyphs = font.load_glyphs
+
+        def bounded_load_glyphs(code_points):
+            load_glyphs(code_points)
+            self._evict(font, code_points)
+
+        try:
+            font.load_glyphs = bounded_load_glyphs
+        except AttributeError as e:
+            print(f"Glyph cache of {font} is not bounded: {e}")
+
+    def _evict(self, font, keep=()):
+        """记录新加载的字形，超过上限时丢弃最旧的非常驻字形
+
+        Args:
+            keep: 刚请求的字形（编码、字符串或编码列表），调用者马上要用，不丢弃
+        """
+        glyphs = getattr(font, '_glyphs', None)
+        pinned = self._pinned.get(font)
+        order = self._order.get(font)
+        if glyphs is None or pinned is None:
+            return 0
+        if isinstance(keep, int):
+            keep = (keep,)
+        keep = set(ord(c) if isinstance(c, str) else c for c in keep)
+        for code_point in keep:
+            if code_point in glyphs and code_point not in pinned and code_point not in order:
+                order.append(code_point)
+        removed = 0
+        index = 0
+        while len(glyphs) > self.MAX_GLYPHS and index < len(order):
+            code_point = order[index]
+            if code_point in keep:
+                index += 1
+                continue
+            order.pop(index)
+            if code_point not in pinned and code_point in glyphs:
+                del glyphs[code_point]
+                removed += 1
+        return removed
+
+    def preload(self, text, font=None):
+        """预加载文字中还没有加载的字形，并设为常驻"""
+        if font is None:
+            font = self.default
+        pinned = self._pinned.get(font)
+        if pinned is None:
+            # 内置字体的字形在固件里，不需要加载
+            return
+        missing = "".join(c for c in set(text) if ord(c) not in pinned)
+        if not missing:
+            return
+        try:
+            font.load_glyphs(missing)
+        except Exception as e:
+            print(f"Failed to preload glyphs: {e}")
+            return
+        order = self._order[font]
+        for c in missing:
+            pinned.add(ord(c))
+            if ord(c) in order:
+                order.remove(ord(c))
+
+    def preload_apps(self, apps, font=None):
+        """预加载菜单和应用名称用到的字形"""
+        text = "".join(UI_TEXT) + "".join(app['name'] for app in apps)
+        self.preload(text, font)
+
+    def trim(self, font=None):
+        """字形缓存超过上限时丢弃最旧的非常驻字形，直到回到MAX_GLYPHS以内"""
+        if font is None:
+            font = self.default
+        return self._evict(font)
+
+    def get_stats(self):
+        """获取字体和字形缓存统计"""
+        stats = {}
+        for path, font in self._fonts.items():
+            stats[path] = {
+                'glyphs': len(getattr(font, '_glyphs', ())),
+                'pinned': len(self._pinned.get(font, ()))
+            }
+        return stats
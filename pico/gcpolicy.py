@@ -0,0 +1,89 @@
+import gc
+import time
+
+
+class GCPolicy:
+    """垃圾回收策略
+
+    不在每一帧都执行gc.collect()，只在以下情况回收：
+    - 空闲内存低于 min_free，立即回收
+    - 上次回收后分配超过 threshold 字节，并且距离下一帧还有足够的空闲时间
+    播放期间在begin()和end()之间，运行时的自动回收阈值也设为threshold。
+    """
+    def __init__(self, threshold=16384, min_free=8192):
+        self.threshold = threshold
+        self.min_free = min_free
+        self.collections = 0
+        self.deferred = 0
+        # 回收耗时估计（秒），按实际测量值平滑更新
+        self._collect_cost = 0.005
+        self._last_alloc = gc.mem_alloc()
+        self._saved_threshold = None
+
+    def begin(self):
+        """开始播放，支持gc.threshold时让运行时在分配达到阈值后自动回收"""
+        self._last_alloc = gc.mem_alloc()
+        if not hasattr(gc, 'threshold') or self._saved_threshold is not None:
+            return
+        try:
+            self._saved_threshold = gc.threshold()
+            gc.threshold(self.threshold)
+        except Exception as e:
+            self._saved_threshold = None
+            print(f"Failed to set gc threshold: {e}")
+
+    def end(self):
+        """结束播放，恢复之前的自动回收阈值"""
+        if self._saved_threshold is None:
+            return
+        try:
+            gc.threshold(self._saved_threshold)
+        except Exception as e:
+            print(f"Failed to restore gc threshold: {e}")
+        self._saved_threshold = None
+
+    def collect(self):
+        """执行一次回收并更新耗时估计"""
+        start = time.monotonic()
+        gc.collect()
+        cost = time.monotonic() - start
+        self._collect_cost = self._collect_cost * 0.75 + cost * 0.25
+        self._last_alloc = gc.mem_alloc()
+        self.collections += 1
+
+    def maybe_collect(self, deadline=None):
+        """在帧之间调用，按需回收
+
+        Args:
+            deadline: 下一帧开始的time.monotonic()时间，None表示没有时间限制
+
+        Returns:
+            是否执行了回收
+        """
+        if gc.mem_free() < self.min_free:
+            self.collect()
+            return True
+
+        allocated = gc.mem_alloc() - self._last_alloc
+        if allocated < 0:
+            # 运行时已经自动回收过
+            self._last_alloc = gc.mem_alloc()
+            return False
+        if allocated < self.threshold:
+            return False
+
+        # 空闲时间不够就推迟到下一帧
+        if deadline is not None and deadline - time.monotonic() < self._collect_cost:
+            self.deferred += 1
+            return False
+
+        self.collect()
+        return True
+
+    def get_stats(self):
+        """获取回收统计"""
+        return {
+            'collections': self.collections,
+            'deferred': self.deferred,
+            'cost_ms': self._collect_cost * 1000
+        }
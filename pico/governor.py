@@ -0,0 +1,66 @@
+import time
+
+
+class FrameGovernor:
+    """帧率调度器
+
+    按截止时间调度：第n帧在 start + n*period 显示，而不是每帧做完后再固定延时，
+    所以实际帧率不会因为每帧的处理时间而变低或漂移。落后超过一帧时跳过落后的帧。
+    不依赖硬件，clock和sleep可以替换成模拟时钟。
+    """
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self.frames = 0
+        self.dropped = 0
+        self._start = 0
+        self._deadline = 0
+        self._period = 0
+
+    def start(self):
+        """开始计时"""
+        self.frames = 0
+        self.dropped = 0
+        self._start = self._clock()
+        self._deadline = self._start
+
+    def schedule(self, period):
+        """一帧显示后调用，计算下一帧的截止时间
+
+        Returns:
+            下一帧的截止时间，可用于判断帧间还有多少空闲时间
+        """
+        self.frames += 1
+        self._period = period
+        self._deadline += period
+        return self._deadline
+
+    def wait(self):
+        """等到下一帧的截止时间
+
+        Returns:
+            需要跳过的帧数，没有落后时为0
+        """
+        now = self._clock()
+        if now < self._deadline:
+            self._sleep(self._deadline - now)
+            return 0
+        behind = int((now - self._deadline) / self._period) if self._period else 0
+        if behind:
+            self.dropped += behind
+            self._deadline += behind * self._period
+        return behind
+
+    @property
+    def achieved_fps(self):
+        """实际显示的帧率"""
+        elapsed = self._clock() - self._start
+        return self.frames / elapsed if elapsed > 0 else 0
+
+    def get_stats(self):
+        """获取帧率统计"""
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'fps': self.achieved_fps
+        }
@@ -0,0 +1,189 @@
+import json
+
+# 解析状态
+_VALUE = 0        # 等待值
+_KEY = 1          # 等待键或 }
+_KEY_STRING = 2   # 读取键
+_COLON = 3        # 等待 :
+_STRING = 4       # 读取字符串值
+_LITERAL = 5      # 读取数字、true、false、null
+_AFTER = 6        # 值结束后，等待 , 或 } ]
+_END = 7          # 顶层值已结束
+
+_QUOTE = ord('"')
+_BACKSLASH = ord('\\')
+_COMMA = ord(',')
+_COLON_CHAR = ord(':')
+_OPEN_OBJECT = ord('{')
+_CLOSE_OBJECT = ord('}')
+_OPEN_ARRAY = ord('[')
+_CLOSE_ARRAY = ord(']')
+_WHITESPACE = b' \t\r\n'
+_LITERAL_END = b' \t\r\n,}]'
+
+
+class JsonPathExtractor:
+    """流式JSON提取器
+
+    分块喂入JSON文本，只取出指定路径上的值，不构建整个对象。
+    只有命中的值会被复制出来用json.loads解析，其余内容边读边丢弃，
+    内存占用和响应大小无关。所有路径都找到后done为True，调用者可以停止读取。
+
+    example:
+        extractor = JsonPathExtractor([("rates", "CNY")])
+        for chunk in response.iter_content(256):
+            if extractor.feed(chunk):
+                break
+        rate = extractor.results.get(("rates", "CNY"))
+    """
+    def __init__(self, paths, max_value=256):
+        """
+        Args:
+            paths: 路径列表，每个路径是键（字符串）和数组下标（整数）组成的元组，
+                路径之间不能互相包含
+            max_value: 单个值的最大长度，超过时放弃这个值
+        """
+        self.paths = [tuple(path) for path in paths]
+        # 键预先编码，和解析中的键缓冲直接比较，不需要为每个键创建字符串
+        self._targets = [
+            tuple(part.encode() if isinstance(part, str) else part for part in path)
+            for path in self.paths
+        ]
+        self.max_value = max_value
+        self.results = {}
+        self.done = not self.paths
+        self.bytes_read = 0
+        # 每层容器一项：[是否对象, 当前键缓冲或数组下标]
+        self._stack = []
+        self._mode = _VALUE
+        self._escape = False
+        self._capture = None
+        self._capture_index = 0
+        self._capture_depth = 0
+
+    def feed(self, chunk):
+        """喂入一块数据
+
+        Returns:
+            是否已经找到所有路径
+        """
+        if self.done:
+            return True
+        for c in chunk:
+            self.bytes_read += 1
+            if self._capture is not None:
+                self._capture.append(c)
+                if len(self._capture) > self.max_value:
+                    print(f"JSON value too long: {self.paths[self._capture_index]}")
+                    self._capture = None
+            self._step(c)
+            if self.done:
+                break
+        return self.done
+
+    def _step(self, c):
+        """处理一个字节"""
+        mode = self._mode
+        if mode == _STRING or mode == _KEY_STRING:
+            if self._escape:
+                self._escape = False
+            elif c == _BACKSLASH:
+                self._escape = True
+            elif c == _QUOTE:
+                if mode == _KEY_STRING:
+                    self._mode = _COLON
+                    return
+                self._end_value(False)
+                return
+            if mode == _KEY_STRING:
+                self._stack[-1][1].append(c)
+            return
+
+        if mode == _LITERAL:
+            if c not in _LITERAL_END:
+                return
+            # 结束符不属于这个值
+            self._end_value(True)
+            mode = self._mode
+
+        if c in _WHITESPACE:
+            return
+
+        if mode == _VALUE:
+            if c == _CLOSE_ARRAY and self._stack and not self._stack[-1][0]:
+                # 空数组
+                self._close()
+                return
+            self._start_value(c)
+        elif mode == _KEY:
+            if c == _QUOTE:
+                self._stack[-1][1] = bytearray()
+                self._mode = _KEY_STRING
+            elif c == _CLOSE_OBJECT:
+                self._close()
+        elif mode == _COLON:
+            if c == _COLON_CHAR:
+                self._mode = _VALUE
+        elif mode == _AFTER:
+            if c == _COMMA:
+                top = self._stack[-1]
+                if top[0]:
+                    self._mode = _KEY
+                else:
+                    top[1] += 1
+                    self._mode = _VALUE
+            elif c == _CLOSE_OBJECT or c == _CLOSE_ARRAY:
+                self._close()
+
+    def _start_value(self, c):
+        """一个值开始，命中路径时开始复制"""
+        if self._capture is None:
+            index = self._match()
+            if index is not None:
+                self._capture = bytearray()
+                self._capture.append(c)
+                self._capture_index = index
+                self._capture_depth = len(self._stack)
+        if c == _OPEN_OBJECT:
+            self._stack.append([True, bytearray()])
+            self._mode = _KEY
+        elif c == _OPEN_ARRAY:
+            self._stack.append([False, 0])
+            self._mode = _VALUE
+        elif c == _QUOTE:
+            self._mode = _STRING
+        else:
+            self._mode = _LITERAL
+
+    def _close(self):
+        """容器结束"""
+        self._stack.pop()
+        self._end_value(False)
+
+    def _end_value(self, trim):
+        """一个值结束，复制完成时解析它"""
+        if self._capture is not None and len(self._stack) == self._capture_depth:
+            data = self._capture[:-1] if trim else self._capture
+            self._capture = None
+            path = self.paths[self._capture_index]
+            try:
+                self.results[path] = json.loads(data.decode())
+            except ValueError as e:
+                print(f"Failed to parse JSON value at {path}: {e}")
+            if len(self.results) == len(self.paths):
+                self.done = True
+        self._mode = _AFTER if self._stack else _END
+
+    def _match(self):
+        """当前位置命中的路径序号，没有命中返回None"""
+        stack = self._stack
+        depth = len(stack)
+        for index, target in enumerate(self._targets):
+            if len(target) != depth or self.paths[index] in self.results:
+                continue
+            for level in range(depth):
+                if stack[level][1] != target[level]:
+                    break
+            else:
+                return index
+        return None
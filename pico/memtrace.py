@@ -0,0 +1,248 @@
+import gc
+import time
+from array import array
+
+# 事件类型
+EVENT_SAMPLE = 0   # 帧前后的堆采样
+EVENT_REGION = 1   # 代码区域的分配统计
+EVENT_PROBE = 2    # 最大空闲块探测
+
+# 最多跟踪的代码区域数量，最后一个保留给超出数量的区域
+MAX_REGIONS = 32
+OVERFLOW_REGION = MAX_REGIONS - 1
+OVERFLOW_NAME = "<overflow>"
+
+
+class _NullRegion:
+    """关闭跟踪时使用的空上下文，不做任何事"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_REGION = _NullRegion()
+
+
+class _Region:
+    """代码区域上下文，进入/退出时记录已分配内存的差值"""
+    def __init__(self, tracer, region_id):
+        self._tracer = tracer
+        self._id = region_id
+        self._start = 0
+
+    def __enter__(self):
+        self._start = gc.mem_alloc()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 区域内发生GC时差值可能为负，此时按0计
+        delta = gc.mem_alloc() - self._start
+        if delta < 0:
+            delta = 0
+        self._tracer._add_region(self._id, delta)
+        return False
+
+
+class MemTracer:
+    """堆碎片分析器，记录内存采样并写入环形缓冲区"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MemTracer, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        self.enabled = False
+        self.sink = 'serial'
+        self.path = '/memtrace.log'
+        self.probe_interval = 0
+        self._capacity = 0
+        self._head = 0
+        self._count = 0
+        self._frames = 0
+        self._regions = []
+        self._contexts = {}
+        # 每个区域的累计统计
+        self._region_count = array('L', [0] * MAX_REGIONS)
+        self._region_total = array('L', [0] * MAX_REGIONS)
+        self._region_max = array('L', [0] * MAX_REGIONS)
+
+    def enable(self, capacity=256, sink='serial', path=None, probe_interval=50):
+        """开启跟踪
+
+        Args:
+            capacity: 环形缓冲区的记录条数
+            sink: 输出位置，'serial' 或 'flash'
+            path: 写入flash时的文件路径
+            probe_interval: 每隔多少帧探测一次最大空闲块，0表示不探测
+        """
+        if sink not in ('serial', 'flash'):
+            raise ValueError("sink must be 'serial' or 'flash'")
+        self.sink = sink
+        if path:
+            self.path = path
+        self.probe_interval = probe_interval
+        # 预先分配缓冲区，记录时不再分配内存
+        self._capacity = capacity
+        self._time = array('L', [0] * capacity)
+        self._kind = array('B', [0] * capacity)
+        self._region = array('B', [0] * capacity)
+        self._free = array('l', [0] * capacity)
+        self._value = array('l', [0] * capacity)
+        self._head = 0
+        self._count = 0
+        self._frames = 0
+        self.enabled = True
+        print(f"Memory trace enabled ({capacity} records, sink: {sink})")
+
+    def disable(self):
+        """关闭跟踪并输出剩余记录"""
+        if not self.enabled:
+            return
+        self.flush()
+        self.enabled = False
+
+    def region_id(self, name):
+        """获取区域编号，新区域自动注册"""
+        try:
+            return self._regions.index(name)
+        except ValueError:
+            if len(self._regions) >= OVERFLOW_REGION:
+                # 超出的区域合并计入单独的溢出区域，不算到已注册的区域上
+                if len(self._regions) == OVERFLOW_REGION:
+                    self._regions.append(OVERFLOW_NAME)
+                print(f"Too many trace regions, counting {name} as {OVERFLOW_NAME}")
+                return OVERFLOW_REGION
+            self._regions.append(name)
+            return len(self._regions) - 1
+
+    def profile(self, name):
+        """获取代码区域的上下文管理器"""
+        if not self.enabled:
+            return _NULL_REGION
+        context = self._contexts.get(name)
+        if context is None:
+            context = _Region(self, self.region_id(name))
+            self._contexts[name] = context
+        return context
+
+    def _record(self, kind, region, free, value):
+        """写入一条记录，缓冲区满时覆盖最旧的记录"""
+        i = self._head
+        self._time[i] = int(time.monotonic() * 1000) & 0xFFFFFFFF
+        self._kind[i] = kind
+        self._region[i] = region
+        self._free[i] = free
+        self._value[i] = value
+        self._head = (i + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def _add_region(self, region, delta):
+        """累计区域分配并记录"""
+        self._region_count[region] += 1
+        self._region_total[region] += delta
+        if delta > self._region_max[region]:
+            self._region_max[region] = delta
+        self._record(EVENT_REGION, region, gc.mem_free(), delta)
+
+    def sample(self, name):
+        """采样当前空闲内存，在应用帧前后调用"""
+        if not self.enabled:
+            return
+        region = self.region_id(name)
+        self._record(EVENT_SAMPLE, region, gc.mem_free(), gc.mem_alloc())
+
+    def frame(self, name):
+        """标记一帧结束，按间隔探测最大空闲块"""
+        if not self.enabled:
+            return
+        self.sample(name)
+        self._frames += 1
+        if self.probe_interval and self._frames % self.probe_interval == 0:
+            self.probe(name)
+
+    def largest_free_block(self):
+        """二分查找当前能分配的最大连续内存块"""
+        low = 0
+        high = gc.mem_free()
+        while low < high:
+            size = (low + high + 1) // 2
+            try:
+                block = bytearray(size)
+                del block
+                low = size
+            except MemoryError:
+                high = size - 1
+        gc.collect()
+        return low
+
+    def probe(self, name='probe'):
+        """记录一次最大空闲块探测"""
+        largest = self.largest_free_block()
+        if self.enabled:
+            self._record(EVENT_PROBE, self.region_id(name), gc.mem_free(), largest)
+        return largest
+
+    def get_region_stats(self):
+        """获取各区域的分配统计"""
+        stats = {}
+        for i, name in enumerate(self._regions):
+            count = self._region_count[i]
+            stats[name] = {
+                'count': count,
+                'total': self._region_total[i],
+                'max': self._region_max[i],
+                'avg': self._region_total[i] // count if count else 0
+            }
+        return stats
+
+    def _write_lines(self, write):
+        """按时间顺序输出区域表和记录"""
+        for i, name in enumerate(self._regions):
+            write(f"MTR,{i},{name}\n")
+        start = (self._head - self._count) % self._capacity
+        for n in range(self._count):
+            i = (start + n) % self._capacity
+            write(f"MT,{self._time[i]},{self._kind[i]},{self._region[i]},{self._free[i]},{self._value[i]}\n")
+
+    def flush(self):
+        """把缓冲区写入flash或串口，然后清空"""
+        if not self.enabled or self._count == 0:
+            return
+        if self.sink == 'flash':
+            try:
+                with open(self.path, "a") as f:
+                    self._write_lines(f.write)
+                self._count = 0
+                return
+            except OSError as e:
+                # 文件系统只读时退回串口输出
+                print(f"Memory trace flash write failed: {e}")
+        self._write_lines(lambda line: print(line, end=""))
+        self._count = 0
+
+
+_tracer = MemTracer()
+
+
+def profile(name):
+    """统计代码区域的内存分配
+
+    example:
+        with profile("tetris.draw"):
+            self.draw_game()
+    """
+    return _tracer.profile(name)
+
+
+def frame(name):
+    """标记应用的一帧，采样空闲内存"""
+    if _tracer.enabled:
+        _tracer.frame(name)
@@ -1,9 +1,10 @@
 import time
 import displayio
-import terminalio
 from adafruit_display_text import label
-from adafruit_display_shapes.rect import Rect
 from adafruit_display_shapes.roundrect import RoundRect
+from pico.profiler import span
+from pico.telemetry import Telemetry
+from pico.feeds import FeedHub
 
 class Menu:
     def __new__(cls, *args, **kwargs):
@@ -25,6 +26,12 @@ class Menu:
         self.hw = hw
         self.colors = colors
         self.display = pico.display
+        # 设备指标上报和推送数据，未配置MQTT时不做任何事
+        self.telemetry = Telemetry()
+        self.feeds = FeedHub()
+        # WiFi断线重连和射频电源管理
+        from pico.system import SystemManager
+        self.system = SystemManager()
         
         # 菜单配置
         self.menu_items = []
@@ -40,14 +47,8 @@ class Menu:
         # 创建主显示组
         self.main_group = displayio.Group()
         
-        # 创建背景
-        self.bg_rect = Rect(
-            x=0,
-            y=0,
-            width=self.display.width,
-            height=self.display.height,
-            fill=self.colors['background']
-        )
+        # 创建背景，共用全屏位图，不再分配一张新的；菜单一直存在，背景不随应用释放
+        self.bg_rect = pico.get_background(self.colors['background'], keep=True)
         self.main_group.append(self.bg_rect)
         
         # 创建菜单项组
@@ -85,7 +86,7 @@ class Menu:
         
         for text, x in hints:
             hint_label = label.Label(
-                terminalio.FONT,
+                self.pico.font,
                 text=text,
                 color=self.colors['hint'],
                 x=x,
@@ -103,9 +104,14 @@ class Menu:
         
     def draw_menu(self):
         """绘制菜单"""
-        # 清除现有菜单项
+        with span("menu.draw"):
+            self._draw_menu()
+
+    def _draw_menu(self):
+        """重建菜单项"""
+        # 清除现有菜单项，标签放回标签池
         while len(self.menu_group) > 1:  # 保留highlight
-            self.menu_group.pop()
+            self.pico.release_label(self.menu_group.pop())
             
         # 计算可见项范围
         start_idx = self.scroll_offset
@@ -121,16 +127,13 @@ class Menu:
             is_selected = (i + start_idx) == self.current_index
             text_color = self.colors['selected'] if is_selected else self.colors['text']
             
-            text = label.Label(
-                terminalio.FONT,
-                text=item['name'],
-                color=text_color,
-                scale=self.text_scale,
-                x=20,
-                y=i * self.item_height + self.item_height // 2,
-                anchor_point=(0, 0.5),
-                anchored_position=(20, i * self.item_height + self.item_height // 2)
+            text = self.pico.acquire_label(
+                item['name'],
+                text_color,
+                self.text_scale,
+                anchor_point=(0, 0.5)
             )
+            text.anchored_position = (20, i * self.item_height + self.item_height // 2)
             self.menu_group.append(text)
             
         # 更新滚动指示器
@@ -172,28 +175,32 @@ class Menu:
             self.scroll_down.append(down_indicator)
             
     def handle_input(self):
-        """处理输入"""
-        if self.hw.get_button_state('up'):
-            if self.current_index > 0:
-                self.current_index -= 1
-                if self.current_index < self.scroll_offset:
-                    self.scroll_offset = self.current_index
-                self.draw_menu()
-            time.sleep(0.2)
-            
-        elif self.hw.get_button_state('down'):
-            if self.current_index < len(self.menu_items) - 1:
-                self.current_index += 1
-                if self.current_index >= self.scroll_offset + self.visible_items:
-                    self.scroll_offset = self.current_index - self.visible_items + 1
-                self.draw_menu()
-            time.sleep(0.2)
-            
-        elif self.hw.get_button_state('a'):
-            if 0 <= self.current_index < len(self.menu_items):
-                return self.menu_items[self.current_index]
+        """处理输入，按键后的消抖等待不计入input的耗时"""
+        pressed = False
+        with span("input"):
+            if self.hw.get_button_state('up'):
+                if self.current_index > 0:
+                    self.current_index -= 1
+                    if self.current_index < self.scroll_offset:
+                        self.scroll_offset = self.current_index
+                    self.draw_menu()
+                pressed = True
+                
+            elif self.hw.get_button_state('down'):
+                if self.current_index < len(self.menu_items) - 1:
+                    self.current_index += 1
+                    if self.current_index >= self.scroll_offset + self.visible_items:
+                        self.scroll_offset = self.current_index - self.visible_items + 1
+                    self.draw_menu()
+                pressed = True
+                
+            elif self.hw.get_button_state('a'):
+                if 0 <= self.current_index < len(self.menu_items):
+                    return self.menu_items[self.current_index]
+                pressed = True
+                
+        if pressed:
             time.sleep(0.2)
-            
         return None
         
     def show(self):
@@ -216,6 +223,7 @@ class Menu:
                         result = app.play()
                         
                         # 应用退出后清理
+                        self.pico.release_backgrounds()
                         system.cleanup_all()
                         
                         # 重新显示菜单
@@ -227,6 +235,10 @@ class Menu:
                     from pico.system import SystemManager
                     SystemManager().cleanup_all()
                 return selected
+            # 菜单中可以停顿，需要时在这里重连WiFi、建立MQTT连接、上报和接收推送
+            self.system.supervise_wifi()
+            self.telemetry.poll()
+            self.feeds.poll()
             time.sleep(0.01)  # 防止CPU占用过高
 
     def cleanup_modules(self):
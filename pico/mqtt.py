@@ -0,0 +1,200 @@
+import os
+import time
+import random
+
+try:
+    import adafruit_minimqtt.adafruit_minimqtt as MQTT
+except ImportError:
+    MQTT = None
+
+# 重连等待（秒），每次失败加倍，最多RECONNECT_MAX，并加入随机抖动
+RECONNECT_MIN = 2
+RECONNECT_MAX = 300
+# 心跳间隔（秒），空闲超过一半时发送PING
+KEEP_ALIVE = 120
+# 建立连接时的socket超时（秒）；服务器应在局域网内
+SOCKET_TIMEOUT = 0.1
+# 连接后每次接收消息最多阻塞的时间（秒），低于应用50ms的输入延迟预算
+RECV_TIMEOUT = 0.01
+
+
+def device_id():
+    """设备唯一编号，用作client id和主题的一部分"""
+    try:
+        import microcontroller
+        return "".join("%02x" % b for b in microcontroller.cpu.uid)
+    except (ImportError, AttributeError):
+        return "pico"
+
+
+class MqttConnection:
+    """共用的MQTT连接（单例）
+
+    settings.toml中设置PICO_MQTT_BROKER后启用，可选PICO_MQTT_PORT、
+    PICO_MQTT_USER、PICO_MQTT_PASSWORD。整个系统只保持这一个连接。
+    只在WiFi已连接时才建立连接，失败后按退避时间重试，期间调用ensure()直接返回。
+    建立连接会阻塞一小段时间，只应在允许停顿的地方（菜单）调用ensure()；
+    已连接时publish()只发送一个小包。订阅的主题在重连后自动重新订阅，
+    收到的消息由loop()交给on_message(topic, message)。
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MqttConnection, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        self.broker = os.getenv('PICO_MQTT_BROKER')
+        self.port = int(os.getenv('PICO_MQTT_PORT', 1883))
+        self.username = os.getenv('PICO_MQTT_USER')
+        self.password = os.getenv('PICO_MQTT_PASSWORD')
+        self.client_id = device_id()
+        self.client = None
+        self.connected = False
+        # 收到订阅的消息时调用 on_message(topic, message)
+        self.on_message = None
+        self._topics = []
+        self.connects = 0
+        self.failures = 0
+        self._backoff = RECONNECT_MIN
+        self._next_attempt = 0
+        self._last_sent = 0
+
+    @property
+    def enabled(self):
+        """是否配置了服务器"""
+        return bool(self.broker) and MQTT is not None
+
+    def ensure(self):
+        """未连接时尝试连接，还在退避等待或WiFi未连接时直接返回
+
+        Returns:
+            是否已连接
+        """
+        if self.connected:
+            return True
+        if not self.enabled or time.monotonic() < self._next_attempt:
+            return False
+        from pico.system import SystemManager
+        system = SystemManager()
+        if system.connection is None or not system.connection.connected:
+            return False
+        try:
+            if self.client is None:
+                self.client = MQTT.MQTT(
+                    broker=self.broker,
+                    port=self.port,
+                    username=self.username,
+                    password=self.password,
+                    client_id=self.client_id,
+                    keep_alive=KEEP_ALIVE,
+                    socket_pool=system.wifi.socketpool,
+                    ssl_context=system.wifi.ssl_context,
+                    socket_timeout=SOCKET_TIMEOUT,
+                    connect_retries=1
+                )
+                self.client.on_message = self._handle_message
+            self.client.connect()
+            for topic in self._topics:
+                self.client.subscribe(topic)
+            # minimqtt建立连接和接收消息用同一个超时，连接后缩短，
+            # 否则loop()在没有消息时也要阻塞SOCKET_TIMEOUT
+            self.client._sock.settimeout(RECV_TIMEOUT)
+            self.client._socket_timeout = RECV_TIMEOUT
+        except Exception as e:
+            print(f"MQTT connect failed: {e}")
+            self._lost()
+            return False
+        self.connected = True
+        self.connects += 1
+        self._backoff = RECONNECT_MIN
+        self._last_sent = time.monotonic()
+        print(f"MQTT connected to {self.broker}:{self.port}")
+        return True
+
+    def _lost(self):
+        """连接失败或断开，丢弃客户端并安排下次重连"""
+        if self.client is not None:
+            try:
+                self.client.disconnect()
+            except Exception:
+                pass
+            self.client = None
+        self.connected = False
+        self.failures += 1
+        # 抖动避免多台设备在服务器重启后同时重连
+        delay = self._backoff * (0.5 + random.random())
+        self._next_attempt = time.monotonic() + delay
+        self._backoff = min(self._backoff * 2, RECONNECT_MAX)
+        print(f"MQTT reconnect in {delay:.1f}s")
+
+    def publish(self, topic, payload):
+        """发布一条消息，未连接时不发送
+
+        Returns:
+            是否已发送
+        """
+        if not self.connected:
+            return False
+        try:
+            self.client.publish(topic, payload)
+        except Exception as e:
+            print(f"MQTT publish failed: {e}")
+            self._lost()
+            return False
+        self._last_sent = time.monotonic()
+        return True
+
+    def subscribe(self, topic):
+        """订阅主题，未连接时在连接后订阅"""
+        if topic in self._topics:
+            return
+        self._topics.append(topic)
+        if not self.connected:
+            return
+        try:
+            self.client.subscribe(topic)
+        except Exception as e:
+            print(f"MQTT subscribe failed: {e}")
+            self._lost()
+
+    def _handle_message(self, client, topic, message):
+        if self.on_message:
+            self.on_message(topic, message)
+
+    def loop(self):
+        """接收订阅的消息，没有消息时阻塞约RECV_TIMEOUT，同时处理心跳"""
+        if not self.connected:
+            return
+        try:
+            self.client.loop(RECV_TIMEOUT)
+        except Exception as e:
+            print(f"MQTT loop failed: {e}")
+            self._lost()
+            return
+        # loop()内部会按需发送心跳
+        self._last_sent = time.monotonic()
+
+    def maintain(self):
+        """空闲时发送心跳，保持连接"""
+        if not self.connected or time.monotonic() - self._last_sent < KEEP_ALIVE / 2:
+            return
+        try:
+            self.client.ping()
+        except Exception as e:
+            print(f"MQTT ping failed: {e}")
+            self._lost()
+            return
+        self._last_sent = time.monotonic()
+
+    def get_stats(self):
+        """获取连接统计"""
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'failures': self.failures
+        }
@@ -0,0 +1,142 @@
+import time
+from array import array
+
+# 最多统计的span数量
+MAX_SPANS = 16
+# 统计数组的上限（array('L')），累计到上限后不再增加，避免长时间运行后回绕
+MAX_VALUE = 0xFFFFFFFF
+
+# 预先注册的常用span
+DEFAULT_SPANS = ('draw', 'input', 'logic', 'io', 'gc')
+
+
+class _NullSpan:
+    """关闭统计时使用的空上下文，不做任何事"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """计时上下文，退出时把耗时累计到对应的span"""
+    def __init__(self, profiler, span_id):
+        self._profiler = profiler
+        self._id = span_id
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.monotonic_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.add(self._id, (time.monotonic_ns() - self._start) // 1000)
+        return False
+
+
+class Profiler:
+    """热点耗时统计，按span名称累计次数、总耗时和最大耗时"""
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Profiler, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        self.enabled = False
+        self._names = []
+        self._spans = {}
+        # 固定大小的统计数组，单位为微秒
+        self._count = array('L', [0] * MAX_SPANS)
+        self._total = array('L', [0] * MAX_SPANS)
+        self._max = array('L', [0] * MAX_SPANS)
+        for name in DEFAULT_SPANS:
+            self.span_id(name)
+
+    def enable(self):
+        """开启统计"""
+        self.enabled = True
+
+    def disable(self):
+        """关闭统计"""
+        self.enabled = False
+
+    def reset(self):
+        """清空统计数据"""
+        for i in range(MAX_SPANS):
+            self._count[i] = 0
+            self._total[i] = 0
+            self._max[i] = 0
+
+    def span_id(self, name):
+        """获取span编号，新span自动注册"""
+        try:
+            return self._names.index(name)
+        except ValueError:
+            if len(self._names) >= MAX_SPANS:
+                print(f"Too many profiler spans, ignoring: {name}")
+                return MAX_SPANS - 1
+            self._names.append(name)
+            return len(self._names) - 1
+
+    def span(self, name):
+        """获取span的计时上下文"""
+        if not self.enabled:
+            return _NULL_SPAN
+        context = self._spans.get(name)
+        if context is None:
+            context = _Span(self, self.span_id(name))
+            self._spans[name] = context
+        return context
+
+    def add(self, span_id, elapsed_us):
+        """累计一次耗时"""
+        if elapsed_us > MAX_VALUE:
+            elapsed_us = MAX_VALUE
+        self._count[span_id] += 1
+        self._total[span_id] = min(self._total[span_id] + elapsed_us, MAX_VALUE)
+        if elapsed_us > self._max[span_id]:
+            self._max[span_id] = elapsed_us
+
+    def top(self, limit=6):
+        """按总耗时排序返回前几个span
+
+        Returns:
+            [(name, count, total_us, max_us), ...]
+        """
+        result = []
+        for i, name in enumerate(self._names):
+            if self._count[i]:
+                result.append((name, self._count[i], self._total[i], self._max[i]))
+        result.sort(key=lambda item: item[2], reverse=True)
+        return result[:limit]
+
+    def print_report(self):
+        """打印统计结果"""
+        print("\n=== Profiler ===")
+        for name, count, total, peak in self.top(MAX_SPANS):
+            print(f"{name}: {count} calls, {total // 1000}ms total, {total // count}us avg, {peak}us max")
+        print("================\n")
+
+
+_profiler = Profiler()
+
+
+def span(name):
+    """统计代码段耗时
+
+    example:
+        with span("draw"):
+            self.draw_game()
+    """
+    if not _profiler.enabled:
+        return _NULL_SPAN
+    return _profiler.span(name)
@@ -1,61 +1,349 @@
 import adafruit_requests
 import gc
+import json
+import time
+from pico.jsonstream import JsonPathExtractor
+
+try:
+    import adafruit_connection_manager
+except ImportError:
+    adafruit_connection_manager = None
+
+class ResponseCache:
+    """持久化的响应缓存
+
+    按URL保存从响应中提取的值以及ETag/Last-Modified，写在flash上的一个小JSON文件里，
+    只保存提取出的值而不是整个响应。过期后用If-None-Match/If-Modified-Since重新验证，
+    服务器返回304时直接沿用缓存的值。
+    RTC没有校时的时候time.time()不可信，这时只按本次开机内的验证时间判断是否过期。
+    文件系统只读时只在内存中缓存。
+    """
+    PATH = "/response_cache.json"
+    # 最多缓存的URL数，超过时淘汰最早获取的
+    MAX_ENTRIES = 8
+
+    def __init__(self, path=PATH, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        # URL -> [获取时间, ETag, Last-Modified, [[路径, 值], ...]]
+        self._entries = None
+        # URL -> 本次开机内最近一次验证的time.monotonic()
+        self._checked = {}
+        self._writable = True
+
+    @staticmethod
+    def _clock_valid():
+        """RTC是否已经校时"""
+        return time.localtime().tm_year >= 2024
+
+    def _load(self):
+        """第一次使用时从flash读取"""
+        if self._entries is None:
+            try:
+                with open(self.path, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        """写回flash"""
+        if not self._writable:
+            return
+        try:
+            with open(self.path, "w") as f:
+                json.dump(self._entries, f)
+        except OSError as e:
+            # 文件系统只读时不再尝试写入
+            print(f"Response cache is memory only: {e}")
+            self._writable = False
+
+    def lookup(self, url, paths):
+        """取出缓存的值，不管是否过期
+
+        Returns:
+            {路径: 值}，没有缓存或缺少某个路径时返回None
+        """
+        entry = self._load().get(url)
+        if entry is None:
+            return None
+        values = {tuple(path): value for path, value in entry[3]}
+        for path in paths:
+            if tuple(path) not in values:
+                return None
+        return values
+
+    def is_fresh(self, url):
+        """缓存是否还在有效期内"""
+        checked = self._checked.get(url)
+        if checked is not None and time.monotonic() - checked < self.ttl:
+            return True
+        entry = self._load().get(url)
+        if entry is None or not entry[0] or not self._clock_valid():
+            return False
+        return time.time() - entry[0] < self.ttl
+
+    def validators(self, url):
+        """重新验证用的条件请求头"""
+        entry = self._load().get(url)
+        headers = {}
+        if entry:
+            if entry[1]:
+                headers['If-None-Match'] = entry[1]
+            if entry[2]:
+                headers['If-Modified-Since'] = entry[2]
+        return headers
+
+    def store(self, url, values, etag=None, modified=None):
+        """保存新获取的值"""
+        entries = self._load()
+        if url not in entries and len(entries) >= self.MAX_ENTRIES:
+            oldest = min(entries, key=lambda key: entries[key][0])
+            del entries[oldest]
+        fetched = int(time.time()) if self._clock_valid() else 0
+        entries[url] = [fetched, etag, modified, [[list(path), value] for path, value in values.items()]]
+        self._checked[url] = time.monotonic()
+        self._save()
+
+    def touch(self, url):
+        """服务器返回304，缓存重新生效"""
+        entry = self._load().get(url)
+        if entry is None:
+            return
+        self._checked[url] = time.monotonic()
+        if self._clock_valid():
+            entry[0] = int(time.time())
+            self._save()
+
+    def get_stats(self):
+        """获取缓存统计"""
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses
+        }
+
+
+def _header(response, name):
+    """不区分大小写读取响应头"""
+    for key, value in response.headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
 
 class PicoRequest:
-    def __init__(self, socketpool=None):
+    # 空闲内存低于该值时才在请求前回收
+    GC_THRESHOLD = 32768
+    # 流式读取响应的分块大小
+    CHUNK_SIZE = 256
+    # 连接出错时的重试次数和首次重试等待（秒），之后每次加倍
+    MAX_RETRIES = 2
+    BACKOFF = 0.5
+
+    def __init__(self, socketpool=None, ssl_context=None, cache=None):
+        """创建长期使用的请求会话
+
+        会话通过adafruit_connection_manager复用socket：响应读完并关闭后，
+        连接保持打开（HTTP keep-alive），下一次请求同一主机时直接复用。
+        整个应用只需要创建一次，出错时也不用重建。
+        cache为ResponseCache时，get_values()的结果会被缓存。
+        """
         if socketpool is None:
             print("Error: socketpool is None")
             raise ValueError("socketpool cannot be None")
         try:
             print("Initializing request session...")
-            self.r = adafruit_requests.Session(socketpool)
+            self.socketpool = socketpool
+            self.r = adafruit_requests.Session(socketpool, ssl_context)
             print("Request session initialized")
         except Exception as e:
             print(f"Error initializing request session: {str(e)}")
             raise
-        
-    def get(self, url):
-        return self.request("GET", url)
-        
-    def post(self, url):
-        return self.request("POST", url)
-
-    def request(self, method, url):
-        try:
-            # 在请求前执行垃圾回收
+        self.cache = cache
+        self.requests = 0
+        self.retries = 0
+        self.collections = 0
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def get_json(self, url, **kwargs):
+        """GET并解析JSON
+
+        响应读完后立即关闭，socket回到连接池供下次复用。
+
+        Returns:
+            (状态码, 解析后的数据)，状态码不是200时数据为None
+        """
+        with self.get(url, **kwargs) as response:
+            status = response.status_code
+            data = response.json() if status == 200 else None
+        return status, data
+
+    def get_values(self, url, paths, revalidate=False, **kwargs):
+        """GET并从JSON响应中只取出指定路径的值
+
+        响应按CHUNK_SIZE分块读取，边读边解析，不构建整个对象；
+        所有路径都找到后停止解析，关闭响应时剩余内容被丢弃，连接仍可复用。
+
+        Args:
+            paths: 路径列表，例如 [("rates", "CNY")]
+            revalidate: 为True时即使缓存未过期也向服务器验证
+
+        有缓存时：缓存未过期直接返回缓存的值，不访问网络；
+        过期后发送条件请求，服务器返回304时沿用缓存的值。
+
+        Returns:
+            (状态码, {路径: 值})，没有找到的路径不在结果中；
+            来自缓存的结果状态码为200
+        """
+        cache = self.cache
+        cached = cache.lookup(url, paths) if cache else None
+        if cached is not None:
+            if not revalidate and cache.is_fresh(url):
+                cache.hits += 1
+                return 200, cached
+            # 复制一份，避免验证头留在调用者的字典里被其他URL的请求带上
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(cache.validators(url))
+            kwargs['headers'] = headers
+
+        with self.get(url, **kwargs) as response:
+            status = response.status_code
+            if status == 304 and cached is not None:
+                cache.revalidated += 1
+                cache.touch(url)
+                return 200, cached
+            if status != 200:
+                return status, {}
+            extractor = JsonPathExtractor(paths)
+            for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                if extractor.feed(chunk):
+                    break
+            etag = _header(response, 'etag')
+            modified = _header(response, 'last-modified')
+
+        if cache:
+            cache.misses += 1
+            cache.store(url, extractor.results, etag, modified)
+        return status, extractor.results
+
+    def fetch_values(self, url, paths, revalidate=False, timeout=10, **kwargs):
+        """和get_values()相同，但不阻塞
+
+        返回pico.fetch.JsonFetch，由调用者在主循环中poll()，
+        请求期间可以继续处理按键，也可以cancel()。只支持http地址。
+        """
+        from pico.fetch import JsonFetch
+        self.requests += 1
+        return JsonFetch(self.socketpool, url, paths, self.cache, revalidate, timeout, **kwargs)
+
+    def _maybe_collect(self):
+        """只在空闲内存不足时回收，不再每次请求都回收"""
+        if gc.mem_free() < self.GC_THRESHOLD:
             gc.collect()
-            print(f"Making {method} request to {url}")
-            
-            if method == "GET":
-                print("Creating GET request...")
-                response = self.r.get(url)
-                print(f"Response received, status code: {response.status_code}")
-            elif method == "POST":
-                print("Creating POST request...")
-                response = self.r.post(url)
-                print(f"Response received, status code: {response.status_code}")
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-                
-            return response
-            
+            self.collections += 1
+
+    def _drop_sockets(self):
+        """关闭连接池中的socket，服务器断开的连接不会再被复用"""
+        if adafruit_connection_manager is None:
+            return
+        try:
+            adafruit_connection_manager.connection_manager_close_all(self.socketpool)
         except Exception as e:
-            print(f"Request error: {str(e)}")
-            if hasattr(e, '__class__'):
-                print(f"Error type: {e.__class__.__name__}")
-            raise
+            print(f"Failed to close pooled sockets: {e}")
+
+    def request(self, method, url, retries=None, **kwargs):
+        """发送请求，连接错误时按退避时间重试
+
+        调用者读完响应后要关闭它（或使用with），连接才能被复用。
+        """
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported method: {method}")
+        if retries is None:
+            retries = self.MAX_RETRIES
+        attempt = 0
+        while True:
+            self._maybe_collect()
+            try:
+                response = self.r.request(method, url, **kwargs)
+                self.requests += 1
+                return response
+            except (OSError, RuntimeError) as e:
+                # keep-alive的连接可能已被服务器关闭，丢弃旧连接后重试
+                print(f"Request error: {str(e)}")
+                if attempt >= retries:
+                    print(f"Error type: {e.__class__.__name__}")
+                    raise
+                self._drop_sockets()
+                delay = self.BACKOFF * (1 << attempt)
+                attempt += 1
+                self.retries += 1
+                print(f"Retrying {method} {url} in {delay}s ({attempt}/{retries})")
+                time.sleep(delay)
+
+    def benchmark(self, url, count=100, reuse=True):
+        """连续请求count次，统计延迟和内存分配
+
+        Args:
+            url: 请求地址，可以用tools/stub_server.py在电脑上提供
+            count: 请求次数
+            reuse: False时按旧方式每次新建会话并回收内存，用于对比
+        """
+        latencies = []
+        allocated = 0
+        errors = 0
+        for _ in range(count):
+            before = gc.mem_alloc()
+            start = time.monotonic_ns()
+            try:
+                if reuse:
+                    session = self
+                else:
+                    gc.collect()
+                    session = PicoRequest(self.socketpool)
+                    session._drop_sockets()
+                with session.get(url, retries=0) as response:
+                    response.content
+            except Exception as e:
+                print(f"Benchmark request failed: {e}")
+                errors += 1
+                continue
+            latencies.append((time.monotonic_ns() - start) // 1000)
+            # 期间发生过回收时差值为负，只累计增长的部分
+            allocated += max(0, gc.mem_alloc() - before)
+        done = len(latencies)
+        stats = {
+            'requests': count,
+            'errors': errors,
+            'avg_ms': sum(latencies) / done / 1000 if done else 0,
+            'min_ms': min(latencies) / 1000 if done else 0,
+            'max_ms': max(latencies) / 1000 if done else 0,
+            'bytes_per_request': allocated // done if done else 0,
+            'collections': self.collections,
+            'retries': self.retries
+        }
+        print(f"\n=== Request Benchmark ({'reuse' if reuse else 'new session'}) ===")
+        print(f"{done}/{count} ok, avg {stats['avg_ms']:.1f}ms, min {stats['min_ms']:.1f}ms, max {stats['max_ms']:.1f}ms")
+        print(f"{stats['bytes_per_request']} bytes allocated per request, {stats['collections']} collections")
+        return stats
 """
 example:
-from pico_wifi import PicoWifi
-from pico_request import PicoRequest
-
-#初始化wifi
-wifi = PicoWifi()
-ip = wifi.get_wifi_info()
-#初始化请求
-request = PicoRequest(wifi.radio)
-#各种初始化的请求不应该放在while循环中，否则会导致内存泄漏
+from pico.system import SystemManager
+from pico.request import PicoRequest
+
+#获取已连接的wifi
+wifi = SystemManager().get_wifi()
+#初始化请求，会话只创建一次，连接在请求之间复用
+request = PicoRequest(wifi.socketpool, wifi.ssl_context)
 while True:
-        response = request.get("https://yjiang.cn/other/notice.html")
-        print(response)
+        status, data = request.get_json("http://open.er-api.com/v6/latest/USD")
+        print(status, data)
 """
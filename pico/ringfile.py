@@ -0,0 +1,131 @@
+import struct
+
+MAGIC = b"RING"
+# 文件头：magic, 记录长度, 容量, 下一条写入位置, 已有记录数, 记录内容标识
+HEADER = "<4sHHHH16s"
+KEY_SIZE = 16
+HEADER_SIZE = struct.calcsize(HEADER)
+
+
+class RingFile:
+    """固定长度记录的环形文件
+
+    记录按struct格式打包，文件大小固定为 文件头 + 容量 * 记录长度，
+    写满后覆盖最旧的记录。每次追加只改写一条记录和文件头，适合在flash上保存历史数据。
+    key标识记录的含义（例如各列对应的货币），和文件头中保存的不同时重新创建文件，
+    避免长度相同但含义不同的旧记录被当作新记录读出。
+    文件系统只读时（CIRCUITPY没有在boot.py中用storage.remount改为程序可写）
+    退回到内存中保存，persistent为False。
+    """
+    def __init__(self, path, record_format, capacity, key=b""):
+        if len(key) > KEY_SIZE:
+            raise ValueError(f"Ring file key longer than {KEY_SIZE} bytes")
+        self.path = path
+        self.key = key
+        self.format = record_format
+        self.record_size = struct.calcsize(record_format)
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+        # 文件不可写时使用的内存记录
+        self._memory = None
+        self._open()
+
+    @property
+    def persistent(self):
+        """记录是否保存在文件中"""
+        return self._memory is None
+
+    def _header(self, head, count):
+        return struct.pack(HEADER, MAGIC, self.record_size, self.capacity, head, count, self.key)
+
+    def _open(self):
+        """读取文件头，格式不匹配或文件不存在时重新创建"""
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(HEADER_SIZE)
+            if len(header) == HEADER_SIZE:
+                magic, size, capacity, head, count, key = struct.unpack(HEADER, header)
+                if (magic == MAGIC and size == self.record_size and capacity == self.capacity
+                        and key.rstrip(b"\x00") == self.key):
+                    self.head = head % capacity
+                    self.count = min(count, capacity)
+                    return
+        except OSError:
+            pass
+        self._create()
+
+    def _create(self):
+        """创建空文件，预先写满记录区"""
+        self.head = 0
+        self.count = 0
+        try:
+            with open(self.path, "wb") as f:
+                f.write(self._header(0, 0))
+                empty = bytes(self.record_size)
+                for _ in range(self.capacity):
+                    f.write(empty)
+        except OSError as e:
+            print(f"Ring file {self.path} is memory only: {e}")
+            self._memory = []
+
+    def append(self, *values):
+        """追加一条记录"""
+        record = struct.pack(self.format, *values)
+        if self._memory is not None:
+            self._memory.append(record)
+            if len(self._memory) > self.capacity:
+                self._memory.pop(0)
+            self.count = len(self._memory)
+            return
+        head = (self.head + 1) % self.capacity
+        count = min(self.count + 1, self.capacity)
+        try:
+            with open(self.path, "r+b") as f:
+                f.seek(HEADER_SIZE + self.head * self.record_size)
+                f.write(record)
+                f.seek(0)
+                f.write(self._header(head, count))
+        except OSError as e:
+            # 写入失败时改为内存保存，保留已有的记录
+            print(f"Ring file {self.path} write failed: {e}")
+            self._memory = [struct.pack(self.format, *r) for r in self.records()]
+            self.append(*values)
+            return
+        self.head = head
+        self.count = count
+
+    def records(self):
+        """按从旧到新的顺序返回所有记录"""
+        if self._memory is not None:
+            return [struct.unpack(self.format, r) for r in self._memory]
+        result = []
+        if not self.count:
+            return result
+        start = (self.head - self.count) % self.capacity
+        buffer = bytearray(self.record_size)
+        try:
+            with open(self.path, "rb") as f:
+                for n in range(self.count):
+                    f.seek(HEADER_SIZE + ((start + n) % self.capacity) * self.record_size)
+                    f.readinto(buffer)
+                    result.append(struct.unpack(self.format, buffer))
+        except OSError as e:
+            print(f"Ring file {self.path} read failed: {e}")
+        return result
+
+    def last(self):
+        """最新的一条记录，没有记录时返回None"""
+        if self._memory is not None:
+            return struct.unpack(self.format, self._memory[-1]) if self._memory else None
+        if not self.count:
+            return None
+        buffer = bytearray(self.record_size)
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(HEADER_SIZE + ((self.head - 1) % self.capacity) * self.record_size)
+                f.readinto(buffer)
+        except OSError as e:
+            print(f"Ring file {self.path} read failed: {e}")
+            return None
+        return struct.unpack(self.format, buffer)
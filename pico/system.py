@@ -5,35 +5,99 @@ import microcontroller
 import storage
 
 class SystemManager:
+    _instance = None
+
+    def __new__(cls):
+        """单例模式，应用通过SystemManager()取得同一个WiFi连接"""
+        if cls._instance is None:
+            cls._instance = super(SystemManager, cls).__new__(cls)
+        return cls._instance
+
     def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
         self._init_time = time.monotonic()
         self._modules = {}
+        # WiFi不在启动时连接，菜单显示后由start_wifi()开始，或在get_wifi()时按需连接；
+        # 需要网络的模块用acquire_wifi()/release_wifi()登记，没有模块需要时关闭射频
         self.wifi = None
-        self._init_wifi()
+        self.connection = None
+        self.memtrace = None
+        self._init_memtrace()
+        self._init_profiler()
+
+    def _init_memtrace(self):
+        """根据settings.toml中的PICO_MEMTRACE开启内存跟踪"""
+        sink = os.getenv('PICO_MEMTRACE')
+        if sink:
+            self.enable_memtrace(sink=sink)
+
+    def _init_profiler(self):
+        """根据settings.toml中的PICO_PROFILE开启耗时统计"""
+        if os.getenv('PICO_PROFILE'):
+            from pico.profiler import Profiler
+            Profiler().enable()
+            print("Profiler enabled")
+
+    def enable_memtrace(self, sink='serial', capacity=256, probe_interval=50):
+        """开启堆碎片跟踪"""
+        try:
+            from pico.memtrace import MemTracer
+            self.memtrace = MemTracer()
+            self.memtrace.enable(capacity=capacity, sink=sink, probe_interval=probe_interval)
+        except Exception as e:
+            print(f"Failed to enable memory trace: {e}")
+            self.memtrace = None
         
-    def _init_wifi(self):
-        """初始化WiFi"""
-        print("Initializing WiFi...")
+    def start_wifi(self):
+        """开始连接WiFi，不阻塞
+
+        Returns:
+            WifiConnection连接状态，初始化失败时为None
+        """
         try:
-            from pico.wifi import PicoWifi
-            self.wifi = PicoWifi()
-            if not self.wifi.is_connected():
-                print("WiFi not connected, attempting to connect...")
-                if not self.wifi.connect():
-                    print("Failed to connect to WiFi")
-                    self.wifi = None
-                    print("System initialized with no network connection")
-                    return
-            print("WiFi connected successfully")
+            if self.connection is None:
+                print("Initializing WiFi...")
+                from pico.wifi import PicoWifi, WifiConnection
+                self.wifi = PicoWifi()
+                self.connection = WifiConnection(self.wifi)
+            self.connection.start()
         except Exception as e:
             print(f"Failed to initialize network: {str(e)}")
-            self.wifi = None
+        return self.connection
             
-    def get_wifi(self):
-        """获取WiFi实例"""
-        if self.wifi is None:
-            self._init_wifi()
-        return self.wifi
+    def acquire_wifi(self, name):
+        """登记需要网络的模块，射频关闭时重新打开并开始连接
+
+        Returns:
+            WifiConnection连接状态，初始化失败时为None
+        """
+        connection = self.start_wifi()
+        if connection:
+            connection.acquire(name)
+        return connection
+
+    def release_wifi(self, name):
+        """模块不再需要网络，没有模块需要时射频会被关闭"""
+        if self.connection:
+            self.connection.release(name)
+
+    def supervise_wifi(self):
+        """断线重连和射频电源管理，在菜单循环中调用"""
+        if self.connection:
+            self.connection.supervise()
+
+    def get_wifi(self, timeout=15):
+        """获取已连接的WiFi实例，还没连上时等待
+
+        Returns:
+            PicoWifi实例，连接失败或超时返回None
+        """
+        connection = self.start_wifi()
+        if connection and connection.wait(timeout):
+            return self.wifi
+        return None
         
     def get_system_info(self):
         """获取系统信息"""
@@ -48,6 +112,11 @@ class SystemManager:
             mem_alloc = gc.mem_alloc()
             mem_total = mem_free + mem_alloc
             
+            # 开启跟踪时探测最大空闲块，用于判断碎片化程度
+            largest_block = None
+            if self.memtrace and self.memtrace.enabled:
+                largest_block = self.memtrace.probe('system')
+            
             # 磁盘信息
             try:
                 fs_stat = os.statvfs('/')
@@ -69,7 +138,9 @@ class SystemManager:
                     'total': mem_total,
                     'free': mem_free,
                     'used': mem_alloc,
-                    'usage': f"{(mem_alloc/mem_total*100):.1f}%"
+                    'usage': f"{(mem_alloc/mem_total*100):.1f}%",
+                    'largest_block': largest_block,
+                    'fragmentation': f"{((1 - largest_block/mem_free)*100):.1f}%" if largest_block and mem_free else None
                 },
                 'storage': {
                     'total': flash_size,
@@ -90,6 +161,8 @@ class SystemManager:
             print(f"CPU Temp: {info['cpu']['temperature']}")
             print(f"CPU Freq: {info['cpu']['frequency']}")
             print(f"Memory: {info['memory']['free']}/{info['memory']['total']} bytes ({info['memory']['usage']})")
+            if info['memory']['largest_block'] is not None:
+                print(f"Largest Block: {info['memory']['largest_block']} bytes (fragmentation {info['memory']['fragmentation']})")
             print(f"Storage: {info['storage']['free']}/{info['storage']['total']} bytes ({info['storage']['usage']})")
             print(f"Uptime: {info['uptime']}")
             print("=======================\n")
@@ -98,6 +171,8 @@ class SystemManager:
         """清理系统资源"""
         gc.collect()
         self.print_system_info()
+        if self.memtrace:
+            self.memtrace.flush()
         
     def load_module(self, module_name):
         """按需加载模块"""
@@ -170,8 +245,8 @@ class SystemManager:
         # 1. 清理已加载的模块
         print("Cleaning loaded modules...")
         for module_name in list(sys.modules.keys()):
-            # 清理所有apps和pico下的模块，但保留wifi模块
-            if module_name.startswith(('apps.', 'pico.')) and not module_name.endswith('wifi'):
+            # 清理所有apps和pico下的模块，但保留系统、wifi、统计、字体和MQTT模块
+            if module_name.startswith(('apps.', 'pico.')) and not module_name.endswith(('system', 'wifi', 'memtrace', 'profiler', 'fonts', 'mqtt', 'telemetry', 'feeds')):
                 try:
                     module = sys.modules[module_name]
                     # 如果模块有cleanup方法，先调用它
@@ -0,0 +1,156 @@
+import gc
+import os
+import json
+import time
+from array import array
+from pico.mqtt import MqttConnection
+
+try:
+    import microcontroller
+except ImportError:
+    microcontroller = None
+
+# 每个采样的字段，payload中按这个顺序保存，不重复字段名
+FIELDS = ("uptime", "heap_free", "largest_block", "temp", "frames", "frame_avg_us", "frame_max_us", "overruns")
+# payload格式版本，字段变化时增加
+VERSION = 1
+
+
+class Telemetry:
+    """设备指标的MQTT上报（单例）
+
+    每INTERVAL秒采样一次（空闲内存、最大空闲块、CPU温度、帧耗时和超时帧数），
+    游戏的帧中到时间时只采不耗时的值，最大空闲块只在菜单中探测。
+    BATCH个采样打包成一个紧凑的JSON发布到 pico/<设备编号>/telemetry：
+        {"v": 1, "drop": 丢弃的采样数, "s": [[按FIELDS顺序的值], ...]}
+    未连接时payload留在最多QUEUE_SIZE个的队列中，队列满时丢弃最旧的并计入drop。
+    settings.toml中PICO_TELEMETRY_INTERVAL设置采样间隔，为0时关闭；
+    服务器由pico.mqtt.MqttConnection配置。
+    """
+    _instance = None
+    INTERVAL = 60
+    BATCH = 4
+    QUEUE_SIZE = 16
+    # 每次poll()最多发布的payload数，避免补发积压时卡住一帧
+    MAX_PUBLISH = 2
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Telemetry, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, '_initialized'):
+            return
+        self._initialized = True
+        self.mqtt = MqttConnection()
+        self.interval = int(os.getenv('PICO_TELEMETRY_INTERVAL', self.INTERVAL))
+        self.batch_size = int(os.getenv('PICO_TELEMETRY_BATCH', self.BATCH))
+        self.enabled = self.mqtt.enabled and self.interval > 0
+        self.topic = f"pico/{self.mqtt.client_id}/telemetry"
+        # 本次采样周期内的帧统计：次数、总耗时、最大耗时（微秒）、超时次数
+        self._frames = array('L', [0, 0, 0, 0])
+        self._batch = []
+        self._queue = []
+        self.published = 0
+        self.dropped = 0
+        self._next_sample = time.monotonic() + self.interval
+
+    def record_frame(self, elapsed_us, budget_us):
+        """记录一帧的耗时，超过预算计为一次超时"""
+        frames = self._frames
+        frames[0] += 1
+        frames[1] += elapsed_us
+        if elapsed_us > frames[2]:
+            frames[2] = elapsed_us
+        if elapsed_us > budget_us:
+            frames[3] += 1
+
+    def sample(self, detailed=True):
+        """采集一个采样，按FIELDS的顺序返回
+
+        Args:
+            detailed: 为True时（菜单中）先回收再读取空闲内存，开启内存跟踪时探测最大空闲块；
+                      为False时（游戏的帧中）只读取不耗时的值，最大空闲块为None
+        """
+        largest_block = None
+        if detailed:
+            gc.collect()
+            from pico.system import SystemManager
+            memtrace = SystemManager().memtrace
+            if memtrace and memtrace.enabled:
+                largest_block = memtrace.probe('telemetry')
+        heap_free = gc.mem_free()
+        temp = None
+        if microcontroller is not None:
+            try:
+                temp = round(microcontroller.cpu.temperature, 1)
+            except Exception:
+                pass
+        frames = self._frames
+        values = [
+            int(time.monotonic()),
+            heap_free,
+            largest_block,
+            temp,
+            frames[0],
+            frames[1] // frames[0] if frames[0] else 0,
+            frames[2],
+            frames[3]
+        ]
+        for i in range(4):
+            frames[i] = 0
+        return values
+
+    def _enqueue(self):
+        """把当前批次编码后放入发送队列"""
+        payload = json.dumps({"v": VERSION, "drop": self.dropped, "s": self._batch})
+        self._batch = []
+        self._queue.append(payload)
+        if len(self._queue) > self.QUEUE_SIZE:
+            self._queue.pop(0)
+            self.dropped += self.batch_size
+
+    def flush(self, limit=None):
+        """发布队列中的payload，未连接时保留"""
+        count = 0
+        while self._queue and (limit is None or count < limit):
+            if not self.mqtt.publish(self.topic, self._queue[0]):
+                break
+            self._queue.pop(0)
+            self.published += 1
+            count += 1
+
+    def poll(self, connect=True):
+        """在主循环中调用，到时间时采样并发布
+
+        Args:
+            connect: 是否允许在这里（重新）建立连接，游戏的帧中传False
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now >= self._next_sample:
+            self._next_sample += self.interval
+            if self._next_sample <= now:
+                # 落后时不补采样
+                self._next_sample = now + self.interval
+            # 帧中不做回收和内存探测，避免采样本身造成超时帧
+            self._batch.append(self.sample(detailed=connect))
+            if len(self._batch) >= self.batch_size:
+                self._enqueue()
+        if connect:
+            self.mqtt.ensure()
+        if self._queue:
+            self.flush(self.MAX_PUBLISH)
+        elif connect:
+            self.mqtt.maintain()
+
+    def get_stats(self):
+        """获取上报统计"""
+        return {
+            'published': self.published,
+            'queued': len(self._queue),
+            'dropped': self.dropped,
+            'mqtt': self.mqtt.get_stats()
+        }
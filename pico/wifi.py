@@ -2,6 +2,27 @@ import wifi
 import socketpool
 import time
 import os
+import json
+import random
+
+try:
+    import adafruit_connection_manager
+except ImportError:
+    adafruit_connection_manager = None
+
+# 断开连接后等待射频就绪的最长时间（秒）
+STOP_TIMEOUT = 1.0
+# 等待系统后台自动连接的时间（秒），超过后才主动连接
+AUTO_CONNECT_GRACE = 5.0
+# 上次连上的AP的信道和BSSID，重连时跳过扫描
+AP_CACHE_PATH = "/wifi_ap.json"
+# 重连退避（秒），每次失败加倍，最多RECONNECT_MAX，并加入随机抖动
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 60.0
+# 后台重连每次尝试的超时（秒），尝试期间菜单会停顿，使用缓存的信道和BSSID时通常1~2秒连上
+RECONNECT_TIMEOUT = 4
+# 没有模块需要网络多久后关闭射频（秒）
+IDLE_POWER_OFF = 60.0
 
 class PicoWifi:
     def __init__(self):
@@ -10,34 +31,125 @@ class PicoWifi:
         self.password = os.getenv('CIRCUITPY_WIFI_PASSWORD', 'your_password')
         self.wifi = wifi
         self.socketpool = None
+        # 上次连上的AP：(信道, BSSID)，没有时为None
+        self.last_ap = self._load_ap()
+        # 固件不支持的connect()参数，第一次报错后不再传
+        self.unsupported = set()
+        # 用缓存的AP连接失败后，下一次扫描连接
+        self._scan_next = False
         
-    def connect(self):
-        """连接到WIFI"""
+    def _load_ap(self):
+        """读取保存的AP信息，SSID不同时不使用"""
+        try:
+            with open(AP_CACHE_PATH, "r") as f:
+                data = json.load(f)
+            if data.get('ssid') == self.ssid:
+                return data['channel'], bytes.fromhex(data['bssid'])
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def save_ap(self):
+        """连上后记录AP的信道和BSSID，文件系统只读时只保存在内存"""
+        try:
+            ap = self.wifi.radio.ap_info
+            ap = (ap.channel, bytes(ap.bssid))
+        except Exception as e:
+            print(f"Failed to read AP info: {e}")
+            return
+        if ap == self.last_ap:
+            return
+        self.last_ap = ap
+        try:
+            with open(AP_CACHE_PATH, "w") as f:
+                json.dump({'ssid': self.ssid, 'channel': ap[0], 'bssid': ap[1].hex()}, f)
+        except OSError:
+            pass
+
+    def connect(self, timeout=None):
+        """连接到WIFI
+
+        有上次连上的AP信息时指定信道和BSSID，跳过扫描；这样连接失败时下一次扫描连接，
+        AP换了信道或换了设备时扫描连上后更新记录，AP只是暂时断开时记录保留。
+        有的端口（例如Pico W）不支持bssid参数，报NotImplementedError或TypeError时
+        去掉这个参数立即重试，之后不再传。
+
+        Args:
+            timeout: 连接超时（秒），None使用系统默认值
+        """
+        ap = None if self._scan_next else self.last_ap
         try:
             print(f"Connecting to WiFi: {self.ssid}")
-            # 先断开现有连接
+            # 先断开现有连接，轮询射频状态而不是固定等待
             try:
-                self.wifi.radio.stop_station()
-                time.sleep(1)
+                if self.wifi.radio.connected:
+                    self.wifi.radio.stop_station()
+                    deadline = time.monotonic() + STOP_TIMEOUT
+                    while self.wifi.radio.connected and time.monotonic() < deadline:
+                        time.sleep(0.01)
             except:
                 pass
                 
             # 连接WiFi
-            self.wifi.radio.connect(self.ssid, self.password)
+            kwargs = {}
+            if timeout is not None:
+                kwargs['timeout'] = timeout
+            if ap:
+                kwargs['channel'] = ap[0]
+                kwargs['bssid'] = ap[1]
+            for name in self.unsupported:
+                kwargs.pop(name, None)
+            self._connect(kwargs)
             print("Connected to WiFi")
+            self._scan_next = False
             
-            # 初始化socketpool
-            print("Initializing socketpool...")
-            self.socketpool = socketpool.SocketPool(self.wifi.radio)
-            print("Socketpool initialized")
-            
+            self.save_ap()
+            self.ensure_socketpool()
             return True
             
         except Exception as e:
             print(f"Failed to connect to WiFi: {str(e)}")
+            # 缓存的AP和扫描交替尝试
+            self._scan_next = ap is not None
             self.socketpool = None
             return False
     
+    def _connect(self, kwargs):
+        """调用radio.connect()，去掉固件不支持的参数后重试"""
+        while True:
+            try:
+                self.wifi.radio.connect(self.ssid, self.password, **kwargs)
+                return
+            except (NotImplementedError, TypeError) as e:
+                name = 'bssid' if 'bssid' in kwargs else 'channel' if 'channel' in kwargs else None
+                if name is None:
+                    raise
+                print(f"WiFi connect does not support {name}: {e}")
+                self.unsupported.add(name)
+                del kwargs[name]
+
+    def ensure_socketpool(self):
+        """连接后初始化socketpool
+
+        优先使用adafruit_connection_manager缓存的socketpool，
+        所有请求会话共用同一个连接池。
+        """
+        if self.socketpool is None:
+            print("Initializing socketpool...")
+            if adafruit_connection_manager:
+                self.socketpool = adafruit_connection_manager.get_radio_socketpool(self.wifi.radio)
+            else:
+                self.socketpool = socketpool.SocketPool(self.wifi.radio)
+            print("Socketpool initialized")
+        return self.socketpool
+
+    @property
+    def ssl_context(self):
+        """HTTPS使用的SSL上下文，同一射频共用一个"""
+        if adafruit_connection_manager is None:
+            return None
+        return adafruit_connection_manager.get_radio_ssl_context(self.wifi.radio)
+        
     def get_wifi_info(self):
         """获取WIFI连接信息"""
         if self.wifi.radio.connected:
@@ -47,3 +159,224 @@ class PicoWifi:
     def is_connected(self):
         """检查WIFI连接状态"""
         return self.wifi.radio.connected
+
+    def power_down(self):
+        """关闭射频省电，socket全部失效"""
+        if adafruit_connection_manager and self.socketpool is not None:
+            adafruit_connection_manager.connection_manager_close_all(self.socketpool, release_references=True)
+        self.socketpool = None
+        try:
+            self.wifi.radio.enabled = False
+        except Exception as e:
+            print(f"Failed to power down radio: {e}")
+
+    def power_up(self):
+        """打开射频，之后需要主动连接"""
+        try:
+            self.wifi.radio.enabled = True
+        except Exception as e:
+            print(f"Failed to power up radio: {e}")
+
+
+class WifiConnection:
+    """WiFi连接状态和重连管理
+
+    settings.toml配置了CIRCUITPY_WIFI_SSID时，CircuitPython上电后会在后台自动连接。
+    start()不阻塞，只开始计时；应用用poll()或connected轮询，需要网络时用wait()等待，
+    超过AUTO_CONNECT_GRACE仍未连上才主动调用阻塞的PicoWifi.connect()。
+
+    需要网络的模块用acquire()/release()登记。supervise()在允许停顿的地方（菜单）调用：
+    有模块需要网络时，断开后按指数退避加随机抖动主动重连；
+    没有模块需要网络超过IDLE_POWER_OFF秒时关闭射频，再有模块acquire()时重新打开。
+    """
+    IDLE = 'idle'
+    CONNECTING = 'connecting'
+    CONNECTED = 'connected'
+    FAILED = 'failed'
+    OFF = 'off'
+
+    def __init__(self, wifi):
+        self.wifi = wifi
+        self.state = self.IDLE
+        # 从start()到连上用的时间（秒）
+        self.connect_time = None
+        # 上次断开到重新连上用的时间（秒）
+        self.reconnect_time = None
+        self.reconnects = 0
+        self.attempts = 0
+        # 射频关闭的累计时间（秒）
+        self.off_time = 0
+        self._started = 0
+        self._lost_at = None
+        self._off_since = None
+        # 需要网络的模块
+        self._holders = []
+        self._idle_since = time.monotonic()
+        self._backoff = RECONNECT_MIN
+        self._next_attempt = 0
+        # 上电后系统会自动连接，射频重新打开后不会
+        self._auto = True
+
+    def start(self):
+        """开始连接，不阻塞"""
+        if self.state in (self.CONNECTING, self.CONNECTED):
+            return
+        if self.state == self.OFF:
+            self._power_up()
+        self.state = self.CONNECTING
+        self._started = time.monotonic()
+        self._next_attempt = self._started + (AUTO_CONNECT_GRACE if self._auto else 0)
+        self.poll()
+
+    def poll(self):
+        """检查射频状态并更新连接状态"""
+        if self.state == self.OFF:
+            return self.state
+        try:
+            connected = self.wifi.is_connected()
+        except Exception as e:
+            print(f"Failed to read WiFi state: {e}")
+            connected = False
+        if self.state == self.CONNECTING and connected:
+            self._set_connected()
+        elif self.state == self.CONNECTED and not connected:
+            # 连接断开，先给系统一点时间自己恢复，之后由supervise()主动重连
+            print("WiFi connection lost")
+            self.state = self.CONNECTING
+            self._started = time.monotonic()
+            self._lost_at = self._started
+            self._backoff = RECONNECT_MIN
+            self._next_attempt = self._started + self._jitter(RECONNECT_MIN)
+        return self.state
+
+    def _set_connected(self):
+        """连上后初始化socketpool，记录AP（包括系统后台自动连上的）"""
+        self.wifi.save_ap()
+        try:
+            self.wifi.ensure_socketpool()
+        except Exception as e:
+            print(f"Failed to initialize socketpool: {e}")
+            self.state = self.FAILED
+            return
+        self.state = self.CONNECTED
+        self._backoff = RECONNECT_MIN
+        now = time.monotonic()
+        if self._lost_at is not None:
+            self.reconnect_time = now - self._lost_at
+            self.reconnects += 1
+            self._lost_at = None
+            print(f"WiFi reconnected after {self.reconnect_time:.1f}s")
+        else:
+            self.connect_time = now - self._started
+            print(f"WiFi connected after {self.connect_time:.1f}s")
+
+    @staticmethod
+    def _jitter(delay):
+        """在0.5~1.5倍之间随机，避免多台设备同时重连"""
+        return delay * (0.5 + random.random())
+
+    def _attempt(self, timeout):
+        """主动连接一次，失败后按退避时间安排下一次
+
+        Returns:
+            是否连上
+        """
+        self.attempts += 1
+        if self.wifi.connect(timeout=timeout):
+            self._set_connected()
+            return self.state == self.CONNECTED
+        delay = self._jitter(self._backoff)
+        self._backoff = min(self._backoff * 2, RECONNECT_MAX)
+        self._next_attempt = time.monotonic() + delay
+        print(f"WiFi retry in {delay:.1f}s")
+        return False
+
+    def wait(self, timeout=15):
+        """等待连接完成
+
+        Returns:
+            是否已连接
+        """
+        if self.state in (self.IDLE, self.FAILED, self.OFF):
+            self.state = self.IDLE
+            self.start()
+        deadline = time.monotonic() + timeout
+        while self.poll() == self.CONNECTING:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= self._next_attempt:
+                # 后台没有连上，主动连接；失败时保持连接中，之后按退避重试
+                self._attempt(max(1, deadline - now))
+                break
+            time.sleep(0.05)
+        return self.state == self.CONNECTED
+
+    @property
+    def connected(self):
+        """是否已连接"""
+        return self.poll() == self.CONNECTED
+
+    @property
+    def attempt_due(self):
+        """是否该主动连接了：不再等待系统自动连接，退避时间也已过去"""
+        return self.state == self.CONNECTING and time.monotonic() >= self._next_attempt
+
+    def acquire(self, name):
+        """登记需要网络的模块，射频关闭时重新打开并开始连接"""
+        if name not in self._holders:
+            self._holders.append(name)
+        self.start()
+
+    def release(self, name):
+        """模块不再需要网络"""
+        if name in self._holders:
+            self._holders.remove(name)
+        if not self._holders:
+            self._idle_since = time.monotonic()
+
+    def supervise(self):
+        """后台重连和射频电源管理，会阻塞一次连接尝试，只在允许停顿的地方调用"""
+        if self.state == self.OFF:
+            if self._holders:
+                self.start()
+            return self.state
+        state = self.poll()
+        now = time.monotonic()
+        if not self._holders:
+            # 没有模块需要网络时不重连，空闲一段时间后关闭射频
+            if now - self._idle_since >= IDLE_POWER_OFF:
+                self._power_down()
+            return self.state
+        if state == self.CONNECTING and now >= self._next_attempt:
+            self._attempt(RECONNECT_TIMEOUT)
+        return self.state
+
+    def _power_down(self):
+        print("No app needs WiFi, powering radio down")
+        self.wifi.power_down()
+        self.state = self.OFF
+        self._lost_at = None
+        self._off_since = time.monotonic()
+
+    def _power_up(self):
+        print("Powering radio up")
+        self.wifi.power_up()
+        self.off_time += time.monotonic() - self._off_since
+        self._off_since = None
+        self._auto = False
+        self.state = self.IDLE
+
+    def get_stats(self):
+        """获取连接统计，用于比较重连时间和射频关闭的时间"""
+        off_time = self.off_time
+        if self._off_since is not None:
+            off_time += time.monotonic() - self._off_since
+        return {
+            'state': self.state,
+            'connect_time': self.connect_time,
+            'reconnect_time': self.reconnect_time,
+            'reconnects': self.reconnects,
+            'attempts': self.attempts,
+            'off_time': off_time
+        }
@@ -0,0 +1,69 @@
+"""
+在电脑上模拟显示总线测速（在电脑上运行）
+
+usage:
+    python tools/bus_sim.py [最高可用波特率MHz] [渲染耗时ns/像素]
+
+用传输时间模型代替真实屏幕运行 pico.busbench.BusBenchmark：
+每次刷新 = 固定开销 + 渲染耗时 * 像素数 + (窗口命令 + 像素数据) * 8 / 实际波特率。
+实际波特率按RP2040的分频规则计算；高于“最高可用波特率”时模拟初始化失败，
+用于检查回退逻辑。模型参数是估计值，设备上的数字用 PicoDisplay.benchmark_bus() 测量。
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pico.busbench import BusBenchmark, BAUDRATES, actual_baudrate
+
+WIDTH = 240
+HEIGHT = 135
+PARTIAL = (32, 32)
+# 每个刷新窗口的命令字节：CASET(1+4) RASET(1+4) RAMWR(1)
+WINDOW_BYTES = 11
+BYTES_PER_PIXEL = 2
+# 每次刷新的固定软件开销
+FIXED_NS = 200_000
+
+
+class SimBus:
+    """按传输时间模型推进的模拟总线和时钟"""
+    def __init__(self, max_baudrate, render_ns):
+        self.max_baudrate = max_baudrate
+        self.render_ns = render_ns
+        self.baudrate = None
+        self.now = 0
+
+    def clock(self):
+        return self.now
+
+    def setup(self, baudrate):
+        if baudrate > self.max_baudrate:
+            raise RuntimeError("display did not respond")
+        self.baudrate = actual_baudrate(baudrate)
+        return self.baudrate
+
+    def _refresh(self, pixels):
+        data = WINDOW_BYTES + pixels * BYTES_PER_PIXEL
+        self.now += FIXED_NS + self.render_ns * pixels + data * 8 * 1_000_000_000 // self.baudrate
+
+    def full(self):
+        self._refresh(WIDTH * HEIGHT)
+
+    def partial(self):
+        self._refresh(PARTIAL[0] * PARTIAL[1])
+
+
+def main(argv):
+    max_mhz = float(argv[1]) if len(argv) > 1 else 62.5
+    render_ns = int(argv[2]) if len(argv) > 2 else 50
+    bus = SimBus(max_mhz * 1_000_000, render_ns)
+    bench = BusBenchmark(bus.setup, bus.full, bus.partial, clock=bus.clock)
+    results = bench.run(BAUDRATES + (40_000_000, 24_000_000))
+    BusBenchmark.print_results(results)
+    print(f"Best baudrate: {BusBenchmark.best(results)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
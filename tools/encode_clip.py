@@ -0,0 +1,171 @@
+"""
+把BMP帧序列编码成压缩动画（在电脑上运行）
+
+usage:
+    python tools/encode_clip.py apps/cxk/resources/cxk.clip apps/cxk/resources/cxk_*.bmp
+    python tools/encode_clip.py --duration 80 out.clip frame_*.bmp
+
+格式（小端）：
+    文件头  4s B B H H H H H  magic b"PCLP", 版本, 标志(bit0: 循环),
+                               宽, 高, 调色板颜色数, 帧数, 最大帧数据长度
+    调色板  每个颜色3字节 RGB
+    帧      H H  显示时长(毫秒), 数据长度；随后是若干段：
+            B B B  行y, 起点x, 长度n(低7位) | 填充标志(bit7)
+            填充段后跟1字节颜色索引，否则跟n字节颜色索引
+最后额外存一帧“循环帧”，是从最后一帧回到第一帧的差分。
+第一帧以全0画布为基准，其余帧只记录相对上一帧改变的像素。
+"""
+import glob
+import struct
+import sys
+
+from pack_sprites import read_bmp
+
+MAGIC = b"PCLP"
+VERSION = 1
+FLAG_LOOP = 0x01
+FILL = 0x80
+MAX_SEGMENT = 0x7F
+
+
+def bmp_colors(path):
+    """读取BMP，返回 (宽, 高, RGB888颜色列表)"""
+    width, height, bpp, compression, extra, rows = read_bmp(path)
+    pixels = []
+    for row in rows:
+        for x in range(width):
+            if bpp == 16:
+                value, = struct.unpack_from("<H", row, x * 2)
+                if compression == 3 and extra[:4] == b"\x00\xf8\x00\x00":
+                    r, g, b = (value >> 11) & 0x1F, (value >> 5) & 0x3F, value & 0x1F
+                    r, g, b = r << 3 | r >> 2, g << 2 | g >> 4, b << 3 | b >> 2
+                else:
+                    r, g, b = (value >> 10) & 0x1F, (value >> 5) & 0x1F, value & 0x1F
+                    r, g, b = r << 3 | r >> 2, g << 3 | g >> 2, b << 3 | b >> 2
+            elif bpp in (24, 32):
+                step = bpp // 8
+                b, g, r = row[x * step:x * step + 3]
+            elif bpp == 8:
+                b, g, r = extra[row[x] * 4:row[x] * 4 + 3]
+            else:
+                raise ValueError(f"{path}: {bpp}-bit BMP is not supported")
+            pixels.append((r << 16) | (g << 8) | b)
+    return width, height, pixels
+
+
+def build_palette(frames, size=256):
+    """取出现次数最多的颜色作为调色板，其余颜色映射到最接近的颜色"""
+    counts = {}
+    for pixels in frames:
+        for color in pixels:
+            counts[color] = counts.get(color, 0) + 1
+    palette = sorted(counts, key=lambda c: counts[c], reverse=True)[:size]
+    index = {color: i for i, color in enumerate(palette)}
+
+    def nearest(color):
+        r, g, b = color >> 16, (color >> 8) & 0xFF, color & 0xFF
+        return min(range(len(palette)), key=lambda i: (
+            ((palette[i] >> 16) - r) ** 2 +
+            (((palette[i] >> 8) & 0xFF) - g) ** 2 +
+            ((palette[i] & 0xFF) - b) ** 2))
+
+    for color in counts:
+        if color not in index:
+            index[color] = nearest(color)
+    return palette, index
+
+
+def encode_frame(width, height, previous, current):
+    """编码一帧相对上一帧的变化"""
+    out = bytearray()
+    for y in range(height):
+        x = 0
+        while x < width:
+            i = y * width + x
+            if previous[i] == current[i]:
+                x += 1
+                continue
+            # 找出连续变化的像素
+            end = x
+            while end < width and end - x < MAX_SEGMENT and previous[y * width + end] != current[y * width + end]:
+                end += 1
+            run = current[i:y * width + end]
+            # 相同颜色的连续像素用填充段，其余用原样段
+            start = 0
+            while start < len(run):
+                same = start
+                while same < len(run) and run[same] == run[start]:
+                    same += 1
+                if same - start >= 3:
+                    out += bytes((y, x + start, (same - start) | FILL, run[start]))
+                    start = same
+                    continue
+                literal = start
+                while literal < len(run):
+                    same = literal
+                    while same < len(run) and run[same] == run[literal]:
+                        same += 1
+                    if same - literal >= 3:
+                        break
+                    literal = same
+                out += bytes((y, x + start, literal - start)) + bytes(run[start:literal])
+                start = literal
+            x = end
+    return bytes(out)
+
+
+def encode(output, inputs, duration_ms=50, loop=True):
+    """编码所有帧并写入文件"""
+    decoded = [bmp_colors(path) for path in inputs]
+    width, height, _ = decoded[0]
+    if width > 256 or height > 256:
+        raise ValueError("Clips are limited to 256x256 pixels")
+    for path, (w, h, _) in zip(inputs, decoded):
+        if (w, h) != (width, height):
+            raise ValueError(f"{path}: all frames must have the same size")
+    palette, index = build_palette([pixels for _, _, pixels in decoded])
+    frames = [[index[color] for color in pixels] for _, _, pixels in decoded]
+
+    payloads = []
+    previous = [0] * (width * height)
+    for current in frames:
+        payloads.append(encode_frame(width, height, previous, current))
+        previous = current
+    # 循环帧：从最后一帧回到第一帧
+    payloads.append(encode_frame(width, height, frames[-1], frames[0]))
+
+    with open(output, "wb") as f:
+        f.write(struct.pack("<4sBBHHHHH", MAGIC, VERSION, FLAG_LOOP if loop else 0,
+                            width, height, len(palette), len(frames),
+                            max(len(p) for p in payloads)))
+        for color in palette:
+            f.write(bytes((color >> 16, (color >> 8) & 0xFF, color & 0xFF)))
+        for payload in payloads:
+            f.write(struct.pack("<HH", duration_ms, len(payload)))
+            f.write(payload)
+
+    raw = sum(width * height * 2 for _ in frames)
+    size = 16 + len(palette) * 3 + sum(4 + len(p) for p in payloads)
+    print(f"Encoded {len(frames)} frames ({width}x{height}, {len(palette)} colors) into {output}")
+    print(f"Size: {size} bytes (raw 16-bit frames: {raw} bytes)")
+    print("Changed bytes per frame: " + ", ".join(str(len(p)) for p in payloads))
+
+
+def main(argv):
+    args = argv[1:]
+    duration = 50
+    if len(args) >= 2 and args[0] == "--duration":
+        duration = int(args[1])
+        args = args[2:]
+    if len(args) < 2:
+        print(__doc__)
+        return 1
+    inputs = []
+    for pattern in args[1:]:
+        inputs.extend(sorted(glob.glob(pattern)) or [pattern])
+    encode(args[0], inputs, duration)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
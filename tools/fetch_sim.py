@@ -0,0 +1,111 @@
+"""
+在电脑上模拟Exchange应用更新汇率时的按键响应（在电脑上运行）
+
+usage:
+    python tools/fetch_sim.py [服务器延迟s]
+
+在本机启动 tools/stub_server.py 并设置 --delay，让响应又慢又分块，然后模拟应用主循环：
+- 阻塞请求：请求期间主循环停住，按键最长要等整个请求结束才被处理
+- 非阻塞请求：主循环每轮检查按键、调用一次 JsonFetch.poll()，再等待FETCH_INTERVAL
+另外检查请求中按B取消，以及时间预算用完后超时。
+电脑上用socket模块代替设备的socketpool，接口相同。
+"""
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import stub_server
+from pico.fetch import JsonFetch
+
+PATHS = [("rates", code) for code in ("CNY", "EUR", "JPY", "GBP")] + [("time_last_update_unix",)]
+# 和apps/exchange/app.py中的值相同
+FETCH_INTERVAL = 0.02
+FETCH_TIMEOUT = 15
+# 目标按键响应时间（秒）
+TARGET_LATENCY = 0.05
+
+
+def start_server(delay):
+    """后台启动测试服务器，返回地址"""
+    stub_server.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_server.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v6/latest/USD"
+
+
+def blocking(url):
+    """阻塞请求：按键在整个请求期间得不到处理"""
+    start = time.monotonic()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return time.monotonic() - start
+
+
+def run_loop(fetch, cancel_at=None):
+    """模拟应用主循环，返回 (每轮间隔列表, 取消后到结束的时间)"""
+    gaps = []
+    last = time.monotonic()
+    cancel_latency = None
+    while True:
+        now = time.monotonic()
+        gaps.append(now - last)
+        last = now
+        # 检查按键
+        if cancel_at is not None and now - fetch.started >= cancel_at and fetch.active:
+            pressed = now
+            fetch.cancel()
+            cancel_latency = time.monotonic() - pressed
+        fetch.poll()
+        if not fetch.active:
+            break
+        time.sleep(FETCH_INTERVAL)
+    return gaps, cancel_latency
+
+
+def main(argv):
+    delay = float(argv[1]) if len(argv) > 1 else 1.0
+    server, url = start_server(delay)
+    ok = True
+    print(f"Server delay {delay}s before headers, body trickled over another {delay}s\n")
+
+    elapsed = blocking(url)
+    print(f"blocking      : request {elapsed:.2f}s, worst input latency {elapsed * 1000:.0f}ms")
+
+    fetch = JsonFetch(socket, url, PATHS, timeout=FETCH_TIMEOUT)
+    gaps, _ = run_loop(fetch)
+    worst = max(gaps)
+    print(f"non-blocking  : request {fetch.elapsed:.2f}s, {len(gaps)} loop passes, "
+          f"worst input latency {worst * 1000:.1f}ms")
+    if fetch.state != JsonFetch.DONE or len(fetch.values) != len(PATHS):
+        print(f"FAIL fetch ended {fetch.state}: {fetch.values} {fetch.error}")
+        ok = False
+    if worst > TARGET_LATENCY:
+        print(f"FAIL input latency above {TARGET_LATENCY * 1000:.0f}ms")
+        ok = False
+
+    fetch = JsonFetch(socket, url, PATHS, timeout=FETCH_TIMEOUT)
+    _, latency = run_loop(fetch, cancel_at=delay / 2)
+    print(f"cancel        : {fetch.state} {latency * 1000:.2f}ms after B")
+    if fetch.state != JsonFetch.CANCELLED:
+        ok = False
+
+    fetch = JsonFetch(socket, url, PATHS, timeout=delay / 2)
+    run_loop(fetch)
+    print(f"timeout       : {fetch.state} ({fetch.error}) after {fetch.elapsed:.2f}s, budget {delay / 2}s")
+    if fetch.state != JsonFetch.FAILED:
+        ok = False
+
+    server.shutdown()
+    print("All checks passed" if ok else "Some checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,95 @@
+"""
+在电脑上模拟动画循环，对比固定延时和按截止时间调度的帧率
+
+usage:
+    python tools/frame_sim.py [fps] [平均处理时间ms] [帧数]
+
+每帧的处理时间按给定平均值随机波动，偶尔出现一次较长的停顿（模拟GC或刷新），
+分别统计旧循环（处理后固定sleep一个帧间隔）和 FrameGovernor 的实际帧率、
+累计漂移和跳帧数。
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pico.governor import FrameGovernor
+
+
+class SimClock:
+    """模拟时钟"""
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+def work_times(count, mean_ms, seed=1):
+    """生成每帧的处理时间（秒）"""
+    rng = random.Random(seed)
+    times = []
+    for _ in range(count):
+        t = rng.uniform(0.5, 1.5) * mean_ms
+        if rng.random() < 0.05:
+            t += mean_ms * 4
+        times.append(t / 1000)
+    return times
+
+
+def simulate_fixed_sleep(period, works):
+    """旧循环：处理完一帧后固定延时一个帧间隔"""
+    clock = SimClock()
+    for work in works:
+        clock.sleep(work)
+        clock.sleep(period)
+    elapsed = clock.now
+    return {
+        'fps': len(works) / elapsed,
+        'drift': elapsed - len(works) * period,
+        'dropped': 0
+    }
+
+
+def simulate_governor(period, works):
+    """新循环：按截止时间调度，落后时跳帧"""
+    clock = SimClock()
+    governor = FrameGovernor(clock=clock.monotonic, sleep=clock.sleep)
+    governor.start()
+    shown = 0
+    target = len(works)
+    i = 0
+    while shown + governor.dropped < target:
+        clock.sleep(works[i % len(works)])
+        i += 1
+        shown += 1
+        governor.schedule(period)
+        governor.wait()
+    elapsed = clock.now
+    return {
+        'fps': shown / elapsed,
+        'drift': elapsed - target * period,
+        'dropped': governor.dropped
+    }
+
+
+def main(argv):
+    fps = float(argv[1]) if len(argv) > 1 else 20
+    mean_ms = float(argv[2]) if len(argv) > 2 else 15
+    count = int(argv[3]) if len(argv) > 3 else 1000
+    period = 1.0 / fps
+    works = work_times(count, mean_ms)
+    print(f"Target {fps:.1f} FPS, mean work {mean_ms:.1f}ms, {count} frames")
+    for name, result in (("fixed sleep", simulate_fixed_sleep(period, works)),
+                         ("governor", simulate_governor(period, works))):
+        print(f"{name:>12}: {result['fps']:6.2f} FPS, drift {result['drift']:+7.2f}s, "
+              f"dropped {result['dropped']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,106 @@
+"""
+在电脑上检查流式JSON提取器（在电脑上运行）
+
+usage:
+    python tools/json_extract.py [payload.json ...]
+
+对每个响应样本（默认 tools/payloads/*.json）：
+- 按不同的分块大小喂给 pico.jsonstream.JsonPathExtractor，结果必须和json.loads一致
+- 用tracemalloc比较json.loads整体解析和流式提取的峰值内存
+另外运行几段边界情况（转义、嵌套数组、同名键、空容器、被分块切开的值）。
+"""
+import glob
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pico.jsonstream import JsonPathExtractor
+
+CHUNK_SIZES = (1, 7, 64, 256, 4096)
+
+CASES = [
+    (b'{"a": {"b": [1, {"c": "x\\"y"}]}, "c": 2}', [("a", "b", 1, "c"), ("c",)]),
+    (b'{"rates": {}, "x": {"rates": {"CNY": 1}}, "rates2": 3}', [("x", "rates", "CNY"), ("rates2",)]),
+    (b'[[], [true, false, null], {"k": [1.5e3]}]', [(1, 2), (2, "k", 0)]),
+    (b'[[], [true, false, null], {"k": [1.5e3]}]', [(2, "k"), (0,)]),
+    (b'{"s": "a,b}c]", "n": -0.25 }', [("s",), ("n",)]),
+    (b'{"esc\\"key": 5, "u": "\\u4e2d"}', [("u",)]),
+]
+
+
+def lookup(data, path):
+    """用完整解析的结果查找路径"""
+    for part in path:
+        data = data[part]
+    return data
+
+
+def extract(payload, paths, chunk_size):
+    """分块喂入，返回 (结果, 读取的字节数)"""
+    extractor = JsonPathExtractor(paths)
+    for start in range(0, len(payload), chunk_size):
+        if extractor.feed(payload[start:start + chunk_size]):
+            break
+    return extractor.results, extractor.bytes_read
+
+
+def check(name, payload, paths):
+    """检查所有分块大小的结果"""
+    expected = json.loads(payload)
+    for size in CHUNK_SIZES:
+        results, _ = extract(payload, paths, size)
+        for path in paths:
+            if results.get(path) != lookup(expected, path):
+                print(f"FAIL {name} chunk={size} {path}: {results.get(path)!r}")
+                return False
+    return True
+
+
+def peak(func):
+    """函数执行期间的峰值内存（字节）"""
+    tracemalloc.start()
+    func()
+    _, high = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return high
+
+
+def main(argv):
+    files = argv[1:] or sorted(glob.glob(os.path.join(os.path.dirname(__file__), "payloads", "*.json")))
+    ok = True
+    for index, (payload, paths) in enumerate(CASES):
+        ok = check(f"case {index}", payload, paths) and ok
+
+    for path in files:
+        with open(path, "rb") as f:
+            payload = f.read()
+        paths = [("rates", "CNY"), ("time_last_update_unix",)]
+        ok = check(os.path.basename(path), payload, paths) and ok
+
+        def full():
+            data = json.loads(payload)
+            return [lookup(data, p) for p in paths]
+
+        def chunks(size=256):
+            extractor = JsonPathExtractor(paths)
+            for start in range(0, len(payload), size):
+                if extractor.feed(payload[start:start + size]):
+                    break
+            return extractor.results
+
+        _, read = extract(payload, paths, 256)
+        full_peak = peak(full)
+        stream_peak = peak(chunks)
+        print(f"{os.path.basename(path)}: {len(payload)} bytes, stopped after {read} bytes")
+        print(f"  json.loads peak {full_peak} bytes, streaming peak {stream_peak} bytes "
+              f"({full_peak / max(stream_peak, 1):.1f}x less)")
+
+    print("All checks passed" if ok else "Some checks failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,90 @@
+"""
+把设备输出的内存跟踪记录整理成报告（在电脑上运行）
+
+usage:
+    python tools/memreport.py serial.log
+    python tools/memreport.py memtrace.log
+
+输入可以是串口日志（混有其他输出也可以）或flash上的 /memtrace.log，
+只解析以 MTR, 和 MT, 开头的行。
+"""
+import sys
+
+EVENT_SAMPLE = 0
+EVENT_REGION = 1
+EVENT_PROBE = 2
+
+
+def parse(lines):
+    """解析跟踪记录，返回 (区域表, 记录列表)"""
+    regions = {}
+    records = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("MTR,"):
+            _, index, name = line.split(",", 2)
+            regions[int(index)] = name
+        elif line.startswith("MT,"):
+            parts = line.split(",")
+            if len(parts) != 6:
+                continue
+            t, kind, region, free, value = (int(p) for p in parts[1:])
+            records.append((t, kind, region, free, value))
+    return regions, records
+
+
+def build_report(regions, records):
+    """计算各区域分配统计和碎片化情况"""
+    region_stats = {}
+    free_values = []
+    probes = []
+    for t, kind, region, free, value in records:
+        name = regions.get(region, f"#{region}")
+        free_values.append(free)
+        if kind == EVENT_REGION:
+            stats = region_stats.setdefault(name, {'count': 0, 'total': 0, 'max': 0})
+            stats['count'] += 1
+            stats['total'] += value
+            stats['max'] = max(stats['max'], value)
+        elif kind == EVENT_PROBE:
+            probes.append((t, free, value))
+    return {
+        'records': len(records),
+        'regions': region_stats,
+        'free_min': min(free_values) if free_values else 0,
+        'free_max': max(free_values) if free_values else 0,
+        'probes': probes,
+    }
+
+
+def format_report(report):
+    """把报告格式化为文本"""
+    lines = [f"Records: {report['records']}",
+             f"Free heap: min {report['free_min']} / max {report['free_max']} bytes",
+             "",
+             f"{'region':<24}{'count':>8}{'total':>10}{'avg':>8}{'max':>8}"]
+    regions = sorted(report['regions'].items(), key=lambda item: item[1]['total'], reverse=True)
+    for name, stats in regions:
+        avg = stats['total'] // stats['count'] if stats['count'] else 0
+        lines.append(f"{name:<24}{stats['count']:>8}{stats['total']:>10}{avg:>8}{stats['max']:>8}")
+    if report['probes']:
+        lines.append("")
+        lines.append(f"{'time(ms)':>10}{'free':>10}{'largest':>10}{'frag':>8}")
+        for t, free, largest in report['probes']:
+            frag = (1 - largest / free) * 100 if free else 0
+            lines.append(f"{t:>10}{free:>10}{largest:>10}{frag:>7.1f}%")
+    return "\n".join(lines)
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+    with open(argv[1], "r", errors="replace") as f:
+        regions, records = parse(f)
+    print(format_report(build_report(regions, records)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
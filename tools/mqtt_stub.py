@@ -0,0 +1,269 @@
+"""
+本地MQTT测试服务器（在电脑上运行），代替mosquitto测试设备的MQTT上报
+
+usage:
+    python tools/mqtt_stub.py [端口] [--flaky 条数] [--rates 秒数]
+
+实现MQTT 3.1.1中设备用到的部分：CONNECT、PUBLISH（QoS 0/1）、SUBSCRIBE、
+UNSUBSCRIBE、PINGREQ、DISCONNECT，按主题（支持+和#通配符）转发给订阅者，
+保留消息（retain）在订阅时补发。
+pico/<设备编号>/telemetry 的payload按 pico.telemetry.FIELDS 展开打印，
+其他主题打印原始内容。--flaky 条数 让服务器每收到这么多条消息就断开连接，
+用于检查设备的重连退避和离线队列（payload中的drop字段）。
+--rates 秒数 每隔这么久随机改变一两种汇率，按Exchange应用的FEEDS推送
+rates/USD/<货币>，然后推送 rates/USD/updated，代替应用的定时HTTP请求。
+在settings.toml中设置 PICO_MQTT_BROKER="<电脑IP>"、PICO_MQTT_PORT=<端口>。
+"""
+import json
+import os
+import random
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from pico.telemetry import FIELDS
+from stub_server import RATES
+
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+# 每收到多少条消息断开一次连接，0表示不断开
+flaky = 0
+# 订阅：主题过滤器 -> 连接集合
+subscriptions = {}
+# 保留消息：主题 -> 内容
+retained = {}
+lock = threading.Lock()
+stats = {"connections": 0, "messages": 0, "bytes": 0}
+
+
+def matches(pattern, topic):
+    """MQTT主题过滤器匹配"""
+    parts = pattern.split("/")
+    levels = topic.split("/")
+    for i, part in enumerate(parts):
+        if part == "#":
+            return True
+        if i >= len(levels) or (part != "+" and part != levels[i]):
+            return False
+    return len(parts) == len(levels)
+
+
+def encode_length(length):
+    """剩余长度的变长编码"""
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(out)
+
+
+def packet(kind, flags, body):
+    return bytes([kind << 4 | flags]) + encode_length(len(body)) + body
+
+
+def utf8(data, offset):
+    """读取长度前缀的字符串，返回 (字符串, 新位置)"""
+    size = struct.unpack_from("!H", data, offset)[0]
+    return data[offset + 2:offset + 2 + size].decode(), offset + 2 + size
+
+
+def show(topic, payload):
+    """打印收到的消息"""
+    stamp = time.strftime("%H:%M:%S")
+    if topic.endswith("/telemetry"):
+        try:
+            data = json.loads(payload)
+            print(f"{stamp} {topic} v{data['v']} dropped {data['drop']}")
+            for values in data["s"]:
+                print("    " + ", ".join(f"{name}={value}" for name, value in zip(FIELDS, values)))
+            return
+        except (ValueError, KeyError, TypeError):
+            pass
+    print(f"{stamp} {topic} {payload[:120]!r}")
+
+
+class Handler(socketserver.BaseRequestHandler):
+    def read_packet(self):
+        """读取一个包，返回 (类型, 标志, 内容)，连接关闭时返回None"""
+        header = self.request.recv(1)
+        if not header:
+            return None
+        length = 0
+        shift = 0
+        while True:
+            byte = self.request.recv(1)
+            if not byte:
+                return None
+            length |= (byte[0] & 0x7F) << shift
+            shift += 7
+            if not byte[0] & 0x80:
+                break
+        body = b""
+        while len(body) < length:
+            chunk = self.request.recv(length - len(body))
+            if not chunk:
+                return None
+            body += chunk
+        return header[0] >> 4, header[0] & 0x0F, body
+
+    def send(self, data):
+        with self.send_lock:
+            self.request.sendall(data)
+
+    def handle(self):
+        stats["connections"] += 1
+        self.send_lock = threading.Lock()
+        self.client_id = "?"
+        received = 0
+        try:
+            while True:
+                item = self.read_packet()
+                if item is None:
+                    break
+                kind, flags, body = item
+                if kind == CONNECT:
+                    _, offset = utf8(body, 0)
+                    self.client_id, _ = utf8(body, offset + 4)
+                    print(f"{self.client_id} connected from {self.client_address[0]}")
+                    self.send(packet(CONNACK, 0, b"\x00\x00"))
+                elif kind == PUBLISH:
+                    topic, offset = utf8(body, 0)
+                    qos = (flags >> 1) & 3
+                    if qos:
+                        self.send(packet(PUBACK, 0, body[offset:offset + 2]))
+                        offset += 2
+                    payload = body[offset:]
+                    stats["messages"] += 1
+                    stats["bytes"] += len(body)
+                    show(topic, payload)
+                    publish(topic, payload, flags & 1)
+                    received += 1
+                    if flaky and received % flaky == 0:
+                        print(f"Dropping {self.client_id} after {received} messages")
+                        break
+                elif kind == SUBSCRIBE:
+                    packet_id = body[:2]
+                    offset = 2
+                    granted = bytearray()
+                    patterns = []
+                    while offset < len(body):
+                        pattern, offset = utf8(body, offset)
+                        offset += 1
+                        with lock:
+                            subscriptions.setdefault(pattern, set()).add(self)
+                        patterns.append(pattern)
+                        granted.append(0)
+                        print(f"{self.client_id} subscribed to {pattern}")
+                    self.send(packet(SUBACK, 0, packet_id + bytes(granted)))
+                    with lock:
+                        messages = [(t, p) for t, p in retained.items() if any(matches(f, t) for f in patterns)]
+                    for topic, payload in messages:
+                        self.send(message(topic, payload))
+                elif kind == UNSUBSCRIBE:
+                    offset = 2
+                    while offset < len(body):
+                        pattern, offset = utf8(body, offset)
+                        with lock:
+                            subscriptions.get(pattern, set()).discard(self)
+                    self.send(packet(UNSUBACK, 0, body[:2]))
+                elif kind == PINGREQ:
+                    self.send(packet(PINGRESP, 0, b""))
+                elif kind == DISCONNECT:
+                    break
+        except OSError as e:
+            print(f"{self.client_id} connection error: {e}")
+        finally:
+            with lock:
+                for handlers in subscriptions.values():
+                    handlers.discard(self)
+            print(f"{self.client_id} disconnected")
+
+def message(topic, payload):
+    """QoS 0的PUBLISH包"""
+    data = topic.encode()
+    return packet(PUBLISH, 0, struct.pack("!H", len(data)) + data + payload)
+
+
+def publish(topic, payload, retain=False):
+    """转发给订阅了该主题的连接"""
+    with lock:
+        if retain:
+            if payload:
+                retained[topic] = payload
+            else:
+                retained.pop(topic, None)
+        targets = [h for pattern, handlers in subscriptions.items() if matches(pattern, topic) for h in handlers]
+    data = message(topic, payload)
+    for handler in set(targets):
+        try:
+            handler.send(data)
+        except OSError:
+            pass
+
+
+def publish_rates(interval):
+    """模拟汇率推送：每次只发送变化的汇率"""
+    rates = {code: rate for code, rate in RATES.items() if code != "USD"}
+    for code, rate in rates.items():
+        publish(f"rates/USD/{code}", str(rate).encode(), retain=True)
+    while True:
+        time.sleep(interval)
+        for code in random.sample(sorted(rates), random.randint(1, 2)):
+            rates[code] = round(rates[code] * random.uniform(0.998, 1.002), 4)
+            publish(f"rates/USD/{code}", str(rates[code]).encode(), retain=True)
+            show(f"rates/USD/{code}", str(rates[code]).encode())
+        publish("rates/USD/updated", str(int(time.time())).encode(), retain=True)
+
+
+class Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def option(args, name, default):
+    """取出 --name 值 参数"""
+    if name not in args:
+        return default
+    index = args.index(name)
+    value = float(args[index + 1])
+    del args[index:index + 2]
+    return value
+
+
+def main(argv):
+    global flaky
+    args = argv[1:]
+    flaky = int(option(args, "--flaky", 0))
+    rates = option(args, "--rates", 0)
+    port = int(args[0]) if args else 1883
+    server = Server(("0.0.0.0", port), Handler)
+    print(f"MQTT stub listening on port {port}")
+    if rates:
+        threading.Thread(target=publish_rates, args=(rates,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"{stats['messages']} messages ({stats['bytes']} bytes) over {stats['connections']} connections")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,82 @@
+"""
+把多张同尺寸的BMP打包成一张横向排列的精灵图（在电脑上运行）
+
+usage:
+    python tools/pack_sprites.py apps/cxk/resources/sheet.bmp apps/cxk/resources/cxk_*.bmp
+
+输出的BMP保持输入的色深，单帧的宽高写在文件头的两个保留字段里，
+设备端的 pico.animation.SpriteSheet 据此切分帧。
+"""
+import glob
+import struct
+import sys
+
+
+def read_bmp(path):
+    """读取未压缩的BMP，返回 (宽, 高, 色深, 调色板/掩码数据, 自上而下的像素行)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:2] != b"BM":
+        raise ValueError(f"{path} is not a BMP file")
+    offset, = struct.unpack_from("<I", data, 10)
+    header_size, width, height, _, bpp, compression = struct.unpack_from("<IiiHHI", data, 14)
+    if compression not in (0, 3):
+        raise ValueError(f"{path}: compressed BMP is not supported")
+    # 文件头之后、像素之前的调色板或颜色掩码原样保留
+    extra = data[14 + header_size:offset]
+    if compression == 3 and header_size > 40:
+        # 颜色掩码在扩展文件头里，输出40字节文件头时放到头后面
+        extra = data[54:66] + extra
+    stride = (width * bpp + 31) // 32 * 4
+    rows = []
+    for y in range(abs(height)):
+        start = offset + y * stride
+        rows.append(data[start:start + (width * bpp + 7) // 8])
+    if height > 0:
+        rows.reverse()
+    return width, abs(height), bpp, compression, extra, rows
+
+
+def write_bmp(path, width, height, bpp, compression, extra, rows, frame_width, frame_height):
+    """写入自下而上存储的BMP，保留字段记录单帧尺寸"""
+    stride = (width * bpp + 31) // 32 * 4
+    offset = 14 + 40 + len(extra)
+    colors = len(extra) // 4 if bpp <= 8 else 0
+    size = offset + stride * height
+    with open(path, "wb") as f:
+        f.write(struct.pack("<2sIHHI", b"BM", size, frame_width, frame_height, offset))
+        f.write(struct.pack("<IiiHHIIiiII", 40, width, height, 1, bpp, compression,
+                            stride * height, 2835, 2835, colors, 0))
+        f.write(extra)
+        padding = b"\0" * (stride - len(rows[0]))
+        for row in reversed(rows):
+            f.write(row + padding)
+
+
+def pack(output, inputs):
+    """横向拼接所有帧"""
+    frames = [read_bmp(path) for path in inputs]
+    width, height, bpp, compression, extra, _ = frames[0]
+    for path, frame in zip(inputs, frames):
+        if frame[:3] != (width, height, bpp):
+            raise ValueError(f"{path}: all frames must have the same size and depth")
+    if bpp % 8:
+        raise ValueError("Only 8/16/24/32-bit BMPs can be packed")
+    rows = [b"".join(frame[5][y] for frame in frames) for y in range(height)]
+    write_bmp(output, width * len(frames), height, bpp, compression, extra, rows, width, height)
+    print(f"Packed {len(frames)} frames ({width}x{height}, {bpp}bit) into {output}")
+
+
+def main(argv):
+    if len(argv) < 3:
+        print(__doc__)
+        return 1
+    inputs = []
+    for pattern in argv[2:]:
+        inputs.extend(sorted(glob.glob(pattern)) or [pattern])
+    pack(argv[1], inputs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
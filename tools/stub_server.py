@@ -0,0 +1,155 @@
+"""
+本地HTTP测试服务器（在电脑上运行），代替汇率API测试请求性能
+
+usage:
+    python tools/stub_server.py [端口] [--update 秒数] [--delay 秒数]
+
+提供和 open.er-api.com 相同格式的 /v6/latest/USD，使用HTTP/1.1保持连接。
+响应带ETag和Last-Modified，请求带匹配的If-None-Match或If-Modified-Since时返回304，
+用于检查 pico.request.ResponseCache 的重新验证；--update 秒数 让数据按间隔变化；
+--delay 秒数 模拟慢速网络，响应头前等待这么久，响应内容也分块慢慢发送。
+在设备上把请求地址换成 http://<电脑IP>:<端口>/v6/latest/USD，运行
+PicoRequest.benchmark(url, 100) 和 benchmark(url, 100, reuse=False) 对比；
+服务器每10个请求打印一次收到的请求数和新建的连接数，连接数远小于请求数说明连接被复用。
+"""
+import json
+import sys
+import time
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATES = {
+    "USD": 1,
+    "CNY": 7.2345,
+    "EUR": 0.9213,
+    "JPY": 151.42,
+    "GBP": 0.7891,
+    "HKD": 7.8210,
+}
+
+stats = {"requests": 0, "connections": 0, "not_modified": 0}
+# 数据更新间隔（秒），0表示不变
+update_interval = 0
+# 响应延迟（秒），0表示不延迟
+delay = 0
+# 慢速发送时每块的字节数
+TRICKLE_SIZE = 64
+started = int(time.time())
+
+
+def payload():
+    """生成汇率数据，返回 (数据, 更新时间)
+
+    同一个更新周期内数据不变，ETag和Last-Modified也不变。
+    """
+    updated = started
+    if update_interval:
+        updated += (int(time.time()) - started) // update_interval * update_interval
+    body = json.dumps({
+        "result": "success",
+        "base_code": "USD",
+        "time_last_update_unix": updated,
+        "time_next_update_unix": updated + (update_interval or 86400),
+        "rates": RATES,
+    }).encode()
+    return body, updated
+
+
+def not_modified(headers, etag, updated):
+    """条件请求的验证"""
+    match = headers.get("If-None-Match")
+    if match is not None:
+        return match == etag
+    since = headers.get("If-Modified-Since")
+    if since is not None:
+        try:
+            return parsedate_to_datetime(since).timestamp() >= updated
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        stats["connections"] += 1
+
+    def do_GET(self):
+        stats["requests"] += 1
+        if self.path.rstrip("/") not in ("/v6/latest/USD", "/latest/USD"):
+            self.send_error(404)
+            return
+        body, updated = payload()
+        if delay:
+            time.sleep(delay)
+        etag = '"%08x"' % zlib.crc32(body)
+        if not_modified(self.headers, etag, updated):
+            stats["not_modified"] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(updated, usegmt=True))
+            self.end_headers()
+            if delay:
+                # 内容分块发送，总共再用一个delay
+                pause = delay / max(1, len(body) // TRICKLE_SIZE)
+                try:
+                    for start in range(0, len(body), TRICKLE_SIZE):
+                        self.wfile.write(body[start:start + TRICKLE_SIZE])
+                        self.wfile.flush()
+                        time.sleep(pause)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端拿到需要的值或取消后提前关闭连接
+                    self.close_connection = True
+            else:
+                self.wfile.write(body)
+        if stats["requests"] % 10 == 0:
+            report()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def report():
+    """打印请求统计"""
+    print(f"{stats['requests']} requests over {stats['connections']} connections, "
+          f"{stats['not_modified']} not modified")
+
+
+def option(args, name, default):
+    """取出 --name 值 参数"""
+    if name not in args:
+        return default
+    index = args.index(name)
+    value = float(args[index + 1])
+    del args[index:index + 2]
+    return value
+
+
+def main(argv):
+    global update_interval, delay
+    args = argv[1:]
+    update_interval = int(option(args, "--update", 0))
+    delay = option(args, "--delay", 0)
+    port = int(args[0]) if args else 8080
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    print(f"Serving on port {port}, GET /v6/latest/USD")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,258 @@
+"""
+在电脑上模拟启动时的WiFi连接，对比阻塞连接和后台连接的启动到菜单耗时
+
+usage:
+    python tools/wifi_sim.py [其他启动阶段耗时s] [连接AP耗时s] [连接失败超时s] [断网时长s]
+
+用模拟的 wifi.radio 代替真实射频，分别模拟AP可达和不可达两种情况：
+- 旧流程：SystemManager初始化时 stop_station()、sleep(1)，再阻塞调用connect()，之后才显示菜单
+- 新流程：先显示菜单，CircuitPython在后台自动连接，应用需要网络时用 WifiConnection.wait() 等待
+其他启动阶段的耗时可以用设备上 BootTimer 打印的数字代入。
+
+另外模拟AP断开一段时间再恢复：
+- 旧方式：应用每隔RETRY_INTERVAL秒调用一次旧的connect()（stop_station、sleep(1)、扫描后连接）
+- 新方式：WifiConnection.supervise() 按指数退避加抖动重连，使用缓存的信道（支持时还有BSSID）
+  减少扫描；Pico W不支持bssid参数，默认按不支持模拟
+比较恢复后多久重新连上、阻塞在连接中的时间和尝试次数；
+以及只停留在菜单时射频关闭的时间（RADIO_MA为假设的射频待机电流，换成实测值）。
+"""
+import os
+import random
+import sys
+import tempfile
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class SimTime:
+    """模拟时钟，替换pico.wifi里的time模块"""
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+# 扫描所有信道的时间（秒），指定BSSID时省去，只指定信道时只扫描一个信道
+SCAN_TIME = 1.5
+CHANNELS = 13
+# 旧方式应用重试连接的间隔（秒）
+RETRY_INTERVAL = 5.0
+# 假设的射频待机电流（mA）
+RADIO_MA = 30
+
+
+class FakeRadio:
+    """模拟的wifi.radio
+
+    reachable为True时，系统后台自动连接在上电后join_time秒完成，
+    主动connect()也需要join_time秒，指定BSSID时少SCAN_TIME，只指定信道时只扫描一个信道；
+    不可达或在outage期间connect()在超时后抛出异常。
+    outage为 (开始, 结束) 时，期间连接断开，恢复后不会自动重连。
+    bssid_supported为False时和Pico W一样，传bssid会抛出NotImplementedError。
+    """
+    def __init__(self, clock, reachable, join_time, fail_timeout, outage=None, bssid_supported=False):
+        self.clock = clock
+        self.bssid_supported = bssid_supported
+        self.reachable = reachable
+        self.join_time = join_time
+        self.fail_timeout = fail_timeout
+        self.outage = outage
+        self._auto_at = join_time if reachable else None
+        self._connected = False
+        self.enabled = True
+        self.attempts = 0
+        self.ipv4_address = "192.168.1.50"
+        self.ap_info = types.SimpleNamespace(channel=6, bssid=b"\x02\x11\x22\x33\x44\x55")
+
+    def _ap_up(self):
+        if not self.reachable:
+            return False
+        return not self.outage or not self.outage[0] <= self.clock.now < self.outage[1]
+
+    @property
+    def connected(self):
+        if self._auto_at is not None and self.clock.now >= self._auto_at:
+            self._connected = True
+            self._auto_at = None
+        if not self._ap_up() or not self.enabled:
+            self._connected = False
+        return self._connected
+
+    def stop_station(self):
+        self._connected = False
+        self._auto_at = None
+
+    def connect(self, ssid, password, channel=0, bssid=None, timeout=None):
+        if self.connected:
+            return
+        if bssid and not self.bssid_supported:
+            raise NotImplementedError("bssid")
+        self.attempts += 1
+        if not self._ap_up() or not self.enabled:
+            self.clock.sleep(min(timeout or self.fail_timeout, self.fail_timeout))
+            raise ConnectionError("No network with that ssid")
+        if bssid:
+            self.clock.sleep(max(0.5, self.join_time - SCAN_TIME))
+        elif channel:
+            self.clock.sleep(max(0.5, self.join_time - SCAN_TIME + SCAN_TIME / CHANNELS))
+        else:
+            self.clock.sleep(self.join_time)
+        self._connected = True
+
+
+def install(clock, radio):
+    """把模拟的wifi和socketpool模块装入sys.modules，返回pico.wifi模块"""
+    wifi_module = types.ModuleType("wifi")
+    wifi_module.radio = radio
+    pool_module = types.ModuleType("socketpool")
+    pool_module.SocketPool = lambda radio: object()
+    sys.modules["wifi"] = wifi_module
+    sys.modules["socketpool"] = pool_module
+    sys.modules.pop("pico.wifi", None)
+    import pico.wifi
+    pico.wifi.time = clock
+    # 不写设备路径，每次从没有缓存的状态开始
+    pico.wifi.AP_CACHE_PATH = os.path.join(tempfile.gettempdir(), "wifi_sim_ap.json")
+    if os.path.exists(pico.wifi.AP_CACHE_PATH):
+        os.remove(pico.wifi.AP_CACHE_PATH)
+    return pico.wifi
+
+
+def old_boot(other, reachable, join_time, fail_timeout):
+    """旧流程：连接完成或失败后才显示菜单"""
+    clock = SimTime()
+    radio = FakeRadio(clock, reachable, join_time, fail_timeout)
+    pico_wifi = install(clock, radio)
+    wifi = pico_wifi.PicoWifi()
+    # 旧版connect()无条件 stop_station() + sleep(1)
+    radio.stop_station()
+    clock.sleep(1)
+    try:
+        radio.connect(wifi.ssid, wifi.password)
+        connected = True
+    except ConnectionError:
+        connected = False
+    clock.sleep(other)
+    return clock.now, clock.now if connected else None
+
+
+def new_boot(other, reachable, join_time, fail_timeout):
+    """新流程：先显示菜单，应用打开时等待后台连接"""
+    clock = SimTime()
+    radio = FakeRadio(clock, reachable, join_time, fail_timeout)
+    pico_wifi = install(clock, radio)
+    clock.sleep(other)
+    menu = clock.now
+    connection = pico_wifi.WifiConnection(pico_wifi.PicoWifi())
+    connection.start()
+    # 假设用户看到菜单后立即打开需要网络的应用
+    connected = connection.wait(timeout=fail_timeout + pico_wifi.AUTO_CONNECT_GRACE)
+    return menu, clock.now if connected else None
+
+
+def old_outage(join_time, fail_timeout, outage, end):
+    """旧方式：应用定时调用旧connect()，每次stop_station、sleep(1)后扫描连接
+
+    Returns:
+        (恢复后重新连上用的时间, 阻塞的时间, 尝试次数)
+    """
+    clock = SimTime()
+    radio = FakeRadio(clock, True, join_time, fail_timeout, outage)
+    install(clock, radio)
+    blocked = 0
+    reconnected = None
+    while clock.now < end:
+        if not radio.connected and clock.now >= outage[0]:
+            start = clock.now
+            radio.stop_station()
+            clock.sleep(1)
+            try:
+                radio.connect("ssid", "password")
+                if reconnected is None:
+                    reconnected = clock.now - outage[1]
+            except ConnectionError:
+                pass
+            blocked += clock.now - start
+        clock.sleep(RETRY_INTERVAL)
+    return reconnected, blocked, radio.attempts
+
+
+def new_outage(join_time, fail_timeout, outage, end, bssid_supported=False):
+    """新方式：菜单循环调用supervise()"""
+    clock = SimTime()
+    radio = FakeRadio(clock, True, join_time, fail_timeout, outage, bssid_supported)
+    pico_wifi = install(clock, radio)
+    connection = pico_wifi.WifiConnection(pico_wifi.PicoWifi())
+    connection.acquire("mqtt")
+    # 先连上一次，记住AP
+    connection.wait(timeout=fail_timeout)
+    radio.attempts = 0
+    blocked = 0
+    while clock.now < end:
+        start = clock.now
+        connection.supervise()
+        if clock.now - start > 0.5:
+            blocked += clock.now - start
+        clock.sleep(0.05)
+    reconnected = connection.reconnect_time - (outage[1] - outage[0]) if connection.reconnects else None
+    return reconnected, blocked, radio.attempts
+
+
+def idle_radio(join_time, minutes):
+    """只停留在菜单时射频关闭的时间"""
+    clock = SimTime()
+    radio = FakeRadio(clock, True, join_time, 10)
+    pico_wifi = install(clock, radio)
+    connection = pico_wifi.WifiConnection(pico_wifi.PicoWifi())
+    connection.start()
+    end = minutes * 60
+    while clock.now < end:
+        connection.supervise()
+        clock.sleep(0.05)
+    return connection.get_stats()['off_time']
+
+
+def main(argv):
+    other = float(argv[1]) if len(argv) > 1 else 1.5
+    join_time = float(argv[2]) if len(argv) > 2 else 3.0
+    fail_timeout = float(argv[3]) if len(argv) > 3 else 10.0
+    outage_time = float(argv[4]) if len(argv) > 4 else 30.0
+    random.seed(1)
+    print(f"Other boot phases {other}s, AP join {join_time}s, failed connect {fail_timeout}s\n")
+    print(f"{'AP':<12}{'flow':<10}{'menu shown':>12}{'network ready':>16}")
+    for reachable in (True, False):
+        for name, flow in (("blocking", old_boot), ("deferred", new_boot)):
+            menu, ready = flow(other, reachable, join_time, fail_timeout)
+            ready_text = f"{ready:.2f}s" if ready is not None else "failed"
+            ap = "reachable" if reachable else "unreachable"
+            print(f"{ap:<12}{name:<10}{menu:>11.2f}s{ready_text:>16}")
+
+    outage = (20.0, 20.0 + outage_time)
+    end = outage[1] + 120
+    print(f"\nAP down for {outage_time}s, scan {SCAN_TIME}s, old retry every {RETRY_INTERVAL}s\n")
+    print(f"{'flow':<20}{'reconnect':>12}{'blocked':>10}{'attempts':>10}")
+    flows = (
+        ("fixed retry", old_outage, ()),
+        ("supervisor channel", new_outage, (False,)),
+        ("supervisor bssid", new_outage, (True,))
+    )
+    for name, flow, args in flows:
+        reconnected, blocked, attempts = flow(join_time, fail_timeout, outage, end, *args)
+        text = f"{reconnected:.2f}s" if reconnected is not None else "never"
+        print(f"{name:<20}{text:>12}{blocked:>9.1f}s{attempts:>10}")
+
+    minutes = 10
+    off = idle_radio(join_time, minutes)
+    total = minutes * 60
+    print(f"\nMenu only for {minutes} min: radio off {off:.0f}s of {total}s, "
+          f"about {RADIO_MA * (total - off) / total:.1f}mA average radio draw instead of {RADIO_MA}mA")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))